@@ -1,6 +1,7 @@
-from ..tools.mock_tms import get_order_status
-from ..tools.mock_policy import lookup_policy
-from ..core.state import AgentState
+from tools.mock_tms import get_order_status
+from tools.mock_policy import lookup_policy
+from core.state import AgentState
+from utils.metrics import FALLBACK_TO_HUMAN
 
 ACTION_INTENTS = ["damage_report", "missing_task"]
 
@@ -19,4 +20,22 @@ def run_action_handler(state: AgentState) -> dict:
     return {
         "response_text": response,
         "deep_link": deep_link
-    }
\ No newline at end of file
+    }
+# /ask 的 operation_guide 意图：按问题关键词匹配操作入口
+GUIDE_KEYWORDS = {
+    "damage_report": ["破损", "坏了", "烂了", "补货"],
+    "missing_task": ["漏派", "补派", "没派", "少派"],
+}
+
+def handle(question: str) -> dict:
+    """返回 {"answer", "action"}；匹配不到操作入口时转人工"""
+    for intent, keywords in GUIDE_KEYWORDS.items():
+        if any(word in question for word in keywords):
+            result = run_action_handler({"intent": intent})
+            return {
+                "answer": f"{result['response_text']}\n\n操作入口：{result['deep_link']}",
+                "action": "show_answer",
+                "deep_link": result["deep_link"]
+            }
+    FALLBACK_TO_HUMAN.inc()
+    return {"answer": "暂未找到对应的操作指引，请联系人工客服。", "action": "fallback_to_human"}
@@ -1,59 +1,102 @@
 # agents/api_handler.py
-import requests
 from config.settings import settings
+from services.circuit_breaker import CircuitOpenError
+from services.downstream_client import downstream
 from utils.metrics import API_CALL_COUNTER
 
+RETRY_LATER = {"answer": "系统繁忙，请稍后再试。", "action": "retry_later"}
+FALLBACK_TO_HUMAN = {"answer": "查询失败，请联系客服。", "action": "fallback_to_human"}
+
+def _request_spec(intent: str, context: dict):
+    """返回 (method, url, 请求参数)，未知意图返回 None"""
+    user_id = context["user_id"]
+    if intent == "order_status":
+        # 调用 Java 订单服务（通过内网 HTTP 或 gRPC）
+        return "POST", f"{settings.ORDER_SERVICE_URL}/v1/status", {
+            "json": {"user_id": user_id, "last_order_only": True}
+        }
+    if intent == "delivery_estimate":
+        return "POST", f"{settings.LOGISTICS_SERVICE_URL}/v1/estimate", {
+            "json": {"user_lat": context["lat"], "user_lng": context["lng"]}
+        }
+    if intent == "account_balance":
+        # 注意：敏感操作需二次验证（此处简化）
+        return "GET", f"{settings.ACCOUNT_SERVICE_URL}/v1/balance", {
+            "params": {"user_id": user_id},
+            "headers": {"Authorization": f"Bearer {context['token']}"}
+        }
+    return None
+
+def _render(intent: str, data: dict) -> dict:
+    if intent == "order_status":
+        answer = f"您的最新订单 {data['order_id']} 当前状态：{data['status']}，预计 {data['eta']} 到达。"
+        return {"answer": answer, "action": "show_answer", "source": "order_api"}
+    if intent == "delivery_estimate":
+        return {
+            "answer": f"当前平均配送时间约 {data['minutes']} 分钟。",
+            "action": "show_answer",
+            "source": "logistics_api"
+        }
+    return {
+        "answer": f"您的账户余额为 ¥{data['balance']:.2f}。",
+        "action": "show_answer",
+        "source": "account_api"
+    }
+
 def handle(intent: str, context: dict) -> dict:
     user_id = context.get("user_id")
     if not user_id:
         return {"answer": "请先登录", "action": "require_login"}
 
     try:
-        if intent == "order_status":
-            # 调用 Java 订单服务（通过内网 HTTP 或 gRPC）
-            resp = requests.post(
-                "http://order-service.internal/v1/status",
-                json={"user_id": user_id, "last_order_only": True},
-                timeout=2
-            )
-            if resp.status_code == 200:
-                data = resp.json()
-                answer = f"您的最新订单 {data['order_id']} 当前状态：{data['status']}，预计 {data['eta']} 到达。"
-                return {"answer": answer, "action": "show_answer", "source": "order_api"}
-        
-        elif intent == "delivery_estimate":
-            resp = requests.post(
-                "http://logistics-service.internal/v1/estimate",
-                json={"user_lat": context["lat"], "user_lng": context["lng"]},
-                timeout=2
-            )
-            if resp.status_code == 200:
-                eta = resp.json()["minutes"]
-                return {
-                    "answer": f"当前平均配送时间约 {eta} 分钟。",
-                    "action": "show_answer",
-                    "source": "logistics_api"
-                }
-
-        elif intent == "account_balance":
-            # 注意：敏感操作需二次验证（此处简化）
-            resp = requests.get(
-                f"http://account-service.internal/v1/balance?user_id={user_id}",
-                headers={"Authorization": f"Bearer {context['token']}"},
-                timeout=2
-            )
+        spec = _request_spec(intent, context)
+        if spec:
+            method, url, kwargs = spec
+            resp = downstream.request(intent, method, url, **kwargs)
             if resp.status_code == 200:
-                balance = resp.json()["balance"]
-                return {
-                    "answer": f"您的账户余额为 ¥{balance:.2f}。",
-                    "action": "show_answer",
-                    "source": "account_api"
-                }
+                API_CALL_COUNTER.labels(intent=intent, status="ok").inc()
+                return _render(intent, resp.json())
 
         # API 调用失败
-        return {"answer": "系统繁忙，请稍后再试。", "action": "retry_later"}
+        API_CALL_COUNTER.labels(intent=intent, status="failed").inc()
+        return dict(RETRY_LATER)
+
+    except CircuitOpenError:
+        # 熔断打开：不发请求，直接让用户稍后重试
+        API_CALL_COUNTER.labels(intent=intent, status="circuit_open").inc()
+        return dict(RETRY_LATER)
 
     except Exception as e:
         # 记录错误，但不暴露细节
         API_CALL_COUNTER.labels(intent=intent, status="error").inc()
-        return {"answer": "查询失败，请联系客服。", "action": "fallback_to_human"}
\ No newline at end of file
+        return dict(FALLBACK_TO_HUMAN)
+
+async def handle_async(intent: str, context: dict) -> dict:
+    """与 handle 语义一致，下游调用走异步 HTTP，不占用 worker 线程"""
+    user_id = context.get("user_id")
+    if not user_id:
+        return {"answer": "请先登录", "action": "require_login"}
+
+    try:
+        spec = _request_spec(intent, context)
+        if spec:
+            method, url, kwargs = spec
+            resp = await downstream.arequest(intent, method, url, **kwargs)
+            if resp.status_code == 200:
+                API_CALL_COUNTER.labels(intent=intent, status="ok").inc()
+                return _render(intent, resp.json())
+
+        API_CALL_COUNTER.labels(intent=intent, status="failed").inc()
+        return dict(RETRY_LATER)
+
+    except CircuitOpenError:
+        # 熔断打开：不发请求，直接让用户稍后重试
+        API_CALL_COUNTER.labels(intent=intent, status="circuit_open").inc()
+        return dict(RETRY_LATER)
+
+    except Exception as e:
+        API_CALL_COUNTER.labels(intent=intent, status="error").inc()
+        return dict(FALLBACK_TO_HUMAN)
+
+async def aclose():
+    await downstream.aclose()
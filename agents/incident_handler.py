@@ -1,21 +1,41 @@
-import json
-from ..utils.logger import log_incident
-from ..core.state import AgentState
+import re
+from utils.logger import log_incident
+from utils.safety_guard import mask_pii, mask_pii_batch
+from core.state import AgentState
+from services.incident_context import gather_context
+from tools.mock_gps import MockGPSSource
+from tools.mock_tms import MockTMSSource
+from tools.mock_wms import MockWMSSource
+
+# 上下文数据源（生产环境替换为真实的 TMS / GPS / WMS 客户端）
+CONTEXT_SOURCES = [MockTMSSource(), MockGPSSource(), MockWMSSource()]
+
+_ORDER_ID = re.compile(r"ORD[0-9A-Za-z]+")
+
+def extract_order_id(state: AgentState):
+    """上下文中已有订单号则直接用，否则从最近的消息里找 ORD 开头的订单号"""
+    order_id = (state.get("context") or {}).get("order_id")
+    if order_id:
+        return order_id
+    for message in reversed(state["messages"]):
+        match = _ORDER_ID.search(message.content)
+        if match:
+            return match.group()
+    return None
 
 def run_incident_handler(state: AgentState) -> dict:
-    # 模拟拉取多源数据（实际应并行调用）
-    context = {
-        "order": {"id": "ORD123", "status": "DELIVERED"},
-        "gps": [{"time": "06:30", "location": "朝阳仓"}],
-        "chat_log": ["用户：没收到货！"]
-    }
+    # 并行拉取多源数据，共享截止时间，超时的源标注后跳过
+    order_id = extract_order_id(state)
+    context, sources = gather_context(CONTEXT_SOURCES, order_id)
+    context["chat_log"] = mask_pii_batch([m.content for m in state["messages"]])
     
     # 生成异常快照
     snapshot = {
         "user_id": state["user_id"],
         "intent": state["intent"],
         "context": context,
-        "original_question": state["messages"][-1].content
+        "sources": sources,
+        "original_question": mask_pii(state["messages"][-1].content)
     }
     
     # 记录工单（实际调用工单系统）
@@ -25,4 +45,4 @@ def run_incident_handler(state: AgentState) -> dict:
         "response_text": "已为您提交异常处理申请，专员将在10分钟内联系您。",
         "ticket_created": True,
         "requires_human": True
-    }
\ No newline at end of file
+    }
@@ -1,32 +1,51 @@
+import logging
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from ..core.state import AgentState
+from config.settings import settings
+from core.state import AgentState
+from services.intent_cascade import IntentCascade, INTENT_SYSTEM_PROMPT
+from services.lazy import LazyComponent
+from services.rag_retriever import policy_retriever
+from services.semantic_cache import create_semantic_cache
+from utils.safety_guard import contains_sensitive_content
 
-# 初始化 LLM（生产环境应替换为私有模型）
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+logger = logging.getLogger(__name__)
+
+# LLM 客户端惰性创建（生产环境应替换为私有模型）
+llm = LazyComponent("orchestrator_llm", lambda: ChatOpenAI(model=settings.LLM_INTENT_MODEL, temperature=0))
 
 INTENT_PROMPT = ChatPromptTemplate.from_messages([
-    ("system", """你是一个物流协同助手意图分类器。请将用户问题分类为以下之一：
-    - order_status: 查询订单状态
-    - policy_query: 询问规则政策
-    - commission_rule: 佣金结算问题
-    - damage_report: 货品破损上报
-    - missing_task: 到仓无任务
-    - compensation_claim: 赔偿诉求
-    - user_complaint: 用户投诉
-    - multi_issue: 多问题复合
-    - other: 其他或无法识别
-    
-    只返回 JSON: {"intent": "...", "confidence": 0.x}"""),
+    ("system", INTENT_SYSTEM_PROMPT),
     ("human", "{question}")
 ])
 
+def llm_classify(question: str) -> str:
+    return (INTENT_PROMPT | llm.get()).invoke({"question": question}).content
+
+def _load_local_classifier():
+    try:
+        from models.sft.logistics_intent_classifier import LogisticsIntentClassifier
+
+        return LogisticsIntentClassifier(settings.LOCAL_INTENT_MODEL_PATH, backend=settings.LOCAL_INTENT_BACKEND)
+    except FileNotFoundError:
+        logger.warning(f"Local intent model not found at {settings.LOCAL_INTENT_MODEL_PATH}, all intents go to LLM")
+    except Exception as e:
+        # 缺依赖（ImportError）或模型加载失败都不应拖垮编排，全部走 LLM
+        logger.error(f"Local intent classifier unavailable, all intents go to LLM: {e}", exc_info=True)
+    return None
+
+def _build_cascade():
+    # LLM 结果语义缓存，与政策检索共用嵌入模型和查询编码缓存
+    semantic_cache = create_semantic_cache(lambda q: policy_retriever.get().embed_query(q))
+    return IntentCascade(_load_local_classifier(), llm_classify, semantic_cache=semantic_cache)
+
+intent_cascade = LazyComponent("intent_cascade", _build_cascade)
+
 def run_orchestrator(state: AgentState) -> dict:
     question = state["messages"][-1].content
     
     # 敏感词立即拦截
-    sensitive_words = ["赔偿", "起诉", "隐私", "个人信息", "罚款"]
-    if any(w in question for w in sensitive_words):
+    if contains_sensitive_content(question, scope="orchestrator"):
         return {
             "intent": "sensitive_blocked",
             "confidence": 1.0,
@@ -34,15 +53,9 @@ def run_orchestrator(state: AgentState) -> dict:
             "response_text": "该问题涉及敏感内容，请【点击转人工】由专员为您处理。"
         }
     
-    # 调用 LLM 分类
-    chain = INTENT_PROMPT | llm
-    try:
-        result = chain.invoke({"question": question})
-        parsed = eval(result.content)  # 实际应用中用 JSON parser
-        intent = parsed["intent"]
-        confidence = parsed["confidence"]
-    except:
-        intent, confidence = "other", 0.0
+    # 本地分类器优先，低置信度才调用 LLM
+    result = intent_cascade.get().classify(question)
+    intent, confidence = result["intent"], result["confidence"]
     
     # 低置信度转人工
     if confidence < 0.85 or intent == "other":
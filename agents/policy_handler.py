@@ -1,36 +1,126 @@
 # agents/policy_handler.py
-from services.rag_retriever import RAGPolicyRetriever
-from utils.safety_guard import contains_sensitive_content
+import logging
+import threading
+from services.rag_retriever import policy_retriever
+from services.index_version import current_index_version
+from config.settings import settings
+from utils.cache import LRUCache, normalize_query
+from utils.safety_guard import contains_sensitive_content, mask_pii
 from utils.metrics import RAG_POLICY_HIT, RAG_POLICY_MISS, FALLBACK_TO_HUMAN
 
-retriever = RAGPolicyRetriever()
+# 政策答案缓存：(索引版本, 归一化问题, 元数据过滤) → (结果类型, 响应)
+response_cache = LRUCache(
+    "policy_response",
+    maxsize=settings.POLICY_RESPONSE_CACHE_SIZE,
+    ttl_seconds=settings.POLICY_RESPONSE_CACHE_TTL_S
+)
+_cache_version = {"version": None}
+_version_lock = threading.Lock()
 
-def handle_policy_query(question: str, context: dict) -> dict:
-    metadata_filter = {
-        "region": context.get("region", "default"),
-        "min_app_version": context.get("app_version", "0.0.0")
-    }
-    
-    result = retriever.retrieve(question, metadata_filter=metadata_filter)
-    
-    if not result:
-        RAG_POLICY_MISS.inc()
-        FALLBACK_TO_HUMAN.inc()
-        return {
+logger = logging.getLogger(__name__)
+
+# 只缓存检索真实给出的结果；检索失败（"error"）不入缓存，下次请求重新检索
+CACHEABLE_OUTCOMES = ("hit", "miss", "sensitive")
+RETRIEVAL_ERROR = ("error", {
+    "answer": "政策查询暂时不可用，请稍后再试或联系人工客服。",
+    "action": "fallback_to_human"
+})
+
+def _answer_policy_query(retriever, question: str, metadata_filter: dict):
+    """检索 → 融合 → 敏感检查 → 模板组装，返回 (结果类型, 响应)"""
+    return _render_policy_answer(retriever.retrieve(question, metadata_filter=metadata_filter))
+
+def _render_policy_answer(results: list):
+    if not results:
+        return "miss", {
             "answer": "未找到相关政策说明，请联系人工客服。",
             "action": "fallback_to_human"
         }
     
+    result = results[0]
     if contains_sensitive_content(result["text"]):
-        FALLBACK_TO_HUMAN.inc()
-        return {
+        return "sensitive", {
             "answer": "该问题涉及敏感内容，请联系人工客服。",
             "action": "fallback_to_human"
         }
     
-    RAG_POLICY_HIT.inc()
     answer = f"根据最新政策：{result['text']}"
     if result["deep_link"]:
         answer += f"\n\n查看全文：{result['deep_link']}"
     
-    return {"answer": answer, "action": "show_answer"}
\ No newline at end of file
+    return "hit", {"answer": answer, "action": "show_answer"}
+
+def _record_outcome(outcome: str):
+    if outcome == "hit":
+        RAG_POLICY_HIT.inc()
+        return
+    if outcome == "miss":
+        RAG_POLICY_MISS.inc()
+    FALLBACK_TO_HUMAN.inc()
+
+def _metadata_filter(context: dict) -> dict:
+    return {
+        "region": context.get("region", "default"),
+        "min_app_version": context.get("app_version", "0.0.0")
+    }
+
+def _current_version() -> str:
+    # 索引重建后版本戳变化，旧答案整体失效
+    version = current_index_version()
+    with _version_lock:
+        if _cache_version["version"] != version:
+            response_cache.clear()
+            _cache_version["version"] = version
+    return version
+
+def _cache_key(version: str, question: str, metadata_filter: dict):
+    return (version, normalize_query(mask_pii(question)), tuple(sorted(metadata_filter.items())))
+
+def handle_policy_query(question: str, context: dict) -> dict:
+    metadata_filter = _metadata_filter(context)
+    cache_key = _cache_key(_current_version(), question, metadata_filter)
+    cached = response_cache.get(cache_key)
+    if cached is None:
+        retriever = policy_retriever.get()
+        served = retriever.index_version
+        try:
+            cached = _answer_policy_query(retriever, question, metadata_filter)
+        except Exception as e:
+            logger.warning(f"Policy retrieval failed, not caching: {e}")
+            cached = RETRIEVAL_ERROR
+        # 新版本仍在后台加载、检索用的是旧索引时不写缓存，避免旧答案挂在新版本的键下
+        if served == cache_key[0] and cached[0] in CACHEABLE_OUTCOMES:
+            response_cache.put(cache_key, cached)
+    
+    outcome, response = cached
+    _record_outcome(outcome)
+    return dict(response)
+
+def handle_policy_query_batch(questions: list, contexts: list) -> list:
+    """批量版 handle_policy_query：未命中答案缓存的问题合并为一次 retrieve_many，结果顺序与输入一致"""
+    version = _current_version()
+    filters = [_metadata_filter(context) for context in contexts]
+    keys = [_cache_key(version, q, f) for q, f in zip(questions, filters)]
+    answers = [response_cache.get(key) for key in keys]
+    
+    pending = [i for i, cached in enumerate(answers) if cached is None]
+    if pending:
+        retriever = policy_retriever.get()
+        served = retriever.index_version
+        try:
+            results = retriever.retrieve_many(
+                [questions[i] for i in pending], [filters[i] for i in pending]
+            )
+        except Exception as e:
+            logger.warning(f"Batch policy retrieval failed, not caching: {e}")
+            results = None
+        for n, i in enumerate(pending):
+            answers[i] = _render_policy_answer(results[n]) if results is not None else RETRIEVAL_ERROR
+            if served == version and answers[i][0] in CACHEABLE_OUTCOMES:
+                response_cache.put(keys[i], answers[i])
+    
+    responses = []
+    for outcome, response in answers:
+        _record_outcome(outcome)
+        responses.append(dict(response))
+    return responses
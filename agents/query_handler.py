@@ -1,44 +1,150 @@
-from ..tools.mock_tms import get_order_status
-from ..tools.mock_policy import lookup_policy
-from ..core.state import AgentState
+# agents/query_handler.py
+import asyncio
 import logging
-from services.rag_retriever import RAGRetriever  # 自定义 RAG 检索服务
-from utils.safety_guard import contains_sensitive_content
+from tools.mock_tms import get_order_status
+from tools.mock_policy import lookup_policy
+from core.state import AgentState
 from constants import POLICY_SIMILARITY_THRESHOLD
-# agents/query_handler.py
 from services.intent_classifier import IntentClassifier
-from services.rag_retriever import RAGPolicyRetriever
-from utils.safety_guard import contains_sensitive_content, mask_pii
+from services.intent_batcher import IntentBatcher
+from services.rag_retriever import policy_retriever
+from services.lazy import LazyComponent
+from services.executors import search_executor
+from utils.safety_guard import contains_sensitive_content, mask_pii, mask_pii_batch
 from utils.metrics import FALLBACK_TO_HUMAN
 from config.settings import settings
 from agents import policy_handler, api_handler, action_handler
 
-classifier = IntentClassifier()
-retriever = RAGPolicyRetriever()
+# 意图模型惰性加载（FastAPI 启动时预热），导入本模块不加载任何权重。
+# torch 权重可跨 fork 共享；ONNX Runtime 会话与微批器（后台线程）不能，fork 后在子进程重建
+intent_model = LazyComponent("intent_model", IntentClassifier, fork_safe=settings.INTENT_BACKEND != "onnx")
+classifier = LazyComponent(
+    "intent_classifier",
+    lambda: IntentBatcher(intent_model.get()),
+    warm=lambda batcher: batcher.predict("我的订单到哪了"),
+    fork_safe=False
+)
+
+API_INTENTS = ["order_status", "delivery_estimate", "account_balance"]
+
+def _fallback(answer: str) -> dict:
+    FALLBACK_TO_HUMAN.inc()
+    return {"answer": answer, "action": "fallback_to_human"}
 
 def handle_query(user_question: str, user_context: dict) -> dict:
     # 1. 脱敏
     clean_question = mask_pii(user_question)
     
     # 2. 意图识别
-    intent_result = classifier.predict(clean_question)
+    intent_result = classifier.get().predict(clean_question)
     intent = intent_result["intent"]
     confidence = intent_result["confidence"]
     
     if confidence < 0.85:
-        FALLBACK_TO_HUMAN.inc()
-        return {"answer": "未理解您的问题，请联系人工客服。", "action": "fallback_to_human"}
+        return _fallback("未理解您的问题，请联系人工客服。")
 
     # 3. 分发到不同处理器
     if intent == "policy_query":
-        return policy_handler.handle(clean_question, user_context)
-    elif intent in ["order_status", "delivery_estimate", "account_balance"]:
+        return policy_handler.handle_policy_query(clean_question, user_context)
+    elif intent in API_INTENTS:
         return api_handler.handle(intent, user_context)
     elif intent == "operation_guide":
         return action_handler.handle(clean_question)
     else:
-        FALLBACK_TO_HUMAN.inc()
-        return {"answer": "该问题暂不支持，请联系人工客服。", "action": "fallback_to_human"}
+        return _fallback("该问题暂不支持，请联系人工客服。")
+
+async def handle_query_async(user_question: str, user_context: dict) -> dict:
+    """
+    异步版 handle_query：意图识别等待微批 Future，政策检索进专用线程池，
+    下游 API 走异步 HTTP；队列已满时抛 Overloaded，由上层返回 503。
+    """
+    clean_question = mask_pii(user_question)
+    
+    intent_result = await asyncio.wrap_future(classifier.get().submit(clean_question))
+    intent = intent_result["intent"]
+    confidence = intent_result["confidence"]
+    
+    if confidence < 0.85:
+        return _fallback("未理解您的问题，请联系人工客服。")
+
+    if intent == "policy_query":
+        return await search_executor.run(policy_handler.handle_policy_query, clean_question, user_context)
+    elif intent in API_INTENTS:
+        return await api_handler.handle_async(intent, user_context)
+    elif intent == "operation_guide":
+        return action_handler.handle(clean_question)
+    else:
+        return _fallback("该问题暂不支持，请联系人工客服。")
+    
+def _classify_batch(user_questions: list):
+    """整批脱敏 + 一次前向推理，低置信度直接兜底；返回 (脱敏问题, 响应占位, {意图: [下标]})"""
+    clean_questions = mask_pii_batch(user_questions)
+    intent_results = intent_model.get().predict_batch(clean_questions) if clean_questions else []
+    
+    responses = [None] * len(clean_questions)
+    groups = {}
+    for i, result in enumerate(intent_results):
+        if result["confidence"] < 0.85:
+            responses[i] = _fallback("未理解您的问题，请联系人工客服。")
+        else:
+            groups.setdefault(result["intent"], []).append(i)
+    return clean_questions, responses, groups
+
+def handle_query_batch(user_questions: list, user_contexts: list) -> list:
+    """
+    批量版 handle_query：整批一次意图推理，按意图分组分发；
+    政策问题合并为一次批量检索（一次编码 + 多向量检索）。结果顺序与输入一致。
+    """
+    clean_questions, responses, groups = _classify_batch(user_questions)
+    
+    policy_rows = groups.pop("policy_query", [])
+    if policy_rows:
+        answers = policy_handler.handle_policy_query_batch(
+            [clean_questions[i] for i in policy_rows], [user_contexts[i] for i in policy_rows]
+        )
+        for i, answer in zip(policy_rows, answers):
+            responses[i] = answer
+    
+    for intent, rows in groups.items():
+        for i in rows:
+            if intent in API_INTENTS:
+                responses[i] = api_handler.handle(intent, user_contexts[i])
+            elif intent == "operation_guide":
+                responses[i] = action_handler.handle(clean_questions[i])
+            else:
+                responses[i] = _fallback("该问题暂不支持，请联系人工客服。")
+    return responses
+
+async def _single(coro) -> list:
+    return [await coro]
+
+async def handle_query_batch_async(user_questions: list, user_contexts: list) -> list:
+    """异步版 handle_query_batch：推理与检索进专用线程池，下游 API 调用并发执行"""
+    clean_questions, responses, groups = await search_executor.run(_classify_batch, user_questions)
+    
+    tasks = []
+    policy_rows = groups.pop("policy_query", [])
+    if policy_rows:
+        tasks.append((policy_rows, search_executor.run(
+            policy_handler.handle_policy_query_batch,
+            [clean_questions[i] for i in policy_rows],
+            [user_contexts[i] for i in policy_rows]
+        )))
+    
+    for intent, rows in groups.items():
+        for i in rows:
+            if intent in API_INTENTS:
+                tasks.append(([i], _single(api_handler.handle_async(intent, user_contexts[i]))))
+            elif intent == "operation_guide":
+                responses[i] = action_handler.handle(clean_questions[i])
+            else:
+                responses[i] = _fallback("该问题暂不支持，请联系人工客服。")
+    
+    results = await asyncio.gather(*(task for _, task in tasks))
+    for (rows, _), answers in zip(tasks, results):
+        for i, answer in zip(rows, answers):
+            responses[i] = answer
+    return responses
     
 QUERY_INTENTS = ["order_status", "policy_query", "commission_rule"]
 
@@ -77,13 +183,20 @@ def handle_policy_query(user_question: str, user_context: dict) -> dict:
         "min_app_version": user_context.get("app_version", "0.0.0")
     }
 
-    # Step 1: RAG 检索
-    results = retriever.retrieve(
-        query=user_question,
-        top_k=1,
-        metadata_filter=metadata_filter,
-        threshold=POLICY_SIMILARITY_THRESHOLD
-    )
+    # Step 1: RAG 检索（检索失败同样转人工，但与未命中区分来源）
+    try:
+        results = policy_retriever.get().retrieve(
+            query=user_question,
+            top_k=1,
+            metadata_filter=metadata_filter,
+            threshold=POLICY_SIMILARITY_THRESHOLD
+        )
+    except Exception:
+        return {
+            "answer": "政策查询暂时不可用，请稍后再试或联系人工客服。",
+            "action": "fallback_to_human",
+            "source": "rag_policy_error"
+        }
 
     # Step 2: 未命中 → 转人工
     if not results:
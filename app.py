@@ -1,9 +1,16 @@
 # app.py
+import asyncio
+from typing import List, Optional
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
-from agents.query_handler import handle_query
+from agents.query_handler import handle_query_async, handle_query_batch_async
+from agents import api_handler
+from services.executors import Overloaded, admission_gate
+from services.incident_sink import close_incident_sink
+from services.lazy import warm_up, component_status, all_loaded
+from config.settings import settings
 from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
-from starlette.responses import Response
+from starlette.responses import JSONResponse, Response
 
 app = FastAPI()
 
@@ -11,18 +18,76 @@ class QueryRequest(BaseModel):
     question: str
     region: str = "default"
     app_version: str = "0.0.0"
+    # 下游只读 API 所需的用户上下文（由网关鉴权后注入）
+    user_id: Optional[str] = None
+    token: Optional[str] = None
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+
+def _user_context(req: QueryRequest) -> dict:
+    context = {
+        "region": req.region,
+        "app_version": req.app_version
+    }
+    for key in ("user_id", "token", "lat", "lng"):
+        value = getattr(req, key)
+        if value is not None:
+            context[key] = value
+    return context
 
 @app.post("/ask")
-def ask(req: QueryRequest):
+async def ask(req: QueryRequest):
+    try:
+        with admission_gate:
+            return await handle_query_async(req.question, _user_context(req))
+    except Overloaded:
+        # 背压：快速失败，让网关 / 客户端重试到其他实例
+        raise HTTPException(status_code=503, detail="服务繁忙，请稍后再试。")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+class BatchQueryRequest(BaseModel):
+    items: List[QueryRequest]
+
+@app.post("/ask/batch")
+async def ask_batch(req: BatchQueryRequest):
+    """批量问答（如故障恢复后回放积压队列），结果与 items 顺序一致"""
+    if len(req.items) > settings.ASK_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"单批最多 {settings.ASK_BATCH_MAX_ITEMS} 条")
     try:
-        result = handle_query(req.question, {
-            "region": req.region,
-            "app_version": req.app_version
-        })
-        return result
+        with admission_gate:
+            answers = await handle_query_batch_async(
+                [item.question for item in req.items],
+                [_user_context(item) for item in req.items]
+            )
+            return {"results": answers}
+    except Overloaded:
+        raise HTTPException(status_code=503, detail="服务繁忙，请稍后再试。")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.on_event("startup")
+async def startup():
+    # 端口先就绪，模型在后台线程预热；预热完成前 /readyz 返回 503
+    if settings.WARM_UP_ON_STARTUP:
+        asyncio.get_running_loop().run_in_executor(None, warm_up)
+
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    body = {"ready": all_loaded(), "components": component_status()}
+    if not body["ready"]:
+        return JSONResponse(body, status_code=503)
+    return body
+
+@app.on_event("shutdown")
+async def shutdown():
+    await api_handler.aclose()
+    close_incident_sink()
+
 @app.get("/metrics")
 def metrics():
-    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
\ No newline at end of file
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -4,15 +4,95 @@ import os
 class Settings:
     # Model
     INTENT_MODEL_PATH = os.getenv("INTENT_MODEL_PATH", "models/sft/intent_model")
+    INTENT_BACKEND = os.getenv("INTENT_BACKEND", "torch")  # torch | onnx
+    INTENT_ONNX_PATH = os.getenv("INTENT_ONNX_PATH", "models/sft/intent_onnx/model.int8.onnx")
     EMBEDDING_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+    INTENT_BATCH_MAX_SIZE = int(os.getenv("INTENT_BATCH_MAX_SIZE", "16"))
+    INTENT_BATCH_MAX_WAIT_MS = float(os.getenv("INTENT_BATCH_MAX_WAIT_MS", "5"))
+    INTENT_BATCH_MAX_QUEUE = int(os.getenv("INTENT_BATCH_MAX_QUEUE", "256"))  # 排队超过此数直接 503
+    LOCAL_INTENT_MODEL_PATH = os.getenv("LOCAL_INTENT_MODEL_PATH", "models/sft/logistics_intent_lora")  # 编排层本地分类器
+    LOCAL_INTENT_BACKEND = os.getenv("LOCAL_INTENT_BACKEND", "torch")  # torch | onnx | onnx-int8
+    LOCAL_INTENT_THRESHOLD = float(os.getenv("LOCAL_INTENT_THRESHOLD", "0.9"))  # 低于此置信度升级到 LLM
+    LLM_INTENT_MODEL = os.getenv("LLM_INTENT_MODEL", "gpt-4o-mini")
+    SEMANTIC_CACHE_PATH = os.getenv("SEMANTIC_CACHE_PATH", "data/llm_intent_cache.npz")
+    SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "10000"))
+    SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))  # 余弦相似度不低于此值才复用
+    SEMANTIC_CACHE_SAVE_EVERY = int(os.getenv("SEMANTIC_CACHE_SAVE_EVERY", "50"))  # 每新增 N 条落盘一次
     
     # RAG
     POLICY_INDEX_PATH = "data/policy_faiss.index"
-    POLICY_DOCS_PATH = "data/policy_docs.npy"
+    POLICY_DOCS_JSONL = "data/policy_docs.jsonl"  # 政策原文（建索引输入）
+    POLICY_DOC_STORE_PATH = os.getenv("POLICY_DOC_STORE_PATH", "data/policy_doc_store")
     POLICY_SIMILARITY_THRESHOLD = 0.75
+    KEYWORD_ANALYZER = os.getenv("KEYWORD_ANALYZER", "char_ngram")  # char_ngram | jieba
+    RAG_CANDIDATE_MULTIPLIER = int(os.getenv("RAG_CANDIDATE_MULTIPLIER", "2"))  # 每路召回 top_k × N 个候选参与融合
+    RAG_FUSION_METHOD = os.getenv("RAG_FUSION_METHOD", "rrf")  # rrf | combsum，可按调用覆盖
+    RAG_FUSION_WEIGHTS = tuple(float(w) for w in os.getenv("RAG_FUSION_WEIGHTS", "1.0,1.0").split(","))  # 向量, 关键词
+    RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"  # 融合后交叉编码器重排（可选）
+    RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+    RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "20"))  # 融合结果前 N 条参与重排
+    RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+    RERANK_MAX_LENGTH = int(os.getenv("RERANK_MAX_LENGTH", "256"))
+    RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "80"))  # 每次检索的重排时间预算，超出则按融合顺序返回
+    RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "8192"))
+    RERANK_CALIBRATION_A = float(os.getenv("RERANK_CALIBRATION_A", "1.0"))  # Platt 校准：sigmoid(a * logit + b)
+    RERANK_CALIBRATION_B = float(os.getenv("RERANK_CALIBRATION_B", "0.0"))  # 由 scripts/calibrate_reranker.py 拟合
+    RERANK_THRESHOLD = float(os.getenv("RERANK_THRESHOLD", "0.5"))  # 校准后相关概率低于此值不作为答案
+    QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "2048"))
+    QUERY_CACHE_TTL_S = float(os.getenv("QUERY_CACHE_TTL_S", "0"))  # 0 表示不过期
+    POLICY_INDEX_VERSION_PATH = os.getenv("POLICY_INDEX_VERSION_PATH", "data/policy_index.version")
+    POLICY_INDEX_ROOT = os.getenv("POLICY_INDEX_ROOT", "data/policy_index")  # 增量发布的版本目录
+    POLICY_INDEX_KEEP = int(os.getenv("POLICY_INDEX_KEEP", "3"))  # 保留最近几个版本目录，供回滚
+    POLICY_RESPONSE_CACHE_SIZE = int(os.getenv("POLICY_RESPONSE_CACHE_SIZE", "1024"))
+    POLICY_RESPONSE_CACHE_TTL_S = float(os.getenv("POLICY_RESPONSE_CACHE_TTL_S", "0"))  # 0 表示仅靠版本戳失效
+    VECTOR_STORE_BACKEND = os.getenv("VECTOR_STORE_BACKEND", "local")  # local | milvus
+
+    # Milvus（仅 VECTOR_STORE_BACKEND=milvus 时需要）
+    MILVUS_HOST = os.getenv("MILVUS_HOST", "localhost")
+    MILVUS_PORT = int(os.getenv("MILVUS_PORT", "19530"))
+    MILVUS_COLLECTION_NAME = os.getenv("MILVUS_COLLECTION_NAME", "policy_rag")
+    
+    # Downstream services
+    ORDER_SERVICE_URL = os.getenv("ORDER_SERVICE_URL", "http://order-service.internal")
+    LOGISTICS_SERVICE_URL = os.getenv("LOGISTICS_SERVICE_URL", "http://logistics-service.internal")
+    ACCOUNT_SERVICE_URL = os.getenv("ACCOUNT_SERVICE_URL", "http://account-service.internal")
+    DOWNSTREAM_TIMEOUT_S = float(os.getenv("DOWNSTREAM_TIMEOUT_S", "2"))
+    DOWNSTREAM_CONNECT_TIMEOUT_S = float(os.getenv("DOWNSTREAM_CONNECT_TIMEOUT_S", "0.5"))
+    DOWNSTREAM_POOL_SIZE = int(os.getenv("DOWNSTREAM_POOL_SIZE", "32"))  # 每个 host 的最大连接数
+    ADAPTIVE_TIMEOUT_MIN_S = float(os.getenv("ADAPTIVE_TIMEOUT_MIN_S", "0.2"))
+    ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", "2.0"))  # 超时 = 近期 p99 × 倍数
+    CIRCUIT_WINDOW = int(os.getenv("CIRCUIT_WINDOW", "20"))
+    CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))
+    CIRCUIT_FAILURE_RATE = float(os.getenv("CIRCUIT_FAILURE_RATE", "0.5"))
+    CIRCUIT_OPEN_S = float(os.getenv("CIRCUIT_OPEN_S", "5"))
+    CIRCUIT_HALF_OPEN_PROBES = int(os.getenv("CIRCUIT_HALF_OPEN_PROBES", "1"))
+
+    # Serving（异步路径的并发上限）
+    SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "4"))
+    SEARCH_MAX_PENDING = int(os.getenv("SEARCH_MAX_PENDING", "64"))
+    MAX_INFLIGHT_REQUESTS = int(os.getenv("MAX_INFLIGHT_REQUESTS", "512"))
+    ASK_BATCH_MAX_ITEMS = int(os.getenv("ASK_BATCH_MAX_ITEMS", "128"))  # /ask/batch 单批上限（一次前向推理）
+    WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "true").lower() == "true"  # 启动后后台预热所有模型
+
+    # Incident（异常工单上下文拉取）
+    INCIDENT_CONTEXT_DEADLINE_S = float(os.getenv("INCIDENT_CONTEXT_DEADLINE_S", "0.5"))  # 所有数据源共享的截止时间
+    INCIDENT_FETCH_WORKERS = int(os.getenv("INCIDENT_FETCH_WORKERS", "16"))
+    INCIDENT_SINK_BACKEND = os.getenv("INCIDENT_SINK_BACKEND", "jsonl")  # jsonl | kafka
+    INCIDENT_LOG_DIR = os.getenv("INCIDENT_LOG_DIR", "data/incidents")
+    INCIDENT_SEGMENT_MAX_BYTES = int(os.getenv("INCIDENT_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024)))
+    INCIDENT_SINK_BATCH_SIZE = int(os.getenv("INCIDENT_SINK_BATCH_SIZE", "100"))
+    INCIDENT_SINK_FLUSH_MS = float(os.getenv("INCIDENT_SINK_FLUSH_MS", "200"))
+    INCIDENT_SINK_MAX_QUEUE = int(os.getenv("INCIDENT_SINK_MAX_QUEUE", "10000"))  # 满了退化为同步写，不丢工单
+    INCIDENT_SINK_RETRIES = int(os.getenv("INCIDENT_SINK_RETRIES", "3"))  # 传输层写失败的重试次数（指数退避）
+    INCIDENT_SINK_RETRY_BACKOFF_MS = float(os.getenv("INCIDENT_SINK_RETRY_BACKOFF_MS", "100"))
+    INCIDENT_SPILL_DIR = os.getenv("INCIDENT_SPILL_DIR", "data/incidents/spill")  # 重试仍失败时落本地 JSONL，待补投
+    INCIDENT_SPILL_REPLAY_S = float(os.getenv("INCIDENT_SPILL_REPLAY_S", "60"))  # 写出恢复后补投溢出文件的最小间隔
+    KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
+    KAFKA_INCIDENT_TOPIC = os.getenv("KAFKA_INCIDENT_TOPIC", "agent-incidents")
     
     # Safety
-    SENSITIVE_KEYWORDS = {"赔", "投诉升级", "诉讼", "法律"}
+    SENSITIVE_KEYWORDS_PATH = os.getenv("SENSITIVE_KEYWORDS_PATH", "data/sensitive_keywords.txt")  # 所有安全检查共用，词按检查点标注生效范围
+    SENSITIVE_KEYWORDS_RELOAD_S = float(os.getenv("SENSITIVE_KEYWORDS_RELOAD_S", "5"))  # 词表文件变更检查间隔
     
     # App
     APP_VERSION = "1.0.0"
@@ -1,7 +1,5 @@
 # 安全检查模块，负责内容审查
+from utils.safety_guard import contains_sensitive_content
+
 def is_safe(content):
-    sensitive_words = ["赔偿", "隐私", "起诉"]
-    for word in sensitive_words:
-        if word in content:
-            return False
-    return True
\ No newline at end of file
+    return not contains_sensitive_content(content, scope="question")
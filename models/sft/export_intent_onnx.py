@@ -0,0 +1,154 @@
+# models/sft/export_intent_onnx.py
+"""
+将意图分类模型导出为 ONNX（可选动态 int8 量化），并与 torch 输出做一致性校验。
+
+  # 3 类 SFT 模型（services/intent_classifier.py 使用）
+  python models/sft/export_intent_onnx.py --source sft --model-path models/sft/intent_model \
+      --output models/sft/intent_onnx --quantize
+
+  # LoRA 物流意图模型：先 merge adapter 再导出，推理时不再有 PeftModel 开销
+  python models/sft/export_intent_onnx.py --source lora --model-path models/sft/logistics_intent_lora \
+      --output models/sft/logistics_intent_onnx --quantize
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+# 以脚本方式运行时把仓库根目录加入路径，与服务端使用同一个模块路径导入运行时
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from models.sft.onnx_intent_runtime import OnnxIntentRuntime
+
+BASE_MODEL_NAME = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+SFT_LABELS = ["order_status", "policy_query", "operation_guide"]
+
+
+class _LogitsOnly(torch.nn.Module):
+    """只暴露 input_ids / attention_mask → logits，保证导出图的输入输出稳定"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+def load_torch_model(source: str, model_path: str):
+    if source == "sft":
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+        model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        labels = SFT_LABELS
+    else:
+        from peft import PeftModel
+
+        with open(os.path.join(model_path, "intent_labels.json"), "r", encoding="utf-8") as f:
+            labels = json.load(f)
+        tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL_NAME)
+        if tokenizer.pad_token is None:
+            tokenizer.pad_token = '[PAD]'
+        model = AutoModelForSequenceClassification.from_pretrained(
+            BASE_MODEL_NAME,
+            num_labels=len(labels),
+            ignore_mismatched_sizes=True,
+        )
+        # 合并 LoRA 权重，导出的是普通的 fp32 分类模型
+        model = PeftModel.from_pretrained(model, model_path).merge_and_unload()
+    model.eval()
+    return tokenizer, model, labels
+
+
+def export(model, tokenizer, output_path: str, opset: int = 17):
+    dummy = tokenizer(["导出示例文本"], return_tensors="pt", padding=True, truncation=True, max_length=128)
+    torch.onnx.export(
+        _LogitsOnly(model),
+        (dummy["input_ids"], dummy["attention_mask"]),
+        output_path,
+        input_names=["input_ids", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_ids": {0: "batch", 1: "sequence"},
+            "attention_mask": {0: "batch", 1: "sequence"},
+            "logits": {0: "batch"},
+        },
+        opset_version=opset,
+        do_constant_folding=True,
+    )
+
+
+def quantize(fp32_path: str, int8_path: str):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+
+def load_parity_texts(path: str, limit: int = 256):
+    texts = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                texts.append(json.loads(line)["text"])
+            if len(texts) >= limit:
+                break
+    return texts
+
+
+def check_parity(model, tokenizer, onnx_path: str, texts: list, atol: float, min_agreement: float) -> bool:
+    """对比 torch 与 ONNX 的概率输出：最大绝对误差 + top-1 一致率"""
+    with torch.no_grad():
+        inputs = tokenizer(texts, return_tensors="pt", padding=True, truncation=True, max_length=128)
+        torch_probs = torch.softmax(model(**inputs).logits, dim=-1).numpy()
+    onnx_probs = OnnxIntentRuntime(onnx_path, tokenizer_dir=os.path.dirname(onnx_path)).predict_proba(texts)
+
+    max_diff = float(np.abs(torch_probs - onnx_probs).max())
+    agreement = float((torch_probs.argmax(-1) == onnx_probs.argmax(-1)).mean())
+    ok = max_diff <= atol and agreement >= min_agreement
+    status = "OK" if ok else "FAIL"
+    print(f"[{status}] {os.path.basename(onnx_path)}: max_abs_diff={max_diff:.2e}, top1_agreement={agreement:.2%} (n={len(texts)})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export intent classifier to ONNX")
+    parser.add_argument("--source", choices=["sft", "lora"], default="sft")
+    parser.add_argument("--model-path", default="models/sft/intent_model")
+    parser.add_argument("--output", default="models/sft/intent_onnx")
+    parser.add_argument("--quantize", action="store_true", help="额外导出动态 int8 量化模型")
+    parser.add_argument("--parity-data", default=None, help="一致性校验文本（jsonl，需含 text 字段）")
+    parser.add_argument("--opset", type=int, default=17)
+    args = parser.parse_args()
+
+    tokenizer, model, labels = load_torch_model(args.source, args.model_path)
+
+    os.makedirs(args.output, exist_ok=True)
+    tokenizer.save_pretrained(args.output)
+    with open(os.path.join(args.output, "intent_labels.json"), "w", encoding="utf-8") as f:
+        json.dump(labels, f, ensure_ascii=False, indent=2)
+
+    fp32_path = os.path.join(args.output, "model.onnx")
+    export(model, tokenizer, fp32_path, opset=args.opset)
+    print(f"✅ 导出 ONNX: {fp32_path}")
+
+    exported = [(fp32_path, 1e-4, 1.0)]
+    if args.quantize:
+        int8_path = os.path.join(args.output, "model.int8.onnx")
+        quantize(fp32_path, int8_path)
+        print(f"✅ 导出 int8 量化模型: {int8_path}")
+        # 量化有精度损失，只要求 top-1 基本一致
+        exported.append((int8_path, 0.05, 0.98))
+
+    parity_data = args.parity_data or (
+        "data/intent_train.jsonl" if args.source == "sft" else "data/logistics_train.jsonl"
+    )
+    texts = load_parity_texts(parity_data)
+    results = [check_parity(model, tokenizer, path, texts, atol, agreement) for path, atol, agreement in exported]
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,21 +3,37 @@
 物流意图分类器：支持置信度输出，用于路由决策。
 """
 
+import os
 import json
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from peft import PeftModel
 
 
 class LogisticsIntentClassifier:
-    def __init__(self, model_path: str, device: str = None):
-        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
-        
+    def __init__(self, model_path: str, device: str = None, backend: str = "torch"):
+        """
+        Args:
+            model_path: torch 后端为 LoRA adapter 目录；onnx 后端为 export_intent_onnx.py 的输出目录
+            backend: "torch" | "onnx" | "onnx-int8"
+        """
+        self.backend = backend
+
         # 加载标签
         with open(f"{model_path}/intent_labels.json", "r", encoding="utf-8") as f:
             self.labels = json.load(f)
         self.num_labels = len(self.labels)
 
+        if backend in ("onnx", "onnx-int8"):
+            # LoRA 已在导出时 merge，推理无 PeftModel 开销，也不加载 torch
+            from models.sft.onnx_intent_runtime import OnnxIntentRuntime
+            onnx_file = "model.int8.onnx" if backend == "onnx-int8" else "model.onnx"
+            self.runtime = OnnxIntentRuntime(os.path.join(model_path, onnx_file), tokenizer_dir=model_path)
+            return
+
+        import torch
+        from transformers import AutoTokenizer, AutoModelForSequenceClassification
+        from peft import PeftModel
+
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+
         # 加载分词器和模型
         base_model_name = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
         tokenizer = AutoTokenizer.from_pretrained(base_model_name)
@@ -49,20 +65,26 @@ class LogisticsIntentClassifier:
                 "confidence": float (0.0~1.0)
             }
         """
-        inputs = self.tokenizer(
-            text,
-            return_tensors="pt",
-            padding=True,
-            truncation=True,
-            max_length=128,
-        ).to(self.device)
-
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            probs = torch.softmax(outputs.logits, dim=-1).cpu().squeeze()
-            confidence, pred_id = torch.max(probs, dim=-1)
-            pred_id = pred_id.item()
-            confidence = confidence.item()
+        if self.backend != "torch":
+            probs = self.runtime.predict_proba([text])[0]
+            pred_id = int(probs.argmax())
+            confidence = float(probs[pred_id])
+        else:
+            import torch
+            inputs = self.tokenizer(
+                text,
+                return_tensors="pt",
+                padding=True,
+                truncation=True,
+                max_length=128,
+            ).to(self.device)
+
+            with torch.no_grad():
+                outputs = self.model(**inputs)
+                probs = torch.softmax(outputs.logits, dim=-1).cpu().squeeze()
+                confidence, pred_id = torch.max(probs, dim=-1)
+                pred_id = pred_id.item()
+                confidence = confidence.item()
 
         result = {
             "intent_id": pred_id,
@@ -0,0 +1,42 @@
+# models/sft/onnx_intent_runtime.py
+"""
+ONNX Runtime 推理封装：加载 export_intent_onnx.py 导出的（可选 int8 量化）意图分类模型。
+不依赖 torch / peft，供 IntentClassifier 与 LogisticsIntentClassifier 的 onnx 后端共用。
+"""
+
+import os
+import numpy as np
+
+
+class OnnxIntentRuntime:
+    def __init__(self, onnx_path: str, tokenizer_dir: str = None, max_length: int = 128, num_threads: int = 0):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(f"ONNX 模型未找到: {onnx_path}，请先运行 models/sft/export_intent_onnx.py")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_dir or os.path.dirname(onnx_path))
+        self.max_length = max_length
+
+    def predict_proba(self, texts: list) -> np.ndarray:
+        """返回 [batch, num_labels] 的 softmax 概率"""
+        encoded = self.tokenizer(
+            texts,
+            return_tensors="np",
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+        )
+        feeds = {name: encoded[name].astype(np.int64) for name in self.input_names}
+        logits = self.session.run(None, feeds)[0]
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        probs = np.exp(logits)
+        return probs / probs.sum(axis=-1, keepdims=True)
@@ -0,0 +1,85 @@
+# scripts/bench_fusion.py
+"""
+融合微基准：旧路径（逐条 dict 累加 + 全量排序 + 重建 doc_map）对比 fuse_many（整批 scatter-add + 部分排序）。
+候选为合成数据：每路 top_k × RAG_CANDIDATE_MULTIPLIER 个，两路约一半重叠。
+
+  python scripts/bench_fusion.py --batch-sizes 1 32 128 --top-ks 1 10 50
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.fusion import fuse_many
+
+
+def legacy_fusion(vector_results, keyword_results, top_k):
+    """原 RAGPolicyRetriever._hybrid_fusion"""
+    rrf_scores = {}
+    k = 60
+    for rank, item in enumerate(vector_results, start=1):
+        rrf_scores[item["doc_id"]] = rrf_scores.get(item["doc_id"], 0) + 1.0 / (k + rank)
+    for rank, item in enumerate(keyword_results, start=1):
+        rrf_scores[item["doc_id"]] = rrf_scores.get(item["doc_id"], 0) + 1.0 / (k + rank)
+
+    fused = sorted(rrf_scores.items(), key=lambda x: x[1], reverse=True)
+    seen = set()
+    final = []
+    doc_map = {item["doc_id"]: item for item in (vector_results + keyword_results)}
+    for doc_id, _ in fused:
+        if doc_id not in seen and doc_id in doc_map:
+            final.append(doc_map[doc_id])
+            seen.add(doc_id)
+            if len(final) >= top_k:
+                break
+    return final
+
+
+def make_batch(batch: int, num_candidates: int, num_docs: int, rng):
+    vector, keyword = [], []
+    for _ in range(batch):
+        pool = rng.choice(num_docs, size=num_candidates * 3 // 2, replace=False)
+        vector.append(pool[:num_candidates])
+        keyword.append(rng.permutation(pool[num_candidates // 2:]))
+    return vector, keyword
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dict RRF vs vectorized fusion")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 32, 128])
+    parser.add_argument("--top-ks", nargs="+", type=int, default=[1, 10, 50])
+    parser.add_argument("--multiplier", type=int, default=2)
+    parser.add_argument("--num-docs", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    rng = np.random.default_rng(0)
+
+    print(f"{'batch':>6} {'top_k':>6} {'legacy_us':>10} {'rrf_us':>10} {'combsum_us':>11} {'speedup':>8}")
+    for batch in args.batch_sizes:
+        for top_k in args.top_ks:
+            num_candidates = top_k * args.multiplier
+            vector, keyword = make_batch(batch, num_candidates, args.num_docs, rng)
+            vector_dicts = [[{"doc_id": f"p{d}", "score": 0.5} for d in row] for row in vector]
+            keyword_dicts = [[{"doc_id": f"p{d}", "score": 1.0} for d in row] for row in keyword]
+            scores = [
+                [np.linspace(0.9, 0.5, len(row)) for row in vector],
+                [np.linspace(8.0, 1.0, len(row)) for row in keyword],
+            ]
+
+            legacy = timed(lambda: [legacy_fusion(v, kw, top_k) for v, kw in zip(vector_dicts, keyword_dicts)], args.repeat)
+            rrf = timed(lambda: fuse_many([vector, keyword], top_k), args.repeat)
+            combsum = timed(lambda: fuse_many([vector, keyword], top_k, method="combsum", scores=scores), args.repeat)
+            print(f"{batch:>6} {top_k:>6} {legacy:>10.1f} {rrf:>10.1f} {combsum:>11.1f} {legacy / rrf:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
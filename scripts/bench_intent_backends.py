@@ -0,0 +1,125 @@
+# scripts/bench_intent_backends.py
+"""
+对比意图模型各推理后端（torch / onnx / onnx-int8）的延迟与常驻内存。
+每个后端在独立子进程中加载，RSS 互不干扰。
+
+  python scripts/bench_intent_backends.py --model sft --onnx-dir models/sft/intent_onnx
+  python scripts/bench_intent_backends.py --model lora --lora-dir models/sft/logistics_intent_lora \
+      --onnx-dir models/sft/logistics_intent_onnx
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_TEXTS = [
+    "我的订单到哪了？",
+    "生鲜商品能退货吗？",
+    "怎么申请开发票？",
+    "运输途中箱子破损，要求赔偿",
+    "请把送货地址从北京改到上海",
+    "仓库库存告急，请求紧急补货",
+    "订单超时未取会被取消吗",
+    "每天几点结算佣金",
+]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def load_model(args):
+    if args.model == "sft":
+        os.environ["INTENT_BACKEND"] = "torch" if args.backend == "torch" else "onnx"
+        onnx_file = "model.int8.onnx" if args.backend == "onnx-int8" else "model.onnx"
+        os.environ["INTENT_ONNX_PATH"] = os.path.join(args.onnx_dir, onnx_file)
+        from services.intent_classifier import IntentClassifier
+        clf = IntentClassifier()
+        return clf.predict, clf.predict_batch
+
+    from models.sft.logistics_intent_classifier import LogisticsIntentClassifier
+    model_dir = args.lora_dir if args.backend == "torch" else args.onnx_dir
+    clf = LogisticsIntentClassifier(model_dir, device="cpu", backend=args.backend)
+    return clf.predict, None
+
+
+def run_worker(args):
+    sys.path.insert(0, ROOT)
+    baseline = rss_mb()
+    load_start = time.perf_counter()
+    predict, predict_batch = load_model(args)
+    load_s = time.perf_counter() - load_start
+
+    for text in SAMPLE_TEXTS:
+        predict(text)
+
+    latencies = []
+    for i in range(args.iterations):
+        start = time.perf_counter()
+        predict(SAMPLE_TEXTS[i % len(SAMPLE_TEXTS)])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    batch_qps = None
+    if predict_batch is not None:
+        batch = (SAMPLE_TEXTS * 4)[:32]
+        start = time.perf_counter()
+        rounds = max(1, args.iterations // 32)
+        for _ in range(rounds):
+            predict_batch(batch)
+        batch_qps = rounds * len(batch) / (time.perf_counter() - start)
+
+    print(json.dumps({
+        "backend": args.backend,
+        "load_s": round(load_s, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "batch32_qps": round(batch_qps, 1) if batch_qps else None,
+        "rss_mb": round(rss_mb(), 1),
+        "rss_delta_mb": round(rss_mb() - baseline, 1),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intent classifier backends")
+    parser.add_argument("--model", choices=["sft", "lora"], default="sft")
+    parser.add_argument("--backends", nargs="+", default=["torch", "onnx", "onnx-int8"])
+    parser.add_argument("--onnx-dir", default="models/sft/intent_onnx")
+    parser.add_argument("--lora-dir", default="models/sft/logistics_intent_lora")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        args.backend = args.worker
+        run_worker(args)
+        return
+
+    print(f"{'backend':<10} {'load_s':>7} {'p50_ms':>8} {'p99_ms':>8} {'b32_qps':>9} {'rss_mb':>8} {'Δrss_mb':>8}")
+    for backend in args.backends:
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker", backend] + [
+            "--model", args.model, "--onnx-dir", args.onnx_dir,
+            "--lora-dir", args.lora_dir, "--iterations", str(args.iterations),
+        ]
+        proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"{backend:<10} FAILED: {proc.stderr.strip().splitlines()[-1] if proc.stderr else ''}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{r['backend']:<10} {r['load_s']:>7} {r['p50_ms']:>8} {r['p99_ms']:>8} "
+              f"{str(r['batch32_qps']):>9} {r['rss_mb']:>8} {r['rss_delta_mb']:>8}")
+
+
+if __name__ == "__main__":
+    main()
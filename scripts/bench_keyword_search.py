@@ -0,0 +1,91 @@
+# scripts/bench_keyword_search.py
+"""
+关键词召回基准：旧路径（TF-IDF + 稠密 cosine_similarity + 全量 argsort）对比 BM25 倒排索引。
+语料为按 Zipf 分布合成的分词文本，规模 1k / 10k / 100k。
+
+  python scripts/bench_keyword_search.py --sizes 1000 10000 100000
+"""
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.keyword_index import BM25KeywordIndex
+
+CHARS = "生鲜破损退货订单超时取消考核佣金结算配送仓库补货司机签收拒收台风停运区域通知照片售后申请审核赔付上报费用时效路线变更地址发票"
+
+
+def make_vocab(size: int, rng):
+    return ["".join(rng.choice(list(CHARS), size=rng.integers(2, 4))) for _ in range(size)]
+
+
+def make_corpus(num_docs: int, vocab: list, rng, doc_len: int = 24):
+    ranks = np.arange(1, len(vocab) + 1)
+    probs = (1.0 / ranks) / (1.0 / ranks).sum()
+    word_ids = rng.choice(len(vocab), size=(num_docs, doc_len), p=probs)
+    return [" ".join(vocab[i] for i in row) for row in word_ids]
+
+
+def timed(fn, queries, repeat: int):
+    latencies = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(queries[i % len(queries)])
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+
+
+def bench(num_docs: int, top_k: int, repeat: int, rng):
+    vocab = make_vocab(5000, rng)
+    corpus = make_corpus(num_docs, vocab, rng)
+    queries = make_corpus(200, vocab, rng, doc_len=4)
+
+    start = time.perf_counter()
+    vectorizer = TfidfVectorizer(stop_words='english', lowercase=True, ngram_range=(1, 2), max_features=10000)
+    tfidf_matrix = vectorizer.fit_transform(corpus)
+    tfidf_build = time.perf_counter() - start
+
+    def tfidf_search(query):
+        sim_scores = cosine_similarity(vectorizer.transform([query]), tfidf_matrix).flatten()
+        return np.argsort(sim_scores)[::-1][:top_k]
+
+    start = time.perf_counter()
+    index = BM25KeywordIndex(corpus)
+    bm25_build = time.perf_counter() - start
+    encoded = {q: index.encode_query(q) for q in queries}
+
+    def bm25_search(query):
+        return index.search(index.encode_query(query), top_k)
+
+    def bm25_search_cached(query):
+        return index.search(encoded[query], top_k)
+
+    rows = [
+        ("tfidf-dense", tfidf_build, *timed(tfidf_search, queries, repeat)),
+        ("bm25", bm25_build, *timed(bm25_search, queries, repeat)),
+        ("bm25-cached", bm25_build, *timed(bm25_search_cached, queries, repeat)),
+    ]
+    for name, build_s, p50, p99 in rows:
+        print(f"{num_docs:>8} {name:<12} {build_s:>8.2f} {p50:>8.3f} {p99:>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark keyword recall")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"{'docs':>8} {'engine':<12} {'build_s':>8} {'p50_ms':>8} {'p99_ms':>8}")
+    for size in args.sizes:
+        bench(size, args.top_k, args.repeat, rng)
+
+
+if __name__ == "__main__":
+    main()
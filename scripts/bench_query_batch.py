@@ -0,0 +1,77 @@
+# scripts/bench_query_batch.py
+"""
+批量问答吞吐基准：逐条 handle_query 对比 handle_query_batch（单核，OMP / MKL 线程数为 1）。
+政策问题占多数，下游 API 由本地服务桩提供；每轮前清空查询编码缓存与答案缓存，避免命中缓存。
+
+  python scripts/bench_query_batch.py --batch-sizes 8 32 128 --rounds 5
+"""
+import os
+import sys
+import time
+import argparse
+
+for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(var, "1")
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tools.stub_downstream import StubDownstream
+
+QUESTIONS = [
+    "生鲜商品能退货吗？",
+    "订单超时未取会取消吗",
+    "佣金什么时候结算",
+    "台风天停运怎么通知",
+    "破损的货怎么申请补货",
+    "我的订单到哪了？",
+]
+
+
+def make_batch(size: int, round_no: int):
+    # 每轮追加不同后缀，保证编码 / 答案缓存不命中
+    questions = [f"{QUESTIONS[i % len(QUESTIONS)]} {round_no}-{i}" for i in range(size)]
+    contexts = [{"user_id": f"DRV_{i}", "region": "north", "app_version": "2.3.0"} for i in range(size)]
+    return questions, contexts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched vs looped handle_query")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[8, 32, 128])
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with StubDownstream(latency_ms=0) as stub:
+        for var in ("ORDER_SERVICE_URL", "LOGISTICS_SERVICE_URL", "ACCOUNT_SERVICE_URL"):
+            os.environ[var] = stub.url
+        from agents.query_handler import handle_query, handle_query_batch
+        from agents import policy_handler
+        from services.lazy import warm_up
+        from services.rag_retriever import policy_retriever
+
+        warm_up()
+        retriever = policy_retriever.get()
+
+        print(f"{'batch':>6} {'loop_qps':>10} {'batch_qps':>10} {'speedup':>8}")
+        for size in args.batch_sizes:
+            loop_s = batch_s = 0.0
+            for r in range(args.rounds):
+                questions, contexts = make_batch(size, r)
+                retriever.query_cache.clear()
+                policy_handler.response_cache.clear()
+                start = time.perf_counter()
+                for q, c in zip(questions, contexts):
+                    handle_query(q, c)
+                loop_s += time.perf_counter() - start
+
+                retriever.query_cache.clear()
+                policy_handler.response_cache.clear()
+                start = time.perf_counter()
+                handle_query_batch(questions, contexts)
+                batch_s += time.perf_counter() - start
+
+            total = size * args.rounds
+            print(f"{size:>6} {total / loop_s:>10.1f} {total / batch_s:>10.1f} {loop_s / batch_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
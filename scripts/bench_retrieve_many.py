@@ -0,0 +1,62 @@
+# scripts/bench_retrieve_many.py
+"""
+批量检索吞吐基准：逐条 retrieve 对比 retrieve_many（单核，OMP / MKL 线程数为 1），报告各批量下的 queries/sec。
+每轮前清空查询编码缓存，避免命中缓存。
+
+  python scripts/bench_retrieve_many.py --batch-sizes 1 8 32 128 --rounds 5
+"""
+import os
+import sys
+import time
+import json
+import argparse
+
+for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(var, "1")
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def load_queries(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line)["query"] for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark looped retrieve vs retrieve_many")
+    parser.add_argument("--queries", default="data/policy_eval_queries.jsonl")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32, 128])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    from services.rag_retriever import policy_retriever
+
+    retriever = policy_retriever.get()
+    base = load_queries(args.queries)
+    metadata_filter = {"region": "north", "app_version": "2.3.0"}
+
+    print(f"{'batch':>6} {'loop_qps':>10} {'batch_qps':>10} {'speedup':>8}")
+    for size in args.batch_sizes:
+        loop_s = batch_s = 0.0
+        for r in range(args.rounds):
+            # 每轮追加不同后缀，保证编码缓存不命中
+            queries = [f"{base[i % len(base)]} {r}-{i}" for i in range(size)]
+            retriever.query_cache.clear()
+            start = time.perf_counter()
+            for q in queries:
+                retriever.retrieve(q, top_k=args.top_k, metadata_filter=metadata_filter)
+            loop_s += time.perf_counter() - start
+
+            retriever.query_cache.clear()
+            start = time.perf_counter()
+            retriever.retrieve_many(queries, [metadata_filter] * size, top_k=args.top_k)
+            batch_s += time.perf_counter() - start
+
+        total = size * args.rounds
+        print(f"{size:>6} {total / loop_s:>10.1f} {total / batch_s:>10.1f} {loop_s / batch_s:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# scripts/bench_startup.py
+"""
+冷启动基准：在全新解释器中导入服务模块，统计导入耗时与最慢的依赖模块（python -X importtime），
+可选再执行 warm_up() 统计各组件（意图模型 / 嵌入模型与索引等）的加载耗时。
+
+  python scripts/bench_startup.py --module app --warm-up
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_CHILD = """
+import json, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter() - start
+result = {{"import_s": imported}}
+if {warm_up}:
+    from services.lazy import warm_up
+    start = time.perf_counter()
+    result["components"] = warm_up()
+    result["warm_up_s"] = time.perf_counter() - start
+print("RESULT " + json.dumps(result))
+"""
+
+
+def parse_importtime(stderr: str, top: int) -> list:
+    """解析 -X importtime 输出，返回累计耗时最高的模块 [(模块, 毫秒)]"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(cumulative_us) / 1000))
+    return sorted(rows, key=lambda r: r[1], reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure service import and warm-up time")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--warm-up", action="store_true")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    code = _CHILD.format(module=args.module, warm_up=args.warm_up)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "WARM_UP_ON_STARTUP": "false"}
+    )
+    result_line = next((l for l in proc.stdout.splitlines() if l.startswith("RESULT ")), None)
+    if result_line is None:
+        print(proc.stderr[-2000:])
+        sys.exit(proc.returncode or 1)
+    result = json.loads(result_line[len("RESULT "):])
+
+    print(f"import {args.module}: {result['import_s']:.2f}s")
+    print(f"\n{'module':<50} {'cumulative_ms':>14}")
+    for name, ms in parse_importtime(proc.stderr, args.top):
+        print(f"{name:<50} {ms:>14.1f}")
+
+    if args.warm_up:
+        print(f"\nwarm_up: {result['warm_up_s']:.2f}s")
+        for name, status in result["components"].items():
+            load = f"{status['load_seconds']:.2f}s" if status["loaded"] else f"FAILED {status['error']}"
+            print(f"  {name:<24} {load}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,32 @@
 # scripts/build_policy_index.py
-import json, numpy as np, faiss
+"""
+发布本地（FAISS）政策索引：只为新增 / 正文变化的文档计算嵌入，在线服务检测到新版本后自动切换。
+
+  python scripts/build_policy_index.py           # 增量发布
+  python scripts/build_policy_index.py --full    # 全部重新编码
+"""
+import argparse
 from sentence_transformers import SentenceTransformer
 from config.settings import settings
+from services.doc_store import load_policy_jsonl
+from services.policy_indexer import PolicyIndexer
 
 def main():
+    parser = argparse.ArgumentParser(description="Publish the local policy index incrementally")
+    parser.add_argument("--full", action="store_true", help="re-embed every document")
+    args = parser.parse_args()
+
     model = SentenceTransformer(settings.EMBEDDING_MODEL)
-    docs = []
-    texts = []
-    with open("data/policy_docs.jsonl") as f:
-        for line in f:
-            doc = json.loads(line)
-            docs.append(doc)
-            texts.append(doc["content"])
-    
-    embeddings = model.encode(texts, show_progress_bar=True)
-    faiss.normalize_L2(embeddings)
-    
-    index = faiss.IndexFlatIP(embeddings.shape[1])
-    index.add(embeddings.astype('float32'))
-    
-    faiss.write_index(index, settings.POLICY_INDEX_PATH)
-    np.save(settings.POLICY_DOCS_PATH, np.array(docs, dtype=object))
-    print(f"✅ Built index with {len(docs)} policies")
+    docs = load_policy_jsonl(settings.POLICY_DOCS_JSONL)
+    indexer = PolicyIndexer(lambda texts: model.encode(texts, show_progress_bar=len(texts) > 100), write_faiss=True)
+    report = indexer.update(docs, full=args.full)
+    if not report["published"]:
+        print(f"✅ No changes, index {report['version']} is up to date")
+        return
+    print(
+        f"✅ Published {len(docs)} policies as {report['version']} in {report['seconds']:.1f}s "
+        f"(added {report['added']}, changed {report['changed']}, deleted {report['deleted']}, embedded {report['embedded']})"
+    )
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,45 @@
+# scripts/calibrate_reranker.py
+"""
+拟合重排分数的 Platt 校准参数：评测集中每个查询与全部政策文档两两打分，
+以是否为标注相关文档为标签，对 logit(p) 做逻辑回归，输出 RERANK_CALIBRATION_A / B。
+
+  python scripts/calibrate_reranker.py --docs data/policy_docs.jsonl --queries data/policy_eval_queries.jsonl
+"""
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.doc_store import load_policy_jsonl
+from services.reranker import CrossEncoderReranker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit Platt calibration for the cross-encoder reranker")
+    parser.add_argument("--docs", default="data/policy_docs.jsonl")
+    parser.add_argument("--queries", default="data/policy_eval_queries.jsonl")
+    args = parser.parse_args()
+
+    docs = load_policy_jsonl(args.docs)
+    with open(args.queries, encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+
+    # 恒等校准，取模型原始概率
+    reranker = CrossEncoderReranker(calibration=(1.0, 0.0), cache_size=0)
+    pairs = [(q["query"], doc["content"]) for q in queries for doc in docs]
+    labels = np.array([doc["id"] in q["relevant"] for q in queries for doc in docs], dtype=int)
+    probs = np.clip(reranker.model.predict(pairs, batch_size=reranker.batch_size, show_progress_bar=False), 1e-6, 1 - 1e-6)
+    logits = np.log(probs / (1 - probs)).reshape(-1, 1)
+
+    model = LogisticRegression().fit(logits, labels)
+    a, b = float(model.coef_[0][0]), float(model.intercept_[0])
+    print(f"pairs={len(pairs)} positives={labels.sum()}")
+    print(f"RERANK_CALIBRATION_A={a:.4f}")
+    print(f"RERANK_CALIBRATION_B={b:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# scripts/eval_keyword_recall.py
+"""
+关键词召回离线评估：在标注查询集上对比各分词器的 recall@k / MRR 与单次查询延迟。
+
+  python scripts/eval_keyword_recall.py --docs data/policy_docs.jsonl --queries data/policy_eval_queries.jsonl
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.keyword_index import BM25KeywordIndex
+from services.text_analyzer import ANALYZERS
+
+
+def load_jsonl(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def evaluate(name: str, analyzer, docs: list, queries: list, ks: list):
+    try:
+        index = BM25KeywordIndex([d["content"] for d in docs], analyzer=analyzer)
+    except (ImportError, ValueError) as e:
+        print(f"{name:<12} skipped: {e}")
+        return
+    doc_ids = [d["id"] for d in docs]
+    max_k = max(ks)
+
+    hits = {k: 0 for k in ks}
+    reciprocal_ranks = []
+    latencies = []
+    for item in queries:
+        start = time.perf_counter()
+        ids, _ = index.search(index.encode_query(item["query"]), max_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        ranked = [doc_ids[i] for i in ids.tolist()]
+        relevant = set(item["relevant"])
+        for k in ks:
+            if relevant & set(ranked[:k]):
+                hits[k] += 1
+        rank = next((r for r, d in enumerate(ranked, start=1) if d in relevant), None)
+        reciprocal_ranks.append(1.0 / rank if rank else 0.0)
+
+    recalls = " ".join(f"{hits[k] / len(queries):>9.2%}" for k in ks)
+    print(f"{name:<12} {recalls} {np.mean(reciprocal_ranks):>7.3f} {np.median(latencies):>8.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate keyword recall per analyzer")
+    parser.add_argument("--docs", default="data/policy_docs.jsonl")
+    parser.add_argument("--queries", default="data/policy_eval_queries.jsonl")
+    parser.add_argument("--ks", nargs="+", type=int, default=[1, 3, 5])
+    args = parser.parse_args()
+
+    docs = load_jsonl(args.docs)
+    queries = load_jsonl(args.queries)
+    print(f"{len(docs)} docs, {len(queries)} labeled queries")
+    header = " ".join(f"{'recall@' + str(k):>9}" for k in args.ks)
+    print(f"{'analyzer':<12} {header} {'MRR':>7} {'p50_ms':>8}")
+
+    # None 即原 TfidfVectorizer 默认英文词正则
+    evaluate("default", None, docs, queries, args.ks)
+    for name, analyzer in ANALYZERS.items():
+        evaluate(name, analyzer, docs, queries, args.ks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# scripts/loadtest_ask.py
+"""
+/ask 压测：启动本地下游服务桩（订单 / 物流 / 账户），在进程内拉起 FastAPI，
+对比异步路径 /ask 与旧的同步路径（仅压测时挂载为 /ask_sync）的 p50 / p99 与 503 比例。
+
+  python scripts/loadtest_ask.py --requests 2000 --concurrency 200 --downstream-latency-ms 80
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import httpx
+import uvicorn
+from tools.stub_downstream import StubDownstream
+
+QUESTIONS = [
+    "我的订单到哪了？",
+    "ORD123 现在什么状态",
+    "生鲜商品能退货吗？",
+    "订单超时未取会取消吗",
+]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else float("nan")
+
+
+def start_app(port: int):
+    from app import app
+    from agents.query_handler import handle_query
+
+    # 仅压测对比用：旧实现等价的同步端点，由 Starlette 线程池执行
+    def ask_sync(req: dict):
+        return handle_query(req["question"], {k: v for k, v in req.items() if k != "question"})
+
+    app.add_api_route("/ask_sync", ask_sync, methods=["POST"])
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run_load(url: str, total: int, concurrency: int):
+    latencies, statuses = [], {}
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        async def one(i: int):
+            payload = {"question": QUESTIONS[i % len(QUESTIONS)], "user_id": f"DRV_{i % 97}", "region": "north"}
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    resp = await client.post(url, json=payload)
+                    status = resp.status_code
+                except httpx.HTTPError:
+                    status = "error"
+                latencies.append((time.perf_counter() - start) * 1000)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - start
+    return latencies, statuses, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /ask against local downstream stubs")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--port", type=int, default=18000)
+    parser.add_argument("--downstream-latency-ms", type=float, default=80)
+    parser.add_argument("--downstream-jitter-ms", type=float, default=40)
+    parser.add_argument("--endpoints", nargs="+", default=["/ask_sync", "/ask"])
+    args = parser.parse_args()
+
+    with StubDownstream(latency_ms=args.downstream_latency_ms, jitter_ms=args.downstream_jitter_ms) as stub:
+        for key in ("ORDER_SERVICE_URL", "LOGISTICS_SERVICE_URL", "ACCOUNT_SERVICE_URL"):
+            os.environ[key] = stub.url
+        server = start_app(args.port)
+
+        print(f"{'endpoint':<10} {'rps':>8} {'p50_ms':>8} {'p99_ms':>9}  statuses")
+        for endpoint in args.endpoints:
+            url = f"http://127.0.0.1:{args.port}{endpoint}"
+            asyncio.run(run_load(url, min(50, args.requests), args.concurrency))  # 预热
+            latencies, statuses, elapsed = asyncio.run(run_load(url, args.requests, args.concurrency))
+            print(f"{endpoint:<10} {args.requests / elapsed:>8.1f} {percentile(latencies, 0.5):>8.1f} "
+                  f"{percentile(latencies, 0.99):>9.1f}  {statuses}")
+
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
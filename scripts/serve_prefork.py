@@ -0,0 +1,112 @@
+# scripts/serve_prefork.py
+"""
+pre-fork 部署：父进程先加载只读的模型与索引（意图模型权重、嵌入模型、BM25 矩阵、FAISS 索引、文档存储），
+再 fork 出多个 uvicorn worker 共享同一个监听 socket。worker 通过写时复制共享这些页，
+内存占用不再随 worker 数成倍增长（对比 `uvicorn app:app --workers N`，每个 worker 各加载一份）。
+
+持有线程或网络连接的组件（意图微批器、ONNX Runtime 会话、Milvus 连接）在 worker 中重建，见 services/lazy.py。
+父进程在 fork 前 gc.freeze()，子进程的 GC 不再扫描 / 改写父进程对象所在的页。
+
+  python scripts/serve_prefork.py --workers 4 --port 8000 --report-memory 30
+"""
+import os
+import sys
+import gc
+import time
+import signal
+import socket
+import logging
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# HF tokenizers 的并行线程不跨 fork
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+import uvicorn
+from utils.memory import format_memory_report
+
+logger = logging.getLogger("prefork")
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def spawn_worker(app, sock: socket.socket, index: int) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    # 子进程：恢复默认信号处理，由 uvicorn 接管优雅退出
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(app, log_level="info", access_log=False)
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    finally:
+        os._exit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve app with models loaded once before forking workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--report-memory", type=float, default=0, help="每隔 N 秒打印各进程 RSS / PSS / USS，0 为不打印")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from app import app
+    from services.lazy import warm_up
+
+    start = time.perf_counter()
+    status = warm_up(prime=False)
+    failed = [name for name, s in status.items() if s["error"]]
+    logger.info(f"Parent loaded shared components in {time.perf_counter() - start:.1f}s, failed: {failed or 'none'}")
+    gc.collect()
+    gc.freeze()
+
+    sock = bind_socket(args.host, args.port)
+    workers = {spawn_worker(app, sock, i): i for i in range(args.workers)}
+    logger.info(f"Started {len(workers)} workers on {args.host}:{args.port}: {sorted(workers)}")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    next_report = time.monotonic() + args.report_memory
+    while workers:
+        pid, _ = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            index = workers.pop(pid, None)
+            if index is not None and not stopping:
+                # worker 异常退出：从仍持有共享页的父进程重新 fork
+                logger.warning(f"Worker {pid} exited, respawning")
+                workers[spawn_worker(app, sock, index)] = index
+            continue
+        if args.report_memory and time.monotonic() >= next_report:
+            rows = [("parent", os.getpid())] + [(f"worker-{i}", p) for p, i in sorted(workers.items(), key=lambda x: x[1])]
+            print(format_memory_report(rows), flush=True)
+            next_report = time.monotonic() + args.report_memory
+        time.sleep(0.2)
+    sock.close()
+
+
+if __name__ == "__main__":
+    main()
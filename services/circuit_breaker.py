@@ -0,0 +1,143 @@
+# services/circuit_breaker.py
+"""
+下游接口的熔断与自适应超时（按 endpoint 独立）。
+
+- 熔断：滑动窗口内失败率超过阈值即打开，打开期间直接拒绝；冷却后进入半开，
+  放行少量探测请求，成功则关闭，失败则重新打开。
+- 自适应超时：按近期请求延迟的 p99 × 倍数计算，限制在 [最小值, DOWNSTREAM_TIMEOUT_S] 内，
+  下游变慢时不至于每个请求都等满 2 秒。超时的请求以实际耗时（≈ 当时的超时）计入样本，
+  延迟整体上移时超时随之放宽；半开探测使用上限超时，避免被过紧的超时锁死在打开状态。
+"""
+import threading
+import time
+from collections import deque
+import numpy as np
+from config.settings import settings
+from utils.metrics import CIRCUIT_STATE, CIRCUIT_REJECTED, DOWNSTREAM_TIMEOUT
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+_STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断打开，请求未发出"""
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, window: int = None, min_calls: int = None, failure_rate: float = None,
+                 open_seconds: float = None, half_open_probes: int = None):
+        self.name = name
+        self.min_calls = min_calls or settings.CIRCUIT_MIN_CALLS
+        self.failure_rate = failure_rate or settings.CIRCUIT_FAILURE_RATE
+        self.open_seconds = open_seconds if open_seconds is not None else settings.CIRCUIT_OPEN_S
+        self.half_open_probes = half_open_probes or settings.CIRCUIT_HALF_OPEN_PROBES
+        self._outcomes = deque(maxlen=window or settings.CIRCUIT_WINDOW)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        CIRCUIT_STATE.labels(endpoint=name).set(_STATE_VALUE[CLOSED])
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _set_state(self, state: str):
+        self._state = state
+        CIRCUIT_STATE.labels(endpoint=self.name).set(_STATE_VALUE[state])
+
+    def _maybe_half_open(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._set_state(HALF_OPEN)
+            self._probes = 0
+
+    def acquire(self) -> bool:
+        """请求发出前调用，返回是否为半开探测；熔断打开或半开探测名额已满时抛 CircuitOpenError"""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == CLOSED:
+                return False
+            if self._state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+        CIRCUIT_REJECTED.labels(endpoint=self.name).inc()
+        raise CircuitOpenError(f"circuit for {self.name} is open")
+
+    def record(self, success: bool):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                if success:
+                    self._outcomes.clear()
+                    self._set_state(CLOSED)
+                else:
+                    self._open()
+                return
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (self._state == CLOSED and len(self._outcomes) >= self.min_calls
+                    and failures / len(self._outcomes) >= self.failure_rate):
+                self._open()
+
+    def _open(self):
+        self._opened_at = time.monotonic()
+        self._set_state(OPEN)
+
+
+class AdaptiveTimeout:
+    def __init__(self, name: str, min_timeout: float = None, max_timeout: float = None,
+                 multiplier: float = None, window: int = 200, min_samples: int = 20):
+        self.name = name
+        self.min_timeout = min_timeout if min_timeout is not None else settings.ADAPTIVE_TIMEOUT_MIN_S
+        self.max_timeout = max_timeout if max_timeout is not None else settings.DOWNSTREAM_TIMEOUT_S
+        self.multiplier = multiplier or settings.ADAPTIVE_TIMEOUT_MULTIPLIER
+        self.min_samples = min_samples
+        self._latencies = deque(maxlen=window)
+        self._current = self.max_timeout
+        self._lock = threading.Lock()
+        DOWNSTREAM_TIMEOUT.labels(endpoint=name).set(self._current)
+
+    def observe(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+            if len(self._latencies) >= self.min_samples:
+                p99 = float(np.percentile(self._latencies, 99))
+                self._current = min(self.max_timeout, max(self.min_timeout, p99 * self.multiplier))
+                DOWNSTREAM_TIMEOUT.labels(endpoint=self.name).set(self._current)
+
+    def current(self) -> float:
+        return self._current
+
+
+class EndpointGuard:
+    """单个下游 endpoint 的熔断器 + 自适应超时"""
+
+    def __init__(self, name: str):
+        self.breaker = CircuitBreaker(name)
+        self.timeout = AdaptiveTimeout(name)
+
+    def acquire(self) -> float:
+        """放行则返回本次请求应使用的超时（秒）；半开探测给上限超时，由探测结果重新学习延迟"""
+        if self.breaker.acquire():
+            return self.timeout.max_timeout
+        return self.timeout.current()
+
+    def record(self, success: bool, latency: float, timed_out: bool = False):
+        self.breaker.record(success)
+        # 超时样本是被截断的真实延迟，仍需计入，否则延迟上移后超时永远学不到新的 p99
+        if success or timed_out:
+            self.timeout.observe(latency)
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(endpoint: str) -> EndpointGuard:
+    guard = _guards.get(endpoint)
+    if guard is None:
+        with _guards_lock:
+            guard = _guards.setdefault(endpoint, EndpointGuard(endpoint))
+    return guard
@@ -0,0 +1,206 @@
+# services/doc_store.py
+"""
+列式、可 mmap 的政策文档存储（替代 allow_pickle 的 policy_docs.npy）。
+
+目录布局（由 scripts/build_policy_index*.py 生成）：
+    meta.json              文档数、列定义、枚举列词表
+    <col>.bin / <col>.offsets.npy   字符串列：UTF-8 拼接 blob + int64 偏移（N+1）
+    <col>.codes.npy        枚举列（region / min_app_version / doc_type）：int32 编码
+    min_app_version_int.npy  打包后的最低版本号（int64），供版本范围过滤
+
+文件以只读 mmap 打开，多个 worker 通过页缓存共享同一份物理内存；
+按整数 id 访问时才解码对应文档。
+
+发布时数据写入带版本号的兄弟目录 <path>.v<时间戳>，<path> 是指向它的符号链接，通过原子替换链接切换版本；
+读取端打开时先解析链接，始终读到一个完整的版本。
+"""
+import os
+import json
+import time
+import shutil
+import numpy as np
+from services.metadata_filter import metadata_conditions, pack_version
+from utils.cache import LRUCache
+
+CATEGORICAL_COLUMNS = ("region", "min_app_version", "doc_type")
+
+
+def load_policy_jsonl(path: str) -> list:
+    docs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                docs.append(json.loads(line))
+    return docs
+
+
+def build_doc_store(docs: list, path: str):
+    """写入新的版本目录后原子替换 path 符号链接，读取端不会看到半成品，也不会有找不到存储的窗口"""
+    path = path.rstrip(os.sep)
+    version_path = f"{path}.v{time.time_ns()}"
+    os.makedirs(version_path)
+
+    keys = []
+    for doc in docs:
+        keys.extend(k for k in doc if k not in keys)
+    string_columns = [k for k in keys if k not in CATEGORICAL_COLUMNS]
+
+    for col in string_columns:
+        encoded = [str(doc.get(col, "")).encode("utf-8") for doc in docs]
+        offsets = np.zeros(len(docs) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        with open(os.path.join(version_path, f"{col}.bin"), "wb") as f:
+            f.write(b"".join(encoded))
+        np.save(os.path.join(version_path, f"{col}.offsets.npy"), offsets)
+
+    vocabs = {}
+    for col in CATEGORICAL_COLUMNS:
+        values = [str(doc.get(col, "")) for doc in docs]
+        vocab = sorted(set(values))
+        lookup = {v: i for i, v in enumerate(vocab)}
+        np.save(os.path.join(version_path, f"{col}.codes.npy"), np.array([lookup[v] for v in values], dtype=np.int32))
+        vocabs[col] = vocab
+
+    packed_versions = [pack_version(doc.get("min_app_version", "")) for doc in docs]
+    np.save(os.path.join(version_path, "min_app_version_int.npy"), np.array(packed_versions, dtype=np.int64))
+
+    with open(os.path.join(version_path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "num_docs": len(docs),
+            "string_columns": string_columns,
+            "categorical_columns": vocabs,
+            "numeric_columns": ["min_app_version_int"],
+        }, f, ensure_ascii=False)
+
+    _publish_link(path, version_path)
+
+
+def _publish_link(path: str, target: str):
+    """原子地把 path 指向 target；保留上一版本目录（可能仍有读取端正在打开），更早的版本删除"""
+    if os.path.isdir(path) and not os.path.islink(path):
+        # 旧布局（path 本身是目录）一次性迁移为版本目录，仅这一次有短暂的空窗
+        os.rename(path, f"{path}.v0")
+    previous = os.path.realpath(path) if os.path.lexists(path) else None
+    link = f"{path}.link-{os.getpid()}"
+    if os.path.lexists(link):
+        os.remove(link)
+    # 相对链接：整个索引目录移动后仍有效
+    os.symlink(os.path.basename(target), link)
+    os.replace(link, path)
+
+    parent, base = os.path.split(os.path.abspath(path))
+    keep = {os.path.realpath(target), previous}
+    for name in os.listdir(parent):
+        candidate = os.path.join(parent, name)
+        if name.startswith(f"{base}.v") and name[len(base) + 2:].isdigit() and os.path.realpath(candidate) not in keep:
+            shutil.rmtree(candidate, ignore_errors=True)
+
+
+class PolicyDocStore:
+    def __init__(self, path: str):
+        if not os.path.exists(os.path.join(path, "meta.json")):
+            raise FileNotFoundError(
+                f"Policy doc store not found at {path}. Please run scripts/build_policy_index.py."
+            )
+        # 解析一次符号链接，加载期间发布新版本也不会混读两个版本的文件
+        path = os.path.realpath(path)
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.path = path
+        self.num_docs = meta["num_docs"]
+
+        self._strings = {}
+        for col in meta["string_columns"]:
+            blob_path = os.path.join(path, f"{col}.bin")
+            blob = (
+                np.memmap(blob_path, dtype=np.uint8, mode="r")
+                if os.path.getsize(blob_path) else np.empty(0, dtype=np.uint8)
+            )
+            offsets = np.load(os.path.join(path, f"{col}.offsets.npy"), mmap_mode="r")
+            self._strings[col] = (blob, offsets)
+
+        self._categoricals = {}
+        for col, vocab in meta["categorical_columns"].items():
+            codes = np.load(os.path.join(path, f"{col}.codes.npy"), mmap_mode="r")
+            self._categoricals[col] = (codes, vocab, {v: i for i, v in enumerate(vocab)})
+
+        self._numerics = {
+            col: np.load(os.path.join(path, f"{col}.npy"), mmap_mode="r")
+            for col in meta.get("numeric_columns", [])
+        }
+        # 过滤组合（区域 × 客户端版本）有限，掩码按条件缓存
+        self._mask_cache = LRUCache("doc_filter_mask", maxsize=256)
+        # 业务 doc_id → 行号：召回结果统一映射为稠密整数下标后再融合
+        self.doc_index = {doc_id: i for i, doc_id in enumerate(self.strings("id"))}
+
+    def __len__(self):
+        return self.num_docs
+
+    def string(self, col: str, idx: int) -> str:
+        if col not in self._strings:
+            return ""
+        blob, offsets = self._strings[col]
+        return bytes(blob[offsets[idx]:offsets[idx + 1]]).decode("utf-8")
+
+    def categorical(self, col: str):
+        """返回 (codes, vocab, value→code)，用于向量化过滤；列不存在返回 None"""
+        return self._categoricals.get(col)
+
+    def eligible_mask(self, metadata_filter: dict):
+        """
+        按 metadata_filter 计算可见文档的布尔掩码（向量化，只读）；无过滤条件时返回 None。
+        向量检索与关键词召回都在 top-k 之前应用此掩码。
+        """
+        conditions = metadata_conditions(metadata_filter)
+        if not conditions:
+            return None
+        key = tuple(conditions)
+        mask = self._mask_cache.get(key)
+        if mask is not None:
+            return mask
+
+        mask = np.ones(self.num_docs, dtype=bool)
+        for field, op, val in conditions:
+            if op == "<=" and field in self._numerics:
+                mask &= self._numerics[field] <= val
+            elif op == "==" and field in self._categoricals:
+                codes, _, lookup = self._categoricals[field]
+                if val not in lookup:
+                    mask[:] = False
+                    break
+                mask &= codes == lookup[val]
+            else:
+                # 未建列的字段无法判定，按不可见处理
+                mask[:] = False
+                break
+        mask.setflags(write=False)
+        self._mask_cache.put(key, mask)
+        return mask
+
+    def value(self, col: str, idx: int) -> str:
+        if col in self._strings:
+            return self.string(col, idx)
+        codes, vocab, _ = self._categoricals[col]
+        return vocab[codes[idx]]
+
+    def strings(self, col: str):
+        """按顺序逐条解码整列；列不存在时为空"""
+        if col not in self._strings:
+            return
+        blob, offsets = self._strings[col]
+        data = bytes(blob)
+        for i in range(self.num_docs):
+            yield data[offsets[i]:offsets[i + 1]].decode("utf-8")
+
+    def texts(self):
+        """按顺序逐条解码正文，供建关键词索引使用"""
+        return self.strings("content")
+
+    def get(self, idx: int) -> dict:
+        doc = {col: self.string(col, idx) for col in self._strings}
+        for col, (codes, vocab, _) in self._categoricals.items():
+            doc[col] = vocab[codes[idx]]
+        return doc
+
+    def __getitem__(self, idx: int) -> dict:
+        return self.get(idx)
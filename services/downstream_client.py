@@ -0,0 +1,115 @@
+# services/downstream_client.py
+"""
+下游服务 HTTP 客户端层：按 host 维护连接池（同步 requests.Session / 异步 httpx.AsyncClient），
+开启 keep-alive，避免每次请求都重新建 TCP 连接和 DNS 解析；按 endpoint 记录延迟直方图。
+每个 endpoint 经过熔断器与自适应超时（services/circuit_breaker），熔断打开时抛 CircuitOpenError。
+"""
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from config.settings import settings
+from services.circuit_breaker import get_guard
+from utils.metrics import DOWNSTREAM_LATENCY
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+class DownstreamClient:
+    def __init__(self, pool_size: int = None, connect_timeout: float = None, read_timeout: float = None):
+        self.pool_size = pool_size or settings.DOWNSTREAM_POOL_SIZE
+        self.connect_timeout = connect_timeout if connect_timeout is not None else settings.DOWNSTREAM_CONNECT_TIMEOUT_S
+        self.read_timeout = read_timeout if read_timeout is not None else settings.DOWNSTREAM_TIMEOUT_S
+        self._sessions = {}
+        self._async_clients = {}
+        self._lock = threading.Lock()
+
+    def _session(self, url: str) -> requests.Session:
+        key = _host_key(url)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=False)
+                    session.mount("http://", adapter)
+                    session.mount("https://", adapter)
+                    self._sessions[key] = session
+        return session
+
+    def _async_client(self, url: str) -> httpx.AsyncClient:
+        # httpx 连接绑定事件循环，循环变化（如测试中多次 asyncio.run）时重建
+        key = (_host_key(url), id(asyncio.get_running_loop()))
+        client = self._async_clients.get(key)
+        if client is None:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            )
+            self._async_clients[key] = client
+        return client
+
+    def request(self, endpoint: str, method: str, url: str, timeout: float = None, **kwargs) -> requests.Response:
+        guard = get_guard(endpoint)
+        read_timeout = self._read_timeout(guard, timeout)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            resp = self._session(url).request(method, url, timeout=(self.connect_timeout, read_timeout), **kwargs)
+            status = str(resp.status_code)
+            return resp
+        except requests.exceptions.Timeout:
+            status = "timeout"
+            raise
+        finally:
+            self._record(guard, endpoint, status, time.perf_counter() - start)
+
+    async def arequest(self, endpoint: str, method: str, url: str, timeout: float = None, **kwargs) -> httpx.Response:
+        guard = get_guard(endpoint)
+        read_timeout = self._read_timeout(guard, timeout)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            resp = await self._async_client(url).request(
+                method, url, timeout=httpx.Timeout(read_timeout, connect=self.connect_timeout), **kwargs
+            )
+            status = str(resp.status_code)
+            return resp
+        except httpx.TimeoutException:
+            status = "timeout"
+            raise
+        finally:
+            self._record(guard, endpoint, status, time.perf_counter() - start)
+
+    def _read_timeout(self, guard, timeout: float = None) -> float:
+        # 显式 timeout 也必须先过熔断：打开时快速失败，半开时占用探测名额
+        acquired = min(guard.acquire(), self.read_timeout)
+        return min(timeout, acquired) if timeout else acquired
+
+    @staticmethod
+    def _record(guard, endpoint: str, status: str, elapsed: float):
+        # 异常（超时 / 连接失败）与 5xx 计为失败，4xx 属于调用方问题不影响熔断
+        success = status not in ("error", "timeout") and not status.startswith("5")
+        guard.record(success, elapsed, timed_out=status == "timeout")
+        DOWNSTREAM_LATENCY.labels(endpoint=endpoint, status=status).observe(elapsed)
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+    async def aclose(self):
+        loop_id = id(asyncio.get_running_loop())
+        for key in [k for k in self._async_clients if k[1] == loop_id]:
+            await self._async_clients.pop(key).aclose()
+
+
+downstream = DownstreamClient()
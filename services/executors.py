@@ -0,0 +1,65 @@
+# services/executors.py
+"""
+异步服务路径的并发控制：
+- BoundedExecutor：CPU 密集任务（检索 / 编码）的专用线程池，排队上限满时立即拒绝
+- AdmissionGate：请求级在途上限，超出直接返回 503，而不是在 Starlette 线程池里无限排队
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import settings
+from utils.metrics import EXECUTOR_REJECTED, INFLIGHT_REQUESTS
+
+
+class Overloaded(RuntimeError):
+    """执行器或请求队列已满，调用方应快速失败（HTTP 503）"""
+
+
+class BoundedExecutor:
+    def __init__(self, name: str, max_workers: int, max_pending: int):
+        self.name = name
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._slots = threading.BoundedSemaphore(max_workers + max_pending)
+
+    def submit(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            EXECUTOR_REJECTED.labels(executor=self.name).inc()
+            raise Overloaded(f"{self.name} executor saturated")
+        try:
+            future = self._pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True)
+
+
+class AdmissionGate:
+    """仅在事件循环线程内使用，无需加锁"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.inflight = 0
+
+    def __enter__(self):
+        if self.inflight >= self.limit:
+            EXECUTOR_REJECTED.labels(executor="admission").inc()
+            raise Overloaded("too many in-flight requests")
+        self.inflight += 1
+        INFLIGHT_REQUESTS.set(self.inflight)
+        return self
+
+    def __exit__(self, *exc):
+        self.inflight -= 1
+        INFLIGHT_REQUESTS.set(self.inflight)
+        return False
+
+
+search_executor = BoundedExecutor("search", settings.SEARCH_WORKERS, settings.SEARCH_MAX_PENDING)
+admission_gate = AdmissionGate(settings.MAX_INFLIGHT_REQUESTS)
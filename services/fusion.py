@@ -0,0 +1,87 @@
+# services/fusion.py
+"""
+多路召回融合的向量化实现，文档以稠密整数下标表示（与 PolicyDocStore 的行号一致）。
+
+整批查询、所有召回路的候选一次展平为 (查询, 文档, 名次/分数) 数组，按 查询 × 文档 键稳定排序后
+分段 scatter-add（np.add.reduceat）得到融合分数；同一路内的重复候选只计首个（名次最好的）。
+同分时先出现（靠前的召回路、靠前的名次）者优先。
+
+方法（每次调用选择）：
+- rrf:     加权 RRF，Σ w_s / (k + rank_s)
+- combsum: 每路分数按查询做 min-max 归一化后加权求和
+"""
+import numpy as np
+
+FUSION_METHODS = ("rrf", "combsum")
+
+_EMPTY_IDS = np.empty(0, dtype=np.int64)
+_EMPTY_SCORES = np.empty(0, dtype=np.float64)
+
+
+def fuse_many(ranked: list, top_k: int, method: str = "rrf", weights=None, scores: list = None,
+              k: int = 60, num_docs: int = None) -> list:
+    """
+    Args:
+        ranked: 每路召回一个列表，元素为单个查询按名次排列的文档下标数组；各路查询数相同
+        method: "rrf" | "combsum"
+        weights: 每路权重，默认全为 1
+        scores: 与 ranked 同形状的原始分数，combsum 必填
+        num_docs: 文档下标上界（PolicyDocStore 文档数），缺省时按候选取最大值
+    Returns:
+        list[(文档下标数组, 融合分数数组)]，与查询顺序一致
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method: {method}")
+    if method == "combsum" and scores is None:
+        raise ValueError("combsum fusion requires per-source scores")
+    num_sources = len(ranked)
+    num_queries = len(ranked[0]) if ranked else 0
+    weights = np.ones(num_sources) if weights is None else np.asarray(weights, dtype=np.float64)
+    if len(weights) != num_sources:
+        raise ValueError(f"Expected {num_sources} fusion weights, got {len(weights)}")
+
+    # 展平顺序：召回路 → 查询 → 名次，每个 (路, 查询) 是一段
+    segments = [ids for lists in ranked for ids in lists]
+    lengths = np.fromiter((len(ids) for ids in segments), dtype=np.int64, count=len(segments))
+    total = int(lengths.sum())
+    if total == 0 or top_k <= 0:
+        return [(_EMPTY_IDS, _EMPTY_SCORES) for _ in range(num_queries)]
+
+    docs = np.concatenate(segments).astype(np.int64, copy=False)
+    seg_start = np.cumsum(lengths) - lengths
+    segment_of = np.repeat(np.arange(len(segments)), lengths)
+    rows = segment_of % num_queries
+    if method == "rrf":
+        contrib = 1.0 / (k + 1.0 + np.arange(total) - seg_start[segment_of])
+    else:
+        raw = np.concatenate([np.asarray(s, dtype=np.float64) for lists in scores for s in lists])
+        nonempty = lengths > 0
+        lo = np.minimum.reduceat(raw, seg_start[nonempty])
+        span = np.maximum.reduceat(raw, seg_start[nonempty]) - lo
+        lo, span = np.repeat(lo, lengths[nonempty]), np.repeat(span, lengths[nonempty])
+        # 段内分数全相同时记为 1
+        contrib = np.where(span > 0, (raw - lo) / np.where(span > 0, span, 1.0), 1.0)
+    contrib *= np.repeat(weights, lengths.reshape(num_sources, -1).sum(axis=1))
+
+    # 稳定排序后同一 (查询, 文档) 连续，且段内保持先出现者在前
+    width = num_docs if num_docs is not None else int(docs.max()) + 1
+    keys = rows * width + docs
+    order = np.argsort(keys, kind="stable")
+    keys, sources = keys[order], segment_of[order] // num_queries
+    same_key = keys[1:] == keys[:-1]
+    keep = np.concatenate(([True], ~(same_key & (sources[1:] == sources[:-1]))))
+    order, keys = order[keep], keys[keep]
+    starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+
+    fused = np.add.reduceat(contrib[order], starts)
+    first_seen = order[starts]
+    group_rows, group_docs = keys[starts] // width, keys[starts] % width
+
+    # 组已按查询有序：行内按 (分数降序, 先出现) 排序，截取每行前 top_k
+    ranked_groups = np.lexsort((first_seen, -fused, group_rows))
+    bounds = np.searchsorted(group_rows, np.arange(num_queries + 1))
+    results = []
+    for q in range(num_queries):
+        top = ranked_groups[bounds[q]:min(bounds[q + 1], bounds[q] + top_k)]
+        results.append((group_docs[top], fused[top]))
+    return results
@@ -0,0 +1,57 @@
+# services/incident_context.py
+"""
+异常工单的多源上下文拉取：订单（TMS）、轨迹（GPS）、仓储（WMS）并行请求，共享一个截止时间。
+整体耗时取决于最慢的数据源（且不超过截止时间），而不是各源耗时之和；
+超时或出错的数据源不阻塞工单，结果中按源标注状态。
+"""
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait
+from config.settings import settings
+from utils.metrics import INCIDENT_SOURCE_LATENCY
+
+
+class ContextSource(ABC):
+    """数据源接口：name 作为上下文中的键，fetch 返回该源的数据"""
+
+    name = "source"
+
+    @abstractmethod
+    def fetch(self, order_id: str) -> dict:
+        """超时由 gather_context 统一控制，出错直接抛异常"""
+
+
+_pool = ThreadPoolExecutor(max_workers=settings.INCIDENT_FETCH_WORKERS, thread_name_prefix="incident-ctx")
+
+
+def _timed_fetch(source: ContextSource, order_id: str):
+    start = time.perf_counter()
+    data = source.fetch(order_id)
+    return data, time.perf_counter() - start
+
+
+def gather_context(sources: list, order_id: str, deadline_s: float = None) -> tuple:
+    """
+    Returns:
+        (context, status): context 为 {源名: 数据}，仅含按时成功的源；
+        status 为 {源名: {"status": ok|timeout|error, "latency_ms": float}}
+    """
+    deadline_s = settings.INCIDENT_CONTEXT_DEADLINE_S if deadline_s is None else deadline_s
+    start = time.perf_counter()
+    futures = {_pool.submit(_timed_fetch, source, order_id): source.name for source in sources}
+    wait(futures, timeout=deadline_s)
+
+    context, status = {}, {}
+    for future, name in futures.items():
+        if not future.done():
+            # 线程无法中断，放弃结果即可；cancel 对尚未开始的任务生效
+            future.cancel()
+            elapsed, outcome = time.perf_counter() - start, "timeout"
+        elif future.exception() is not None:
+            elapsed, outcome = time.perf_counter() - start, "error"
+        else:
+            context[name], elapsed = future.result()
+            outcome = "ok"
+        status[name] = {"status": outcome, "latency_ms": round(elapsed * 1000, 1)}
+        INCIDENT_SOURCE_LATENCY.labels(source=name, status=outcome).observe(elapsed)
+    return context, status
@@ -0,0 +1,300 @@
+# services/incident_sink.py
+"""
+异常工单异步落盘：log_incident 只把记录放进有界内存队列，后台线程按条数或时间攒批写出，
+请求路径上不再有同步 I/O。
+
+传输层可替换：
+- jsonl:  本地追加写的 JSONL 分段文件（默认），每批一次 write + fsync，超过大小滚动新段
+- kafka:  Kafka 生产者（send / flush / close 接口），测试用 tools/stub_kafka 代替
+
+close() 会把队列中剩余记录全部写出后再关闭传输层（FastAPI shutdown 与 atexit 均会调用）。
+
+传输层写失败时按指数退避重试整批（至少一次语义，下游按 incident_id 去重）；仍失败则溢出到
+settings.INCIDENT_SPILL_DIR 下的本地 JSONL 文件，本地也写不了才记录丢失的工单号。
+溢出文件由 replay_spilled() 经传输层补投、成功后删除：后台线程启动时执行一次，之后写出成功时
+每隔 settings.INCIDENT_SPILL_REPLAY_S 再执行；多个 worker 共用溢出目录时按文件改名认领，不会重复补投。
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from config.settings import settings
+from utils.metrics import (
+    INCIDENT_SINK_BATCH_SIZE, INCIDENT_SINK_QUEUE, INCIDENT_SINK_OVERFLOW, INCIDENT_SINK_ERRORS, INCIDENT_SINK_SPILLED,
+    INCIDENT_SINK_REPLAYED
+)
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class IncidentTransport(ABC):
+    @abstractmethod
+    def send_batch(self, records: list):
+        """写出一批记录，失败时抛异常（由 IncidentSink 重试 / 溢出）"""
+
+    def close(self):
+        pass
+
+
+class JsonlSegmentTransport(IncidentTransport):
+    """追加写 JSONL 分段；文件名带进程号，多 worker 写同一目录不会交错"""
+
+    def __init__(self, directory: str = None, segment_max_bytes: int = None):
+        self.directory = directory or settings.INCIDENT_LOG_DIR
+        self.segment_max_bytes = segment_max_bytes or settings.INCIDENT_SEGMENT_MAX_BYTES
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = None
+        self._seq = 0
+
+    def _segment(self):
+        if self._file is None or self._file.tell() >= self.segment_max_bytes:
+            if self._file is not None:
+                self._file.close()
+            self._seq += 1
+            name = f"incidents-{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{self._seq:04d}.jsonl"
+            self._file = open(os.path.join(self.directory, name), "a", encoding="utf-8")
+        return self._file
+
+    def send_batch(self, records: list):
+        f = self._segment()
+        f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        f.flush()
+        os.fsync(f.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class KafkaTransport(IncidentTransport):
+    """producer 需提供 kafka-python 风格的 send(topic, key=, value=) / flush() / close()"""
+
+    def __init__(self, producer, topic: str = None):
+        self.producer = producer
+        self.topic = topic or settings.KAFKA_INCIDENT_TOPIC
+
+    def send_batch(self, records: list):
+        for r in records:
+            self.producer.send(
+                self.topic,
+                key=r["incident_id"].encode("utf-8"),
+                value=json.dumps(r, ensure_ascii=False).encode("utf-8")
+            )
+        self.producer.flush()
+
+    def close(self):
+        self.producer.flush()
+        self.producer.close()
+
+
+class IncidentSink:
+    def __init__(self, transport: IncidentTransport, batch_size: int = None, flush_interval_ms: float = None,
+                 max_queue_size: int = None, retries: int = None, retry_backoff_ms: float = None,
+                 spill_dir: str = None, replay_interval_s: float = None):
+        self.transport = transport
+        self.batch_size = batch_size or settings.INCIDENT_SINK_BATCH_SIZE
+        if flush_interval_ms is None:
+            flush_interval_ms = settings.INCIDENT_SINK_FLUSH_MS
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.retries = settings.INCIDENT_SINK_RETRIES if retries is None else retries
+        if retry_backoff_ms is None:
+            retry_backoff_ms = settings.INCIDENT_SINK_RETRY_BACKOFF_MS
+        self.retry_backoff = retry_backoff_ms / 1000.0
+        self.spill_dir = spill_dir or settings.INCIDENT_SPILL_DIR
+        self.replay_interval = settings.INCIDENT_SPILL_REPLAY_S if replay_interval_s is None else replay_interval_s
+        self._spill_seq = 0
+        self._last_replay = time.monotonic()
+        self._queue = queue.Queue(maxsize=max_queue_size or settings.INCIDENT_SINK_MAX_QUEUE)
+        self._write_lock = threading.Lock()
+        # 保护 “是否已关闭” 判断与入队：close() 放入 STOP 之后不会再有记录排在它后面
+        self._state_lock = threading.Lock()
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="incident-sink", daemon=True)
+        self._worker.start()
+
+    def submit(self, record: dict):
+        with self._state_lock:
+            closed = self._closed
+            if not closed:
+                try:
+                    self._queue.put_nowait((record, time.perf_counter()))
+                except queue.Full:
+                    # 工单不能丢：队列满时退化为调用方线程同步写出
+                    INCIDENT_SINK_OVERFLOW.inc()
+                    closed = True
+        if closed:
+            self._write([record])
+            return
+        INCIDENT_SINK_QUEUE.set(self._queue.qsize())
+
+    def close(self):
+        """写出队列中全部剩余记录后关闭传输层，可重复调用"""
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._worker.join()
+        with self._write_lock:
+            self.transport.close()
+
+    def _write(self, records: list) -> bool:
+        """返回是否经传输层写出；退避等待期间不持有 _write_lock，其他写入方不必陪着等"""
+        for attempt in range(self.retries + 1):
+            with self._write_lock:
+                try:
+                    self.transport.send_batch(records)
+                    break
+                except Exception as e:
+                    INCIDENT_SINK_ERRORS.inc()
+                    logger.warning(f"Incident sink write failed (attempt {attempt + 1}/{self.retries + 1}): {e}")
+            if attempt < self.retries:
+                time.sleep(self.retry_backoff * 2 ** attempt)
+        else:
+            self._spill(records)
+            return False
+        INCIDENT_SINK_BATCH_SIZE.observe(len(records))
+        return True
+
+    def _spill(self, records: list):
+        """重试仍失败：写入本地溢出文件待补投，本地也写不了才丢弃并记录工单号"""
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with self._write_lock:
+                self._spill_seq += 1
+                seq = self._spill_seq
+            name = f"incidents-{datetime.now().strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{seq:04d}.jsonl"
+            path = os.path.join(self.spill_dir, name)
+            # 先写临时文件再改名：补投方只会看到写完整的溢出文件
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(f"{path}.tmp", path)
+        except Exception as e:
+            logger.error(
+                f"Incident spill failed, lost {[r.get('incident_id') for r in records]}: {e}", exc_info=True
+            )
+            return
+        INCIDENT_SINK_SPILLED.inc(len(records))
+        logger.error(f"Incident transport unavailable, spilled {len(records)} records to {path}")
+
+    def replay_spilled(self) -> int:
+        """
+        把溢出目录中的文件经传输层补投，整文件成功后删除；传输层仍不可用时放回原处下次再试。
+        Returns:
+            补投的记录数
+        """
+        self._last_replay = time.monotonic()
+        if not os.path.isdir(self.spill_dir):
+            return 0
+        for name in os.listdir(self.spill_dir):
+            # 补投途中退出的 worker 留下的认领文件放回原处
+            base, _, pid = name.partition(".replaying-")
+            if pid.isdigit() and not _pid_alive(int(pid)):
+                os.rename(os.path.join(self.spill_dir, name), os.path.join(self.spill_dir, base))
+        replayed = 0
+        for name in sorted(os.listdir(self.spill_dir)):
+            if not (name.startswith("incidents-") and name.endswith(".jsonl")):
+                continue
+            path = os.path.join(self.spill_dir, name)
+            claimed = f"{path}.replaying-{os.getpid()}"
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue  # 已被其他 worker 认领
+            try:
+                with open(claimed, "r", encoding="utf-8") as f:
+                    records = [json.loads(line) for line in f if line.strip()]
+                with self._write_lock:
+                    for start in range(0, len(records), self.batch_size):
+                        self.transport.send_batch(records[start:start + self.batch_size])
+            except Exception as e:
+                os.rename(claimed, path)
+                logger.warning(f"Incident spill replay failed, will retry later: {e}")
+                break
+            os.remove(claimed)
+            replayed += len(records)
+        if replayed:
+            INCIDENT_SINK_REPLAYED.inc(replayed)
+            logger.info(f"Replayed {replayed} spilled incidents from {self.spill_dir}")
+        return replayed
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first[0]]
+        deadline = first[1] + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # 把 STOP 放回去，下一轮写完本批后退出
+                self._queue.put(_STOP)
+                break
+            batch.append(item[0])
+        return batch
+
+    def _run(self):
+        self.replay_spilled()
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            if self._write(batch) and time.monotonic() - self._last_replay >= self.replay_interval:
+                self.replay_spilled()
+            INCIDENT_SINK_QUEUE.set(self._queue.qsize())
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def create_transport() -> IncidentTransport:
+    backend = settings.INCIDENT_SINK_BACKEND
+    if backend == "jsonl":
+        return JsonlSegmentTransport()
+    if backend == "kafka":
+        from kafka import KafkaProducer
+
+        producer = KafkaProducer(bootstrap_servers=settings.KAFKA_BOOTSTRAP_SERVERS, linger_ms=20)
+        return KafkaTransport(producer)
+    raise ValueError(f"Unknown INCIDENT_SINK_BACKEND: {backend}")
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_incident_sink() -> IncidentSink:
+    """进程级单例，首次写工单时才创建后台线程与文件句柄"""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = IncidentSink(create_transport())
+                atexit.register(_sink.close)
+    return _sink
+
+
+def close_incident_sink():
+    if _sink is not None:
+        _sink.close()
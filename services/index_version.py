@@ -0,0 +1,54 @@
+# services/index_version.py
+"""
+政策索引版本戳：建索引脚本完成后写入，在线服务据此判断索引是否已重建，
+从而让依赖索引内容的缓存（如政策答案缓存）自动失效。
+
+增量索引（services/policy_indexer.py）每次发布一个新的索引目录，版本戳中的 path 即当前生效目录；
+版本戳文件整体原子替换，在线检索据此切换到新版本。未写 path 的旧版本戳沿用 settings 中的固定路径。
+"""
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+from config.settings import settings
+
+_lock = threading.Lock()
+_cached = {"key": None, "pointer": None}
+
+
+def write_index_version(doc_texts: list, path: str = None, index_path: str = None) -> str:
+    """原子写入版本戳：构建时间 + 文档内容摘要；index_path 为本版本的索引目录"""
+    path = path or settings.POLICY_INDEX_VERSION_PATH
+    digest = hashlib.sha1("\n".join(doc_texts).encode("utf-8")).hexdigest()[:12]
+    version = f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{digest}"
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": version,
+            "num_docs": len(doc_texts),
+            "built_at": datetime.now().isoformat(),
+            "path": index_path
+        }, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return version
+
+
+def read_index_pointer(path: str = None):
+    """读取当前版本戳（dict）；仅在文件 mtime 变化时重新解析，单次调用只有一次 stat。不存在时返回 None"""
+    path = path or settings.POLICY_INDEX_VERSION_PATH
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    with _lock:
+        if _cached["key"] != (path, mtime):
+            with open(path, "r", encoding="utf-8") as f:
+                _cached["pointer"] = json.load(f)
+            _cached["key"] = (path, mtime)
+        return _cached["pointer"]
+
+
+def current_index_version(path: str = None) -> str:
+    pointer = read_index_pointer(path)
+    return pointer["version"] if pointer else "unversioned"
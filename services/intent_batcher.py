@@ -0,0 +1,98 @@
+# services/intent_batcher.py
+import queue
+import threading
+import time
+import logging
+from concurrent.futures import Future
+from config.settings import settings
+from services.executors import Overloaded
+from utils.metrics import INTENT_BATCH_SIZE, INTENT_QUEUE_WAIT
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+class IntentBatcher:
+    """
+    意图识别微批前端：并发请求先入队，后台线程攒够 max_batch_size
+    或等满 max_wait_ms 后合并成一次 padded 前向推理，再把结果分发给各调用方。
+    """
+
+    def __init__(self, classifier, max_batch_size: int = None, max_wait_ms: float = None, max_queue_size: int = None):
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size or settings.INTENT_BATCH_MAX_SIZE
+        if max_wait_ms is None:
+            max_wait_ms = settings.INTENT_BATCH_MAX_WAIT_MS
+        self.max_wait = max_wait_ms / 1000.0
+
+        # 有界队列：积压超过上限时 submit 立即抛 Overloaded，而不是无限排队
+        self._queue = queue.Queue(maxsize=max_queue_size or settings.INTENT_BATCH_MAX_QUEUE)
+        self._closed = False
+        self._worker = threading.Thread(target=self._run, name="intent-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        try:
+            self._queue.put_nowait((text, future, time.perf_counter()))
+        except queue.Full:
+            raise Overloaded("intent batch queue is full")
+        return future
+
+    def predict(self, text: str, timeout: float = None) -> dict:
+        """与 IntentClassifier.predict 同签名，阻塞直到所在批次推理完成"""
+        return self.submit(text).result(timeout=timeout)
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._worker.join()
+
+    def _collect(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = first[2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                # 超过等待窗口后仍顺带取走已排队的请求，但不再阻塞
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._closed = True
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            # 调用方已取消（如 asyncio 侧超时 / 客户端断开）的请求不再推理；
+            # 置为 RUNNING 后 cancel() 不再生效，后续 set_result 不会抛 InvalidStateError
+            batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                if self._closed:
+                    return
+                continue
+
+            started = time.perf_counter()
+            INTENT_BATCH_SIZE.observe(len(batch))
+            for _, _, enqueued_at in batch:
+                INTENT_QUEUE_WAIT.observe(started - enqueued_at)
+
+            try:
+                results = self.classifier.predict_batch([text for text, _, _ in batch])
+            except Exception as e:
+                logger.error(f"Intent batch inference error: {e}", exc_info=True)
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+
+            if self._closed:
+                return
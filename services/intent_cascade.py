@@ -0,0 +1,117 @@
+# services/intent_cascade.py
+"""
+编排层意图识别级联：本地分类器（LogisticsIntentClassifier）置信度达到阈值、且其标签能映射到编排意图时直接采用；
+否则先查 LLM 结果的语义缓存，仍未命中才升级到 LLM。
+按层记录路由次数与耗时，用于在成本 / 延迟与准确率之间调阈值。
+"""
+import re
+import json
+import time
+import logging
+from config.settings import settings
+from utils.metrics import INTENT_TIER_ROUTED, INTENT_TIER_LATENCY
+
+logger = logging.getLogger(__name__)
+
+ORCHESTRATOR_INTENTS = {
+    "order_status", "policy_query", "commission_rule", "damage_report", "missing_task",
+    "compensation_claim", "user_complaint", "multi_issue", "other"
+}
+
+# 本地分类器标签（config/intent_labels.txt）→ 编排意图；未列出的标签没有对应的编排意图，一律升级到 LLM
+LOCAL_INTENT_MAP = {
+    "order_tracking": "order_status",
+    "delivery_delay": "order_status",
+    "damage_compensation": "compensation_claim",
+    "package_lost": "compensation_claim",
+}
+
+# LLM 意图分类的系统提示（ChatPromptTemplate 模板语法：字面花括号必须写成 {{ }}，否则会被当成模板变量）
+INTENT_SYSTEM_PROMPT = """你是一个物流协同助手意图分类器。请将用户问题分类为以下之一：
+    - order_status: 查询订单状态
+    - policy_query: 询问规则政策
+    - commission_rule: 佣金结算问题
+    - damage_report: 货品破损上报
+    - missing_task: 到仓无任务
+    - compensation_claim: 赔偿诉求
+    - user_complaint: 用户投诉
+    - multi_issue: 多问题复合
+    - other: 其他或无法识别
+    
+    只返回 JSON: {{"intent": "...", "confidence": 0.x}}"""
+
+_JSON_OBJECT = re.compile(r"\{.*?\}", re.S)
+
+
+def parse_intent_json(content: str) -> tuple:
+    """
+    解析 LLM 返回的 {"intent": ..., "confidence": ...}，兼容 ```json 代码块包裹。
+    只做 JSON 解析，不执行任何代码；格式不符返回 ("other", 0.0)。
+    """
+    match = _JSON_OBJECT.search(content or "")
+    if not match:
+        return "other", 0.0
+    try:
+        parsed = json.loads(match.group())
+        intent = parsed["intent"]
+        confidence = float(parsed["confidence"])
+    except (ValueError, KeyError, TypeError):
+        return "other", 0.0
+    if intent not in ORCHESTRATOR_INTENTS or not 0.0 <= confidence <= 1.0:
+        return "other", 0.0
+    return intent, confidence
+
+
+class IntentCascade:
+    def __init__(self, local_classifier, llm_classify, threshold: float = None, semantic_cache=None,
+                 label_map: dict = None):
+        """
+        Args:
+            local_classifier: 提供 predict(text) -> {"intent_name", "confidence"}，为 None 时全部走 LLM
+            llm_classify: question -> LLM 原始回复文本
+            semantic_cache: SemanticIntentCache，为 None 时不缓存 LLM 结果
+            label_map: 本地标签 → 编排意图，默认 LOCAL_INTENT_MAP
+        """
+        self.local_classifier = local_classifier
+        self.label_map = LOCAL_INTENT_MAP if label_map is None else label_map
+        self.llm_classify = llm_classify
+        self.threshold = settings.LOCAL_INTENT_THRESHOLD if threshold is None else threshold
+        self.semantic_cache = semantic_cache
+
+    def classify(self, question: str) -> dict:
+        """Returns: {"intent", "confidence", "tier"}，tier 为 local | semantic_cache | llm | llm_error"""
+        if self.local_classifier is not None:
+            start = time.perf_counter()
+            try:
+                local = self.local_classifier.predict(question)
+            except Exception as e:
+                logger.error(f"Local intent classification failed, escalating: {e}")
+                local = None
+            INTENT_TIER_LATENCY.labels(tier="local").observe(time.perf_counter() - start)
+            intent = self.label_map.get(local["intent_name"]) if local is not None else None
+            if intent in ORCHESTRATOR_INTENTS and local["confidence"] >= self.threshold:
+                INTENT_TIER_ROUTED.labels(tier="local").inc()
+                return {"intent": intent, "confidence": local["confidence"], "tier": "local"}
+
+        if self.semantic_cache is not None:
+            start = time.perf_counter()
+            cached = self.semantic_cache.lookup(question)
+            INTENT_TIER_LATENCY.labels(tier="semantic_cache").observe(time.perf_counter() - start)
+            if cached is not None:
+                INTENT_TIER_ROUTED.labels(tier="semantic_cache").inc()
+                return {"intent": cached["intent"], "confidence": cached["confidence"], "tier": "semantic_cache"}
+
+        start = time.perf_counter()
+        tier = "llm"
+        try:
+            intent, confidence = parse_intent_json(self.llm_classify(question))
+        except Exception as e:
+            logger.error(f"LLM intent classification failed: {e}")
+            intent, confidence, tier = "other", 0.0, "llm_error"
+        INTENT_TIER_LATENCY.labels(tier=tier).observe(time.perf_counter() - start)
+        INTENT_TIER_ROUTED.labels(tier=tier).inc()
+
+        # 只缓存 LLM 正常给出的结果，解析失败 / 调用异常不入缓存
+        if tier == "llm" and intent != "other" and self.semantic_cache is not None:
+            self.semantic_cache.put(question, intent, confidence)
+        return {"intent": intent, "confidence": confidence, "tier": tier}
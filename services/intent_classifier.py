@@ -1,9 +1,12 @@
 # services/intent_classifier.py
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
+import os
+import numpy as np
 from config.settings import settings
 from utils.metrics import INTENT_REQUESTS, INTENT_CONFIDENCE
 
+# 假设标签映射已保存在 config
+INTENT_LABELS = {0: "order_status", 1: "policy_query", 2: "operation_guide"}
+
 class IntentClassifier:
     _instance = None
 
@@ -15,26 +18,54 @@ class IntentClassifier:
 
     def __init__(self):
         if not self._initialized:
-            self.tokenizer = AutoTokenizer.from_pretrained(settings.INTENT_MODEL_PATH)
-            self.model = AutoModelForSequenceClassification.from_pretrained(settings.INTENT_MODEL_PATH)
-            self.model.eval()
+            self.backend = settings.INTENT_BACKEND
+            if self.backend == "onnx":
+                # onnx 后端不加载 torch，常驻内存与单次推理延迟都更低
+                from models.sft.onnx_intent_runtime import OnnxIntentRuntime
+                self.runtime = OnnxIntentRuntime(settings.INTENT_ONNX_PATH)
+            elif self.backend == "torch":
+                from transformers import AutoTokenizer, AutoModelForSequenceClassification
+                self.tokenizer = AutoTokenizer.from_pretrained(settings.INTENT_MODEL_PATH)
+                self.model = AutoModelForSequenceClassification.from_pretrained(settings.INTENT_MODEL_PATH)
+                self.model.eval()
+            else:
+                raise ValueError(f"Unknown INTENT_BACKEND: {self.backend}")
             self._initialized = True
 
-    def predict(self, text: str):
-        INTENT_REQUESTS.inc()
-        inputs = self.tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=128)
+    @classmethod
+    def _after_fork_in_child(cls):
+        # ONNX Runtime 会话的线程池不跨 fork，子进程重新创建；torch 权重保留，与父进程共享只读页
+        if cls._instance is not None and cls._instance._initialized and cls._instance.backend == "onnx":
+            cls._instance = None
+
+    def _predict_proba(self, texts: list) -> np.ndarray:
+        if self.backend == "onnx":
+            return self.runtime.predict_proba(texts)
+
+        import torch
+        inputs = self.tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=128)
         with torch.no_grad():
             logits = self.model(**inputs).logits
-            probs = torch.softmax(logits, dim=-1)
-            confidence, pred = torch.max(probs, dim=-1)
-            
-            intent_id = pred.item()
-            confidence_score = confidence.item()
-            
+            return torch.softmax(logits, dim=-1).numpy()
+
+    def predict(self, text: str):
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: list) -> list:
+        """一次 padded 前向推理处理整批文本，结果顺序与输入一致"""
+        INTENT_REQUESTS.inc(len(texts))
+        probs = self._predict_proba(texts)
+        preds = probs.argmax(axis=-1)
+
+        results = []
+        for intent_id, row in zip(preds.tolist(), probs):
+            confidence_score = float(row[intent_id])
             INTENT_CONFIDENCE.set(confidence_score)
-            
-            # 假设标签映射已保存在 config
-            intent_map = {0: "order_status", 1: "policy_query", 2: "operation_guide"}
-            intent = intent_map.get(intent_id, "unknown")
-            
-            return {"intent": intent, "confidence": confidence_score}
\ No newline at end of file
+            results.append({
+                "intent": INTENT_LABELS.get(intent_id, "unknown"),
+                "confidence": confidence_score
+            })
+        return results
+
+
+os.register_at_fork(after_in_child=IntentClassifier._after_fork_in_child)
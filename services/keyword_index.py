@@ -0,0 +1,177 @@
+# services/keyword_index.py
+"""
+关键词召回：BM25 倒排索引。
+查询只访问命中词项的倒排链，再用 argpartition 做部分 top-k，避免对全库打分排序。
+批量查询（search_many）拼成稀疏查询矩阵，与 词项 × 文档 权重矩阵做一次稀疏矩阵乘。
+增量更新（updated）复用未变文档的词频行，只对新增 / 变更文档分词，再整体重算 BM25 权重。
+"""
+import numpy as np
+import scipy.sparse as sp
+
+_EMPTY_IDS = np.empty(0, dtype=np.int64)
+_EMPTY_SCORES = np.empty(0, dtype=np.float32)
+
+
+class BM25KeywordIndex:
+    # 命中倒排链总长超过 文档数 / DENSE_RATIO 时改用稠密累加，避免 np.unique 排序开销
+    DENSE_RATIO = 8
+
+    def __init__(self, texts: list, analyzer=None, k1: float = 1.5, b: float = 0.75):
+        # sklearn 导入约 1 秒，推迟到建索引时，不拖慢进程启动
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        if analyzer is None:
+            self.vectorizer = CountVectorizer(stop_words='english', lowercase=True, ngram_range=(1, 2))
+        else:
+            self.vectorizer = CountVectorizer(analyzer=analyzer)
+        self.analyzer = self.vectorizer.build_analyzer()
+        self._build(self.vectorizer.fit_transform(texts), dict(self.vectorizer.vocabulary_), k1, b)
+
+    def _build(self, doc_term_counts, vocabulary: dict, k1: float, b: float):
+        self.k1, self.b = k1, b
+        self.vocabulary = vocabulary
+        # docs × terms 词频矩阵（CSR，按文档取行），增量更新时复用未变文档的行
+        self.doc_term_counts = sp.csr_matrix(doc_term_counts)
+        counts = self.doc_term_counts.tocsc()  # 按词项列存储即倒排链
+        self.num_docs = counts.shape[0]
+
+        doc_len = np.asarray(counts.sum(axis=1), dtype=np.float32).ravel()
+        avgdl = float(doc_len.mean()) if self.num_docs else 1.0
+        df = np.diff(counts.indptr)
+        idf = np.log1p((self.num_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        # 预计算每条 posting 的 BM25 权重，查询时只需按词项切片求和
+        tf = counts.data.astype(np.float32)
+        doc_ids = counts.indices
+        term_of_posting = np.repeat(np.arange(counts.shape[1]), df)
+        norm = k1 * (1 - b + b * doc_len[doc_ids] / avgdl)
+        self.postings_ptr = counts.indptr.astype(np.int64)
+        self.postings_doc = doc_ids.astype(np.int64)
+        self.postings_weight = (idf[term_of_posting] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+        # 同一份倒排数据的 CSR 视图（行 = 词项），供批量查询做稀疏矩阵乘
+        self.term_doc_weights = sp.csr_matrix(
+            (self.postings_weight, self.postings_doc, self.postings_ptr),
+            shape=(counts.shape[1], self.num_docs)
+        )
+
+    def updated(self, texts: list, reused_rows) -> "BM25KeywordIndex":
+        """
+        按新文档集合生成新索引（不修改当前实例，在线读者可继续使用旧索引直到切换）。
+        Args:
+            texts: 新文档正文，顺序即新文档下标
+            reused_rows: 与 texts 等长，内容未变的文档给出其在当前索引中的下标，需要重新分词的为 -1
+        """
+        reused_rows = np.asarray(reused_rows, dtype=np.int64)
+        vocabulary = dict(self.vocabulary)
+        fresh_rows = np.flatnonzero(reused_rows < 0)
+        fresh_terms, fresh_counts, fresh_lengths = [], [], []
+        for row in fresh_rows.tolist():
+            ids = [vocabulary.setdefault(t, len(vocabulary)) for t in self.analyzer(texts[row])]
+            term_ids, counts = np.unique(np.asarray(ids, dtype=np.int64), return_counts=True)
+            fresh_terms.append(term_ids)
+            fresh_counts.append(counts)
+            fresh_lengths.append(len(term_ids))
+
+        kept_rows = np.flatnonzero(reused_rows >= 0)
+        kept = self.doc_term_counts[reused_rows[kept_rows]].tocoo()
+        rows = np.concatenate([kept_rows[kept.row], np.repeat(fresh_rows, fresh_lengths)])
+        cols = np.concatenate([kept.col.astype(np.int64)] + fresh_terms)
+        data = np.concatenate([kept.data.astype(np.int64)] + fresh_counts)
+        counts = sp.csr_matrix((data, (rows, cols)), shape=(len(texts), len(vocabulary)))
+
+        index = object.__new__(BM25KeywordIndex)
+        index.vectorizer = self.vectorizer
+        index.analyzer = self.analyzer
+        index._build(counts, vocabulary, self.k1, self.b)
+        return index
+
+    def encode_query(self, text: str):
+        """分词并映射为 (词项 id, 查询词频)，结果可缓存复用"""
+        ids = [self.vocabulary[t] for t in self.analyzer(text) if t in self.vocabulary]
+        if not ids:
+            return _EMPTY_IDS, _EMPTY_SCORES
+        term_ids, counts = np.unique(ids, return_counts=True)
+        return term_ids.astype(np.int64), counts.astype(np.float32)
+
+    def search(self, encoded_query, top_k: int, mask=None):
+        """
+        Args:
+            mask: 可选的文档可见性布尔掩码，在 top-k 选择之前过滤
+        Returns:
+            (doc 下标数组, BM25 分数数组)，按分数降序，长度 ≤ top_k，分数均 > 0
+        """
+        term_ids, query_tf = encoded_query
+        if len(term_ids) == 0 or top_k <= 0:
+            return _EMPTY_IDS, _EMPTY_SCORES
+
+        starts = self.postings_ptr[term_ids]
+        ends = self.postings_ptr[term_ids + 1]
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return _EMPTY_IDS, _EMPTY_SCORES
+
+        doc_ids = np.concatenate([self.postings_doc[s:e] for s, e in zip(starts, ends)])
+        weights = np.concatenate([self.postings_weight[s:e] for s, e in zip(starts, ends)])
+        weights = weights * np.repeat(query_tf, lengths)
+
+        if total * self.DENSE_RATIO < self.num_docs:
+            candidates, inverse = np.unique(doc_ids, return_inverse=True)
+            scores = np.bincount(inverse, weights=weights)
+            if mask is not None:
+                scores[~mask[candidates]] = 0
+        else:
+            # 命中面很广时直接在稠密分数向量上做部分选择
+            candidates = None
+            scores = np.bincount(doc_ids, weights=weights, minlength=self.num_docs)
+            if mask is not None:
+                scores[~mask] = 0
+
+        if len(scores) > top_k:
+            part = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            part = np.arange(len(scores))
+        part = part[scores[part] > 0]
+        order = part[np.argsort(-scores[part], kind="stable")]
+        doc_order = order if candidates is None else candidates[order]
+        return doc_order, scores[order].astype(np.float32)
+
+    def search_many(self, encoded_queries: list, top_k: int, masks: list = None) -> list:
+        """
+        批量版 search：查询矩阵 (查询 × 词项) 乘权重矩阵一次得到全部 (查询, 文档) 分数，
+        再逐行在非零项上做部分 top-k。
+        Args:
+            masks: 与 encoded_queries 对应的掩码列表，元素可为 None
+        Returns:
+            list[(doc 下标数组, BM25 分数数组)]，与 search 的单条结果一致
+        """
+        masks = masks or [None] * len(encoded_queries)
+        if not encoded_queries or top_k <= 0:
+            return [(_EMPTY_IDS, _EMPTY_SCORES) for _ in encoded_queries]
+
+        lengths = [len(term_ids) for term_ids, _ in encoded_queries]
+        queries = sp.csr_matrix(
+            (
+                np.concatenate([tf for _, tf in encoded_queries]),
+                np.concatenate([term_ids for term_ids, _ in encoded_queries]),
+                np.concatenate([[0], np.cumsum(lengths)]),
+            ),
+            shape=(len(encoded_queries), self.term_doc_weights.shape[0]),
+        )
+        scores = (queries @ self.term_doc_weights).tocsr()
+
+        results = []
+        for row, mask in enumerate(masks):
+            start, end = scores.indptr[row], scores.indptr[row + 1]
+            doc_ids, row_scores = scores.indices[start:end], scores.data[start:end]
+            if mask is not None:
+                keep = mask[doc_ids]
+                doc_ids, row_scores = doc_ids[keep], row_scores[keep]
+            if len(row_scores) > top_k:
+                part = np.argpartition(-row_scores, top_k - 1)[:top_k]
+            else:
+                part = np.arange(len(row_scores))
+            part = part[row_scores[part] > 0]
+            order = part[np.argsort(-row_scores[part], kind="stable")]
+            results.append((doc_ids[order].astype(np.int64), row_scores[order].astype(np.float32)))
+        return results
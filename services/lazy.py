@@ -0,0 +1,114 @@
+# services/lazy.py
+"""
+重量级组件（模型、索引、LLM 客户端）的惰性初始化：模块导入时只登记工厂函数，
+首次 get() 或 FastAPI 启动时的 warm_up() 才真正加载，进程可以先绑定端口再加载模型。
+
+加载过程线程安全（双重检查锁），并发的首批请求只会触发一次加载。
+组件状态供 /readyz 使用，加载耗时导出到 /metrics。
+
+pre-fork 部署（scripts/serve_prefork.py）时父进程先 warm_up(prime=False) 只加载不推理，
+fork 后子进程共享这些只读页；持有线程 / 不可跨 fork 的组件（fork_safe=False）在子进程中重置后重新构建。
+"""
+import os
+import time
+import logging
+import threading
+from utils.metrics import COMPONENT_LOADED, COMPONENT_LOAD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+class LazyComponent:
+    def __init__(self, name: str, factory, warm=None, fork_safe: bool = True):
+        """
+        Args:
+            factory: 无参构造函数
+            warm: 可选，加载后对实例做一次预热调用（如空跑一次推理），首个真实请求不再付出首次开销
+            fork_safe: False 表示实例持有线程或不可跨 fork 的句柄，fork 后子进程需重新构建
+        """
+        self.name = name
+        self.factory = factory
+        self.warm = warm
+        self.fork_safe = fork_safe
+        self.load_seconds = None
+        self.error = None
+        self._obj = None
+        self._primed = False
+        self._lock = threading.Lock()
+        _registry[name] = self
+        COMPONENT_LOADED.labels(component=name).set(0)
+
+    @property
+    def loaded(self) -> bool:
+        return self._obj is not None
+
+    def get(self):
+        obj = self._obj
+        if obj is not None and self._primed:
+            return obj
+        return self.load()
+
+    def load(self, prime: bool = True):
+        """加载实例；prime=False 时跳过预热调用（pre-fork 父进程中不做推理，避免推理线程池跨 fork）"""
+        with self._lock:
+            if self._obj is None:
+                start = time.perf_counter()
+                try:
+                    obj = self.factory()
+                except Exception as e:
+                    self.error = repr(e)
+                    raise
+                self.load_seconds = time.perf_counter() - start
+                self.error = None
+                self._obj = obj
+                self._primed = self.warm is None
+                COMPONENT_LOADED.labels(component=self.name).set(1)
+                COMPONENT_LOAD_SECONDS.labels(component=self.name).set(self.load_seconds)
+                logger.info(f"Loaded component {self.name} in {self.load_seconds:.2f}s")
+            if prime and not self._primed:
+                self.warm(self._obj)
+                self._primed = True
+            return self._obj
+
+    def status(self) -> dict:
+        return {"loaded": self.loaded, "load_seconds": self.load_seconds, "error": self.error}
+
+    def _after_fork_in_child(self):
+        # fork 时可能有其他线程持有锁，子进程中重建
+        self._lock = threading.Lock()
+        if not self.fork_safe and self._obj is not None:
+            self._obj = None
+            self._primed = False
+            COMPONENT_LOADED.labels(component=self.name).set(0)
+
+
+def warm_up(names: list = None, prime: bool = True) -> dict:
+    """按登记顺序加载组件，单个失败不影响其余组件；返回 component_status()"""
+    for name, component in list(_registry.items()):
+        if names is not None and name not in names:
+            continue
+        if not prime and not component.fork_safe:
+            continue
+        try:
+            component.load(prime=prime)
+        except Exception as e:
+            logger.error(f"Failed to load component {name}: {e}", exc_info=True)
+    return component_status()
+
+
+def component_status() -> dict:
+    return {name: component.status() for name, component in _registry.items()}
+
+
+def all_loaded() -> bool:
+    return all(component.loaded for component in _registry.values())
+
+
+def _after_fork_in_child():
+    for component in _registry.values():
+        component._after_fork_in_child()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,58 @@
+# services/metadata_filter.py
+"""
+元数据过滤条件：把 metadata_filter 统一转成 (字段, 运算符, 值) 条件，
+Milvus 表达式、本地向量索引与关键词索引共用同一套语义。
+
+版本号在建索引时打包成整数（min_app_version_int），按数值比较，
+避免字符串比较导致 "2.10.0" < "2.3.0"。
+"""
+import re
+
+_VERSION_PART = re.compile(r"\d+")
+_VERSION_BASE = 10000
+
+
+def pack_version(version: str) -> int:
+    """"2.10.3" → 2_0010_0003；缺失段按 0 处理，每段上限 9999"""
+    parts = []
+    for part in str(version or "").split(".")[:3]:
+        match = _VERSION_PART.match(part.strip())
+        parts.append(min(int(match.group()), _VERSION_BASE - 1) if match else 0)
+    parts += [0] * (3 - len(parts))
+    major, minor, patch = parts
+    return (major * _VERSION_BASE + minor) * _VERSION_BASE + patch
+
+
+def metadata_conditions(metadata_filter: dict) -> list:
+    """
+    Returns:
+        list[(field, op, value)]：op 为 "==" 或 "<="；
+        min_app_version 表示客户端版本，文档要求的最低版本不高于它才可见
+    """
+    conditions = []
+    for key, val in (metadata_filter or {}).items():
+        if key == "min_app_version":
+            conditions.append(("min_app_version_int", "<=", pack_version(val)))
+        else:
+            conditions.append((key, "==", val))
+    return conditions
+
+
+_FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _milvus_literal(val) -> str:
+    """数值原样输出；其余一律按字符串字面量转义（region 等取自请求体，不能拼出额外的布尔条件）"""
+    if isinstance(val, (int, float)) and not isinstance(val, bool):
+        return str(val)
+    escaped = str(val).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+
+def milvus_expr(conditions: list):
+    parts = []
+    for field, op, val in conditions:
+        if not _FIELD_NAME.match(field):
+            raise ValueError(f"Invalid metadata filter field: {field!r}")
+        parts.append(f"{field} {op} {_milvus_literal(val)}")
+    return " && ".join(parts) if parts else None
@@ -0,0 +1,72 @@
+# services/pii_masker.py
+"""
+PII 脱敏引擎：所有类别合并为一个预编译正则（命名分组），一次扫描完成替换；
+正则前加首字符前瞻，不可能命中的位置不会逐个尝试各分支。
+
+按优先级从左到右尝试：
+- order_id: 订单号（ORD 开头）原样保留，避免其中的数字串被当成手机号 / 证件号
+- id_card:  18 位身份证号
+- phone:    11 位手机号（可带 +86 前缀）
+- plate:    车牌号，保留省份简称
+- address:  省份简称 + 5~6 位数字的地址编码（沿用原规则）
+"""
+import re
+
+_PROVINCES = "京津沪渝冀豫云辽黑湘皖鲁新苏浙赣鄂桂甘晋蒙陕吉闽贵粤青藏川宁琼使领"
+
+# (类别, 正则, 首字符集合)；首字符集合用于整体的前瞻预筛，大部分位置一次字符判断即可跳过
+_PATTERNS = [
+    ("order_id", r"ORD\d+", "O"),
+    ("id_card", r"(?<![0-9A-Za-z])\d{17}[\dXx](?![0-9A-Za-z])", r"\d"),
+    ("phone", r"(?<!\d)(?:\+?86[- ]?)?1[3-9]\d{9}(?!\d)", r"\d+"),
+    ("plate", rf"[{_PROVINCES}][A-HJ-NP-Z][A-HJ-NP-Z0-9]{{4,5}}[A-HJ-NP-Z0-9挂学警港澳](?![A-Za-z0-9])", _PROVINCES),
+    ("address", rf"[{_PROVINCES}]\d{{5,6}}", _PROVINCES),
+]
+
+_REPLACEMENTS = {
+    "order_id": lambda s: s,
+    "id_card": lambda s: "X" * 18,
+    "phone": lambda s: "1XXXXXXXXX",
+    "plate": lambda s: s[0] + "XXXXX",
+    "address": lambda s: "XX地址",
+}
+
+# 批量接口的拼接分隔符，所有模式都不会匹配或跨越它
+_SEP = "\x00"
+
+
+class PIIMasker:
+    PRESERVED = {"order_id"}
+
+    def __init__(self):
+        first = "".join(dict.fromkeys(f for _, _, f in _PATTERNS))
+        alternation = "|".join(f"(?P<{name}>{p})" for name, p, _ in _PATTERNS)
+        self._regex = re.compile(f"(?=[{first}])(?:{alternation})")
+
+    def _replace(self, m: re.Match) -> str:
+        return _REPLACEMENTS[m.lastgroup](m.group())
+
+    def mask(self, text: str) -> str:
+        return self._regex.sub(self._replace, text)
+
+    def mask_with_report(self, text: str) -> tuple:
+        """Returns: (脱敏文本, {类别: 命中次数})，保留类（订单号）不计入"""
+        hits = {}
+
+        def replace(m):
+            if m.lastgroup not in self.PRESERVED:
+                hits[m.lastgroup] = hits.get(m.lastgroup, 0) + 1
+            return _REPLACEMENTS[m.lastgroup](m.group())
+
+        return self._regex.sub(replace, text), hits
+
+    def mask_batch(self, texts: list) -> list:
+        """整段聊天记录 / 日志一次正则扫描完成，避免逐条调用的开销"""
+        if not texts:
+            return []
+        if any(_SEP in t for t in texts):
+            return [self.mask(t) for t in texts]
+        return self.mask(_SEP.join(texts)).split(_SEP)
+
+
+pii_masker = PIIMasker()
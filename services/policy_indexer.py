@@ -0,0 +1,247 @@
+# services/policy_indexer.py
+"""
+政策索引增量发布：按 doc_id 比对上一版本，只为新增 / 正文变化的文档计算嵌入，其余复用上一版本的向量；
+文档摘要（正文 + 元数据）变化的才同步到远程向量库。
+
+每次发布写一个新的索引目录（settings.POLICY_INDEX_ROOT/<gen>/）：
+    doc_store/        列式文档存储，含 content_hash 列
+    embeddings.npy    与文档行对齐的 L2 归一化向量，下次发布时复用
+    faiss.index       本地向量索引（VECTOR_STORE_BACKEND=local）
+目录写完后再原子替换版本戳（services/index_version），在线服务检测到版本变化后在后台加载新目录并整体切换，
+切换前始终使用旧版本，不存在“无索引”的窗口。
+
+Milvus 后端（MilvusPolicySync）每次发布都写一个新的物理集合（向量同样复用上一版本，不重新计算嵌入），
+serving 始终读别名指向的旧集合；别名切换与版本戳替换紧挨着执行，不会读到一半旧一半新的集合。
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import numpy as np
+from config.settings import settings
+from services.doc_store import PolicyDocStore, build_doc_store
+from services.index_version import read_index_pointer, write_index_version
+from services.metadata_filter import pack_version
+
+logger = logging.getLogger(__name__)
+
+HASH_COLUMN = "content_hash"
+
+
+def content_hash(doc: dict) -> str:
+    """文档全部字段（正文 + 元数据）的摘要，任一字段变化都视为变更"""
+    fields = {k: v for k, v in doc.items() if k != HASH_COLUMN}
+    return hashlib.sha1(json.dumps(fields, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+
+def reused_rows(doc_ids: list, contents: list, previous) -> np.ndarray:
+    """
+    新文档对应的上一版本行号（正文相同才复用，嵌入与关键词词频只取决于正文）；新增或正文变化的为 -1。
+    previous 为上一版本的 PolicyDocStore（可为 None）。
+    """
+    rows = np.full(len(doc_ids), -1, dtype=np.int64)
+    if previous is None:
+        return rows
+    for i, (doc_id, content) in enumerate(zip(doc_ids, contents)):
+        row = previous.doc_index.get(doc_id)
+        if row is not None and previous.string("content", row) == content:
+            rows[i] = row
+    return rows
+
+
+def _normalize(embeddings: np.ndarray) -> np.ndarray:
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    return embeddings / np.where(norms > 0, norms, 1.0)
+
+
+class PolicyIndexer:
+    def __init__(self, encode, root: str = None, pointer_path: str = None, keep: int = None,
+                 write_faiss: bool = None, sync=None):
+        """
+        Args:
+            encode: 文本列表 → 向量矩阵
+            keep: 保留最近几个版本目录（回滚用），更早的发布后删除
+            write_faiss: 是否写本地 FAISS 索引，默认按 VECTOR_STORE_BACKEND
+            sync: 可选的远程向量库同步器（MilvusPolicySync）
+        """
+        self.encode = encode
+        self.root = root or settings.POLICY_INDEX_ROOT
+        self.pointer_path = pointer_path or settings.POLICY_INDEX_VERSION_PATH
+        self.keep = settings.POLICY_INDEX_KEEP if keep is None else keep
+        self.write_faiss = settings.VECTOR_STORE_BACKEND == "local" if write_faiss is None else write_faiss
+        self.sync = sync
+
+    def _previous(self):
+        """上一版本的 (目录, 文档存储, 向量)；没有可复用的版本时返回 (None, None, None)"""
+        pointer = read_index_pointer(self.pointer_path)
+        path = pointer.get("path") if pointer else None
+        if not path or not os.path.exists(os.path.join(path, "embeddings.npy")):
+            return None, None, None
+        docs = PolicyDocStore(os.path.join(path, "doc_store"))
+        return path, docs, np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+
+    def update(self, docs: list, full: bool = False) -> dict:
+        """
+        发布 docs 对应的新版本；与当前版本完全相同时不发布。
+        Returns:
+            发布报告：version / added / changed / deleted / embedded / seconds
+        """
+        start = time.perf_counter()
+        hashes = [content_hash(doc) for doc in docs]
+        prev_path, previous, prev_embeddings = (None, None, None) if full else self._previous()
+        doc_ids = [doc["id"] for doc in docs]
+        rows = reused_rows(doc_ids, [doc["content"] for doc in docs], previous)
+        fresh = np.flatnonzero(rows < 0)
+
+        prev_index = previous.doc_index if previous is not None else {}
+        # 旧版文档存储没有摘要列（读出空串），一律视为变更
+        upserts = np.array([
+            i for i, (doc_id, digest) in enumerate(zip(doc_ids, hashes))
+            if doc_id not in prev_index or previous.string(HASH_COLUMN, prev_index[doc_id]) != digest
+        ], dtype=np.int64)
+        deleted = sorted(set(prev_index) - set(doc_ids))
+        report = {
+            "added": sum(doc_id not in prev_index for doc_id in doc_ids),
+            "changed": sum(doc_ids[i] in prev_index for i in upserts.tolist()),
+            "deleted": len(deleted),
+            "embedded": len(fresh),
+        }
+        if previous is not None and not len(upserts) and not deleted and list(prev_index) == doc_ids:
+            report.update(version=read_index_pointer(self.pointer_path)["version"], published=False,
+                          seconds=time.perf_counter() - start)
+            return report
+
+        # === 1. 只为新增 / 变更文档计算嵌入，其余复用上一版本 ===
+        dim = prev_embeddings.shape[1] if prev_embeddings is not None else None
+        fresh_embeddings = _normalize(self.encode([docs[i]["content"] for i in fresh.tolist()])) if len(fresh) else None
+        if dim is None:
+            dim = fresh_embeddings.shape[1] if fresh_embeddings is not None else 0
+        embeddings = np.zeros((len(docs), dim), dtype=np.float32)
+        kept = np.flatnonzero(rows >= 0)
+        if len(kept):
+            embeddings[kept] = prev_embeddings[rows[kept]]
+        if fresh_embeddings is not None:
+            embeddings[fresh] = fresh_embeddings
+
+        # === 2. 写新版本目录 ===
+        os.makedirs(self.root, exist_ok=True)
+        gen_path = os.path.join(self.root, f"gen-{time.time_ns()}")
+        os.makedirs(gen_path)
+        build_doc_store([dict(doc, **{HASH_COLUMN: digest}) for doc, digest in zip(docs, hashes)],
+                        os.path.join(gen_path, "doc_store"))
+        np.save(os.path.join(gen_path, "embeddings.npy"), embeddings)
+        if self.write_faiss:
+            import faiss
+
+            index = faiss.IndexFlatIP(dim)
+            index.add(embeddings)
+            faiss.write_index(index, os.path.join(gen_path, "faiss.index"))
+
+        # === 3. 远程向量库写入新的物理集合，serving 仍读旧集合 ===
+        staged = self.sync.prepare(docs, embeddings) if self.sync is not None else None
+
+        # === 4. 切换别名后立即原子替换版本戳，在线服务据此切换 ===
+        if staged is not None:
+            self.sync.publish(staged)
+        version = write_index_version(hashes, path=self.pointer_path, index_path=gen_path)
+        self._prune(keep_paths={gen_path, prev_path})
+        report.update(version=version, path=gen_path, published=True, seconds=time.perf_counter() - start)
+        logger.info(f"Published policy index {version}: {report}")
+        return report
+
+    def _prune(self, keep_paths: set):
+        generations = [
+            os.path.join(self.root, name)
+            for name in sorted(os.listdir(self.root), key=lambda n: int(n[4:]) if n[4:].isdigit() else -1)
+            if name.startswith("gen-")
+        ]
+        for path in generations[:max(0, len(generations) - self.keep)]:
+            if path not in keep_paths:
+                shutil.rmtree(path, ignore_errors=True)
+
+
+class MilvusPolicySync:
+    """
+    serving 通过别名（settings.MILVUS_COLLECTION_NAME）访问物理集合 <别名>_<时间戳>。
+    每次发布（含增量）都把全部向量写入新的物理集合，再原子切换别名并清理旧集合：
+    在别名上原地 upsert / delete 会让 serving 在版本戳切换前读到混合版本。
+    增量发布省下的是嵌入计算，写入量仍为全量。
+    """
+
+    BATCH_SIZE = 1000
+
+    def __init__(self, alias: str = None):
+        from pymilvus import connections
+
+        connections.connect(host=settings.MILVUS_HOST, port=settings.MILVUS_PORT)
+        self.alias = alias or settings.MILVUS_COLLECTION_NAME
+
+    @staticmethod
+    def _entities(docs: list, embeddings: np.ndarray, rows) -> list:
+        rows = list(rows)
+        return [
+            [docs[i]["id"] for i in rows],
+            [docs[i]["content"] for i in rows],
+            [docs[i].get("deep_link", "") for i in rows],
+            [docs[i].get("region", "") for i in rows],
+            [docs[i].get("min_app_version", "") for i in rows],
+            [pack_version(docs[i].get("min_app_version", "")) for i in rows],
+            embeddings[rows].tolist(),
+        ]
+
+    def _create_collection(self, name: str, dim: int):
+        from pymilvus import FieldSchema, CollectionSchema, DataType, Collection
+
+        fields = [
+            FieldSchema(name="doc_id", dtype=DataType.VARCHAR, max_length=128, is_primary=True),  # 主键 doc_id
+            FieldSchema(name="content", dtype=DataType.VARCHAR, max_length=65535),
+            FieldSchema(name="deep_link", dtype=DataType.VARCHAR, max_length=512),
+            FieldSchema(name="region", dtype=DataType.VARCHAR, max_length=64),
+            FieldSchema(name="min_app_version", dtype=DataType.VARCHAR, max_length=32),
+            FieldSchema(name="min_app_version_int", dtype=DataType.INT64),  # 打包版本号，供范围过滤下推
+            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=dim)
+        ]
+        collection = Collection(name, CollectionSchema(fields, description="Policy RAG Collection"))
+        collection.create_index(
+            field_name="embedding",
+            index_params={"index_type": "HNSW", "metric_type": "COSINE", "params": {"M": 8, "efConstruction": 64}}
+        )
+        return collection
+
+    def prepare(self, docs: list, embeddings: np.ndarray) -> str:
+        """把本版本全部文档写入新的物理集合并加载，返回集合名；别名仍指向旧集合"""
+        from pymilvus import utility
+
+        if self.alias in utility.list_collections():
+            raise RuntimeError(
+                f"'{self.alias}' is a physical Milvus collection (legacy auto-id schema), not an alias. "
+                "Rename MILVUS_COLLECTION_NAME or retire the legacy collection once, then re-run."
+            )
+        name = f"{self.alias}_{time.time_ns()}"
+        collection = self._create_collection(name, embeddings.shape[1])
+        try:
+            for start in range(0, len(docs), self.BATCH_SIZE):
+                rows = range(start, min(start + self.BATCH_SIZE, len(docs)))
+                collection.insert(self._entities(docs, embeddings, rows))
+            collection.flush()
+            collection.load()
+        except Exception:
+            utility.drop_collection(name)
+            raise
+        return name
+
+    def publish(self, name: str):
+        """原子切换别名到 name（切换前请求仍落在旧集合上），再清理不再被别名引用的旧集合"""
+        from pymilvus import utility
+
+        if utility.has_collection(self.alias):
+            utility.alter_alias(collection_name=name, alias=self.alias)
+        else:
+            utility.create_alias(collection_name=name, alias=self.alias)
+        for old in utility.list_collections():
+            if old.startswith(f"{self.alias}_") and old != name and not utility.list_aliases(old):
+                utility.drop_collection(old)
+        logger.info(f"Milvus alias {self.alias} now points to {name}")
@@ -1,20 +1,63 @@
 # services/rag_retriever.py
 import os
+import time
 import logging
+import threading
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from pymilvus import connections, Collection, FieldSchema, CollectionSchema, DataType, utility
-from config import (
-    POLICY_DOCS_PATH,
-    MILVUS_HOST,        # 新增配置，如 "localhost"
-    MILVUS_PORT,        # 如 19530
-    MILVUS_COLLECTION_NAME  # 如 "policy_rag"
-)
+from config.settings import settings
+from services.vector_store import create_vector_store
+from services.doc_store import PolicyDocStore
+from services.keyword_index import BM25KeywordIndex
+from services.fusion import fuse_many
+from services.reranker import CrossEncoderReranker
+from services.text_analyzer import get_analyzer
+from services.lazy import LazyComponent
+from services.index_version import read_index_pointer
+from services.policy_indexer import reused_rows
+from utils.cache import LRUCache, normalize_query
+from utils.safety_guard import mask_pii
 
 logger = logging.getLogger(__name__)
 
+def _index_paths(pointer) -> tuple:
+    """(文档存储目录, FAISS 索引文件)：增量发布的版本戳指向版本目录，旧版本戳沿用 settings 中的固定路径"""
+    path = pointer.get("path") if pointer else None
+    if path:
+        return os.path.join(path, "doc_store"), os.path.join(path, "faiss.index")
+    return settings.POLICY_DOC_STORE_PATH, settings.POLICY_INDEX_PATH
+
+
+class PolicyIndex:
+    """一个索引版本的只读视图：文档存储 + 关键词索引 + 向量检索后端，版本切换时整体替换"""
+
+    def __init__(self, version: str, docs, keyword_index, vector_store):
+        self.version = version
+        self.docs = docs
+        self.keyword_index = keyword_index
+        self.vector_store = vector_store
+
+
+def load_policy_index(pointer, previous: PolicyIndex = None) -> PolicyIndex:
+    """加载版本戳指向的索引；给出上一版本时关键词索引只对正文变化的文档重新分词"""
+    doc_path, faiss_path = _index_paths(pointer)
+    # 列式文档存储（mmap，按 id 惰性解码；用于关键词索引、本地向量索引和 fallback）
+    docs = PolicyDocStore(doc_path)
+    doc_texts = list(docs.texts())
+
+    # BM25 倒排索引（关键词召回，中文分词）
+    if previous is None:
+        keyword_index = BM25KeywordIndex(doc_texts, analyzer=get_analyzer(settings.KEYWORD_ANALYZER))
+    else:
+        keyword_index = previous.keyword_index.updated(doc_texts, reused_rows(list(docs.doc_index), doc_texts, previous.docs))
+
+    # 向量检索后端（local FAISS 随版本目录加载；Milvus 通过别名访问，句柄按进程解析，跨版本复用）
+    if previous is not None and settings.VECTOR_STORE_BACKEND == "milvus":
+        vector_store = previous.vector_store
+    else:
+        vector_store = create_vector_store(docs, index_path=faiss_path)
+    return PolicyIndex(pointer["version"] if pointer else "unversioned", docs, keyword_index, vector_store)
+
+
 class RAGPolicyRetriever:
     _instance = None
 
@@ -26,146 +69,214 @@ class RAGPolicyRetriever:
 
     def __init__(self):
         if not self._initialized:
-            # 初始化 Milvus 连接
-            connections.connect(
-                alias="default",
-                host=MILVUS_HOST or "localhost",
-                port=MILVUS_PORT or "19530"
-            )
+            from sentence_transformers import SentenceTransformer
 
-            self.collection_name = MILVUS_COLLECTION_NAME or "policy_rag"
-            self.model = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
+            self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
 
-            # 加载原始文档（用于 TF-IDF 和 fallback）
-            self.docs = np.load(POLICY_DOCS_PATH, allow_pickle=True)
-            doc_texts = [doc.item()["content"] for doc in self.docs]
+            # 当前生效的索引版本；版本戳变化后在后台加载新版本再整体切换
+            self.index = load_policy_index(read_index_pointer())
+            self._reload_lock = threading.Lock()
+            self._failed_version = None
 
-            # 构建 TF-IDF（关键词召回）
-            self.tfidf_vectorizer = TfidfVectorizer(
-                stop_words='english',
-                lowercase=True,
-                ngram_range=(1, 2),
-                max_features=10000
+            # 查询编码缓存：归一化查询 → (embedding, 关键词查询词项)
+            self.query_cache = LRUCache(
+                "rag_query_encoding",
+                maxsize=settings.QUERY_CACHE_SIZE,
+                ttl_seconds=settings.QUERY_CACHE_TTL_S
             )
-            self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(doc_texts)
-
-            # 确保 Milvus 集合存在
-            self._ensure_collection_exists()
 
             self._initialized = True
 
-    def _ensure_collection_exists(self):
-        """确保 Milvus 集合已创建（仅用于检查，不负责插入数据）"""
-        if not utility.has_collection(self.collection_name):
-            raise RuntimeError(
-                f"Milvus collection '{self.collection_name}' not found. "
-                "Please run a script to build and insert policy embeddings into Milvus."
-            )
-        self.collection = Collection(self.collection_name)
-        self.collection.load()  # 加载到内存以加速查询
-
-    def _matches_metadata(self, doc: dict, filters: dict) -> bool:
-        """Python 层面兜底过滤（Milvus 已支持下推，此函数可保留作兼容）"""
-        for key, required_value in filters.items():
-            if key in doc:
-                if key == "min_app_version":
-                    if doc[key] > required_value:
-                        continue
-                elif doc[key] != required_value:
-                    return False
-        return True
-
-    def _hybrid_fusion(self, vector_results, keyword_results, top_k):
-        """RRF 融合"""
-        rrf_scores = {}
-        k = 60
-        for rank, item in enumerate(vector_results, start=1):
-            rrf_scores[item["doc_id"]] = rrf_scores.get(item["doc_id"], 0) + 1.0 / (k + rank)
-        for rank, item in enumerate(keyword_results, start=1):
-            rrf_scores[item["doc_id"]] = rrf_scores.get(item["doc_id"], 0) + 1.0 / (k + rank)
-
-        fused = sorted(rrf_scores.items(), key=lambda x: x[1], reverse=True)
-        seen = set()
-        final = []
-        doc_map = {item["doc_id"]: item for item in (vector_results + keyword_results)}
-        for doc_id, _ in fused:
-            if doc_id not in seen and doc_id in doc_map:
-                final.append(doc_map[doc_id])
-                seen.add(doc_id)
-                if len(final) >= top_k:
-                    break
-        return final
-
-    def retrieve(self, query: str, top_k: int = 1, metadata_filter: dict = None, threshold: float = 0.75):
+    @property
+    def index_version(self) -> str:
+        return self.index.version
+
+    @property
+    def docs(self):
+        return self.index.docs
+
+    @property
+    def keyword_index(self):
+        return self.index.keyword_index
+
+    @property
+    def vector_store(self):
+        return self.index.vector_store
+
+    def _current_index(self) -> PolicyIndex:
+        """返回当前索引；发现新版本时触发后台加载，加载完成前继续使用旧版本"""
+        index = self.index
+        pointer = read_index_pointer()
+        version = pointer["version"] if pointer else "unversioned"
+        if version != index.version and version != self._failed_version and self._reload_lock.acquire(blocking=False):
+            threading.Thread(target=self._reload, args=(pointer, index), name="rag-index-reload", daemon=True).start()
+        return index
+
+    def _reload(self, pointer, previous: PolicyIndex):
         try:
-            # === 1. 向量检索（Milvus）===
-            query_emb = self.model.encode([query]).tolist()[0]
-
-            # 构建 Milvus 查询表达式（支持元数据过滤下推！）
-            expr = None
-            if metadata_filter:
-                conditions = []
-                for key, val in metadata_filter.items():
-                    if key == "min_app_version":
-                        # 注意：Milvus 不直接支持版本比较，需存为数值或字符串比较
-                        # 此处简化为字符串前缀匹配或忽略，建议存 version_int
-                        continue  # 或按业务逻辑处理
-                    elif isinstance(val, str):
-                        conditions.append(f'{key} == "{val}"')
-                    else:
-                        conditions.append(f'{key} == {val}')
-                if conditions:
-                    expr = " && ".join(conditions)
-
-            search_params = {"metric_type": "COSINE", "params": {"nprobe": 10}}
-            results = self.collection.search(
-                data=[query_emb],
-                anns_field="embedding",
-                param=search_params,
-                limit=top_k * 3,
-                expr=expr,  # ⬅️ 关键：过滤下推到 Milvus
-                output_fields=["doc_id", "content", "deep_link"]
+            start = time.perf_counter()
+            self.index = load_policy_index(pointer, previous)
+            # 查询编码缓存按版本分键，旧版本条目不再命中，直接清掉
+            self.query_cache.clear()
+            logger.info(f"Switched policy index {previous.version} -> {pointer['version']} in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            self._failed_version = pointer["version"]
+            logger.error(f"Failed to load policy index {pointer['version']}: {e}", exc_info=True)
+        finally:
+            self._reload_lock.release()
+
+    def _encode_query(self, query: str):
+        """返回 (embedding, 关键词查询词项)，高频政策问题命中缓存时跳过模型编码"""
+        return self._encode_queries([query], self.index)[0]
+
+    def _encode_queries(self, queries: list, index: PolicyIndex) -> list:
+        """批量版 _encode_query：未命中缓存的查询合并为一次 model.encode 调用"""
+        # 缓存键先脱敏，缓存中不留存手机号等 PII；词项 id 属于特定索引版本，键中带上版本
+        texts = [normalize_query(mask_pii(q)) for q in queries]
+        keys = [(index.version, text) for text in texts]
+        encoded = [self.query_cache.get(key) for key in keys]
+        missing = list(dict.fromkeys(key for key, enc in zip(keys, encoded) if enc is None))
+        if missing:
+            fresh = {}
+            for key, query_emb in zip(missing, self.model.encode([text for _, text in missing])):
+                query_emb.setflags(write=False)
+                fresh[key] = (query_emb, index.keyword_index.encode_query(key[1]))
+                self.query_cache.put(key, fresh[key])
+            encoded = [enc if enc is not None else fresh[key] for key, enc in zip(keys, encoded)]
+        return encoded
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """查询向量（只读，与检索共用编码缓存）"""
+        return self._encode_query(query)[0]
+
+    @staticmethod
+    def _keyword_candidate(docs, idx: int, score: float) -> dict:
+        doc = docs.get(idx)
+        return {
+            "text": doc["content"],
+            "score": score,
+            "deep_link": doc.get("deep_link", ""),
+            "doc_id": doc["id"]
+        }
+
+    def retrieve(self, query: str, top_k: int = 1, metadata_filter: dict = None, threshold: float = 0.75,
+                 fusion: str = None, fusion_weights=None):
+        results = self.retrieve_many(
+            [query], [metadata_filter], top_k=top_k, threshold=threshold,
+            fusion=fusion, fusion_weights=fusion_weights
+        )[0]
+        logger.info(f"Hybrid RAG ({settings.VECTOR_STORE_BACKEND}+BM25) retrieved {len(results)} results for: {query}")
+        return results
+
+    def retrieve_many(self, queries: list, metadata_filters: list = None, top_k: int = 1, threshold: float = 0.75,
+                      fusion: str = None, fusion_weights=None) -> list:
+        """
+        批量检索：一次 encode、按过滤条件分组的多向量 ANN 检索、一次稀疏矩阵乘的关键词打分、整批向量化融合，
+        启用重排（settings.RERANK_ENABLED）时再对融合前 N 条做交叉编码器重排。
+        Args:
+            threshold: 向量召回的余弦相似度阈值；启用重排时改用校准后的重排分数（settings.RERANK_THRESHOLD）判定，
+                       仅在重排超出预算回退到融合顺序时才按此阈值过滤向量候选
+            fusion: "rrf" | "combsum"，默认 settings.RAG_FUSION_METHOD
+            fusion_weights: (向量, 关键词) 两路权重，默认 settings.RAG_FUSION_WEIGHTS
+        Returns:
+            list[list[dict]]: 与 queries 顺序一致
+        Raises:
+            检索过程中的异常原样抛出（已记录日志）
+        """
+        if not queries:
+            return []
+        metadata_filters = metadata_filters or [None] * len(queries)
+        try:
+            rerank = reranker is not None
+            fused_k = max(top_k, settings.RERANK_TOP_N) if rerank else top_k
+            num_candidates = fused_k * settings.RAG_CANDIDATE_MULTIPLIER
+            index = self._current_index()
+            encoded = self._encode_queries(queries, index)
+
+            # === 1. 向量检索（local FAISS / Milvus，过滤下推）===
+            vector_candidates = index.vector_store.search_many(
+                [query_emb for query_emb, _ in encoded],
+                top_k=num_candidates,
+                metadata_filters=metadata_filters,
+                # 重排时由交叉编码器判定相关性，向量召回不再按余弦阈值截断
+                threshold=0.0 if rerank else threshold
             )
+            doc_index = index.docs.doc_index
+            vector_by_idx = [
+                {doc_index[c["doc_id"]]: c for c in candidates if c["doc_id"] in doc_index}
+                for candidates in vector_candidates
+            ]
 
-            vector_candidates = []
-            for hit in results[0]:
-                score = hit.distance
-                if score < threshold:
-                    continue
-                entity = hit.entity
-                vector_candidates.append({
-                    "text": entity.get("content", ""),
-                    "score": float(score),
-                    "deep_link": entity.get("deep_link", ""),
-                    "doc_id": entity.get("doc_id", "")
-                })
-
-            # === 2. 关键词召回（TF-IDF）===
-            query_tfidf = self.tfidf_vectorizer.transform([query])
-            sim_scores = cosine_similarity(query_tfidf, self.tfidf_matrix).flatten()
-            top_indices = np.argsort(sim_scores)[::-1][:top_k * 3]
-
-            keyword_candidates = []
-            for idx in top_indices:
-                score = float(sim_scores[idx])
-                if score <= 0:
-                    break
-                doc = self.docs[idx].item()
-                if metadata_filter and not self._matches_metadata(doc, metadata_filter):
-                    continue
-                keyword_candidates.append({
-                    "text": doc["content"],
-                    "score": score,
-                    "deep_link": doc.get("deep_link", ""),
-                    "doc_id": doc["id"]
-                })
+            # === 2. 关键词召回（BM25，元数据过滤在 top-k 之前）===
+            keyword_results = index.keyword_index.search_many(
+                [query_terms for _, query_terms in encoded],
+                num_candidates,
+                masks=[index.docs.eligible_mask(f) for f in metadata_filters]
+            )
+
+            # === 3. 融合（RRF / CombSUM，整数下标）===
+            method = fusion or settings.RAG_FUSION_METHOD
+            scores = None
+            if method == "combsum":
+                scores = [
+                    [np.fromiter((c["score"] for c in by_idx.values()), dtype=np.float64, count=len(by_idx))
+                     for by_idx in vector_by_idx],
+                    [kw_scores for _, kw_scores in keyword_results]
+                ]
+            fused = fuse_many(
+                [
+                    [np.fromiter(by_idx, dtype=np.int64, count=len(by_idx)) for by_idx in vector_by_idx],
+                    [ids for ids, _ in keyword_results]
+                ],
+                fused_k,
+                method=method,
+                weights=fusion_weights or settings.RAG_FUSION_WEIGHTS,
+                scores=scores,
+                num_docs=len(index.docs)
+            )
 
-            # === 3. 融合 ===
-            fused_results = self._hybrid_fusion(vector_candidates, keyword_candidates, top_k)
+            results = []
+            for (doc_ids, _), by_idx, (kw_ids, kw_scores) in zip(fused, vector_by_idx, keyword_results):
+                kw_score = dict(zip(kw_ids.tolist(), kw_scores.tolist()))
+                # 两路都命中时保留向量候选（score 为余弦相似度）
+                results.append([
+                    by_idx[idx] if idx in by_idx else self._keyword_candidate(index.docs, idx, kw_score[idx])
+                    for idx in doc_ids.tolist()
+                ])
+            if not rerank:
+                return results
 
-            logger.info(f"Hybrid RAG (Milvus+TFIDF) retrieved {len(fused_results)} results for: {query}")
-            return fused_results
+            # === 4. 交叉编码器重排（超出时间预算的查询回退到融合顺序）===
+            reranked = []
+            rerank_scores = reranker.get().score_many(queries, results)
+            for candidates, by_idx, scores in zip(results, vector_by_idx, rerank_scores):
+                if scores is None:
+                    # 回退：恢复向量召回的余弦阈值，关键词候选照旧保留
+                    vector_ids = {c["doc_id"] for c in by_idx.values()}
+                    reranked.append([
+                        c for c in candidates if c["doc_id"] not in vector_ids or c["score"] >= threshold
+                    ][:top_k])
+                    continue
+                ranked = []
+                for pos in np.argsort(-scores, kind="stable")[:top_k]:
+                    if scores[pos] < settings.RERANK_THRESHOLD:
+                        break
+                    ranked.append(dict(candidates[pos], rerank_score=float(scores[pos])))
+                reranked.append(ranked)
+            return reranked
 
         except Exception as e:
-            logger.error(f"Milvus hybrid retrieval error: {e}", exc_info=True)
-            return []
\ No newline at end of file
+            # 不能把故障伪装成“无结果”：调用方据此区分未命中与检索失败（后者不缓存）
+            logger.error(f"Hybrid retrieval error: {e}", exc_info=True)
+            raise
+
+
+# 进程级惰性实例：首次使用或启动预热时才加载嵌入模型与索引
+policy_retriever = LazyComponent("rag_retriever", RAGPolicyRetriever, warm=lambda r: r.embed_query("生鲜破损怎么处理"))
+# 重排模型持有推理线程，不跨 fork 共享；未启用时不登记，不影响 /readyz
+reranker = LazyComponent(
+    "reranker",
+    CrossEncoderReranker,
+    warm=lambda r: r.score_many(["生鲜破损怎么处理"], [[{"doc_id": "", "text": "生鲜破损"}]], budget_ms=60000),
+    fork_safe=False
+) if settings.RERANK_ENABLED else None
@@ -0,0 +1,106 @@
+# services/reranker.py
+"""
+融合后的交叉编码器重排：对每个查询融合结果的前 N 条逐对打分（CPU 批量推理），
+输出经 Platt 校准的相关概率，供检索按真实相关度排序与阈值判定。
+
+每次调用有硬时间预算：打分在专用线程中按小批进行，超出预算时调用方立即拿到结果，
+未打完分的查询回退到融合顺序（后台线程在当前小批结束后停止，已算出的分数仍写入缓存）。
+(查询, 文档) 分数按内容缓存，高频政策问题重复出现时不再推理。
+"""
+import time
+import logging
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from config.settings import settings
+from utils.cache import LRUCache, normalize_query
+from utils.safety_guard import mask_pii
+from utils.metrics import RERANK_LATENCY, RERANK_FALLBACK
+
+logger = logging.getLogger(__name__)
+
+_EPS = 1e-6
+
+
+class CrossEncoderReranker:
+    def __init__(self, model=None, budget_ms: float = None, batch_size: int = None, cache_size: int = None,
+                 calibration: tuple = None):
+        """
+        Args:
+            model: 具有 predict(pairs, batch_size=...) -> 概率数组 的交叉编码器，默认按 settings.RERANK_MODEL 加载
+            calibration: Platt 参数 (a, b)，校准分数 = sigmoid(a * logit(p) + b)
+        """
+        if model is None:
+            from sentence_transformers import CrossEncoder
+
+            model = CrossEncoder(settings.RERANK_MODEL, max_length=settings.RERANK_MAX_LENGTH, device="cpu")
+        self.model = model
+        self.budget_s = (settings.RERANK_BUDGET_MS if budget_ms is None else budget_ms) / 1000
+        self.batch_size = batch_size or settings.RERANK_BATCH_SIZE
+        self.calibration = calibration or (settings.RERANK_CALIBRATION_A, settings.RERANK_CALIBRATION_B)
+        self.cache = LRUCache("rerank_score", maxsize=settings.RERANK_CACHE_SIZE if cache_size is None else cache_size)
+        # 推理串行执行：CPU 推理本身占满算力，并发只会互相拖慢
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+    def calibrate(self, probs) -> np.ndarray:
+        probs = np.clip(np.asarray(probs, dtype=np.float64), _EPS, 1 - _EPS)
+        a, b = self.calibration
+        return 1.0 / (1.0 + np.exp(-(a * np.log(probs / (1 - probs)) + b)))
+
+    def _score_pairs(self, pairs: list, keys: list, scores: dict, cancel: threading.Event):
+        for start in range(0, len(pairs), self.batch_size):
+            if cancel.is_set():
+                return
+            chunk = pairs[start:start + self.batch_size]
+            probs = self.model.predict(chunk, batch_size=len(chunk), show_progress_bar=False)
+            for key, score in zip(keys[start:start + self.batch_size], self.calibrate(probs).tolist()):
+                scores[key] = score
+                self.cache.put(key, score)
+
+    def score_many(self, queries: list, candidate_lists: list, budget_ms: float = None) -> list:
+        """
+        Args:
+            candidate_lists: 与 queries 对应的候选列表，元素含 text / doc_id
+        Returns:
+            list: 与 queries 对应；元素为与候选对齐的校准分数数组，预算内未完成或出错时为 None
+        """
+        start = time.perf_counter()
+        deadline = start + (self.budget_s if budget_ms is None else budget_ms / 1000)
+        scores = {}
+        keys_per_query, pairs, pending_keys, pending = [], [], [], set()
+        for query, candidates in zip(queries, candidate_lists):
+            query_key = normalize_query(mask_pii(query))
+            keys = [(query_key, c["doc_id"], hash(c["text"])) for c in candidates]
+            for key, candidate in zip(keys, candidates):
+                if key in scores or key in pending:
+                    continue
+                cached = self.cache.get(key)
+                if cached is not None:
+                    scores[key] = cached
+                else:
+                    pending.add(key)
+                    pairs.append((query, candidate["text"]))
+                    pending_keys.append(key)
+            keys_per_query.append(keys)
+
+        reason = "budget"
+        if pairs:
+            cancel = threading.Event()
+            future = self._pool.submit(self._score_pairs, pairs, pending_keys, scores, cancel)
+            try:
+                future.result(timeout=max(0.0, deadline - time.perf_counter()))
+            except FutureTimeoutError:
+                cancel.set()
+            except Exception as e:
+                reason = "error"
+                logger.error(f"Rerank failed: {e}", exc_info=True)
+
+        results = []
+        for keys in keys_per_query:
+            if all(key in scores for key in keys):
+                results.append(np.array([scores[key] for key in keys], dtype=np.float64))
+            else:
+                RERANK_FALLBACK.labels(reason=reason).inc()
+                results.append(None)
+        RERANK_LATENCY.observe(time.perf_counter() - start)
+        return results
@@ -0,0 +1,167 @@
+# services/semantic_cache.py
+"""
+LLM 意图结果的语义缓存：保存已由 LLM 分类过的问题向量及其意图 / 置信度，
+新问题与缓存向量余弦相似度超过阈值时直接复用结果，不再调用 LLM（覆盖同义改写）。
+
+- 容量有界，满了按最近最少命中淘汰
+- 定期及退出时原子写入 .npz，重启后加载（嵌入模型或维度变化时丢弃旧缓存）
+- 缓存按进程（worker）各自维护：多个 worker 共用同一文件时互不合并，文件内容为最后一次保存的 worker 的快照，
+  各 worker 启动时从它预热；每次保存写本进程独有的临时文件再原子替换，并发保存不会互相覆盖半成品
+- 命中 / 未命中 / 淘汰以 cache="llm_intent_semantic" 导出到 /metrics
+"""
+import os
+import atexit
+import logging
+import tempfile
+import threading
+import numpy as np
+from config.settings import settings
+from utils.metrics import CACHE_HITS, CACHE_MISSES, CACHE_EVICTIONS, CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticIntentCache:
+    name = "llm_intent_semantic"
+
+    def __init__(self, embed, maxsize: int = None, threshold: float = None, path: str = None,
+                 save_every: int = None, model_name: str = None):
+        """
+        Args:
+            embed: question -> 1 维向量
+            path: 持久化文件，None 表示不持久化
+        """
+        self.embed = embed
+        self.maxsize = maxsize or settings.SEMANTIC_CACHE_SIZE
+        self.threshold = settings.SEMANTIC_CACHE_THRESHOLD if threshold is None else threshold
+        self.path = path
+        self.save_every = save_every or settings.SEMANTIC_CACHE_SAVE_EVERY
+        self.model_name = model_name or settings.EMBEDDING_MODEL
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._intents = np.empty(self.maxsize, dtype=object)
+        self._confidences = np.zeros(self.maxsize, dtype=np.float32)
+        self._last_used = np.zeros(self.maxsize, dtype=np.int64)
+        self._size = 0
+        self._tick = 0
+        self._unsaved = 0
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self._load()
+
+    @staticmethod
+    def _normalize(vec) -> np.ndarray:
+        vec = np.asarray(vec, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    def lookup(self, question: str):
+        """命中返回 {"intent", "confidence", "similarity"}，否则 None"""
+        query = self._normalize(self.embed(question))
+        with self._lock:
+            if self._size:
+                sims = self._vectors[:self._size] @ query
+                best = int(sims.argmax())
+                if sims[best] >= self.threshold:
+                    self._tick += 1
+                    self._last_used[best] = self._tick
+                    self.hits += 1
+                    CACHE_HITS.labels(cache=self.name).inc()
+                    return {
+                        "intent": self._intents[best],
+                        "confidence": float(self._confidences[best]),
+                        "similarity": float(sims[best])
+                    }
+            self.misses += 1
+            CACHE_MISSES.labels(cache=self.name).inc()
+            return None
+
+    def put(self, question: str, intent: str, confidence: float):
+        vec = self._normalize(self.embed(question))
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.maxsize, vec.shape[0]), dtype=np.float32)
+            if self._size < self.maxsize:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(self._last_used.argmin())
+                CACHE_EVICTIONS.labels(cache=self.name, reason="capacity").inc()
+            self._tick += 1
+            self._vectors[slot] = vec
+            self._intents[slot] = intent
+            self._confidences[slot] = confidence
+            self._last_used[slot] = self._tick
+            CACHE_SIZE.labels(cache=self.name).set(self._size)
+            self._unsaved += 1
+            should_save = self.path and self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            if self._vectors is None:
+                return
+            n = self._size
+            arrays = {
+                "vectors": self._vectors[:n].copy(),
+                "intents": self._intents[:n].astype(str),
+                "confidences": self._confidences[:n].copy(),
+                "last_used": self._last_used[:n].copy(),
+                "model_name": np.array(self.model_name)
+            }
+            self._unsaved = 0
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f"{os.path.basename(self.path)}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _load(self):
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                if str(data["model_name"]) != self.model_name:
+                    logger.warning(f"Semantic cache {self.path} was built with another embedding model, ignored")
+                    return
+                vectors = data["vectors"]
+                # 保留最近使用的 maxsize 条
+                keep = np.argsort(data["last_used"])[-self.maxsize:]
+                n = len(keep)
+                self._vectors = np.zeros((self.maxsize, vectors.shape[1]), dtype=np.float32)
+                self._vectors[:n] = vectors[keep]
+                self._intents[:n] = data["intents"][keep].tolist()
+                self._confidences[:n] = data["confidences"][keep]
+                self._last_used[:n] = np.arange(1, n + 1)
+                self._size, self._tick = n, n
+        except Exception as e:
+            logger.error(f"Failed to load semantic cache {self.path}: {e}")
+            return
+        CACHE_SIZE.labels(cache=self.name).set(self._size)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": self._size,
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def __len__(self):
+        return self._size
+
+
+def create_semantic_cache(embed) -> SemanticIntentCache:
+    cache = SemanticIntentCache(embed, path=settings.SEMANTIC_CACHE_PATH)
+    atexit.register(cache.save)
+    return cache
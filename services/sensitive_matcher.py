@@ -0,0 +1,168 @@
+# services/sensitive_matcher.py
+"""
+敏感词多模式匹配：Aho-Corasick 自动机，单次线性扫描返回全部命中词及位置，
+耗时与文本长度相关、与词表规模基本无关（逐词 `kw in text` 为 O(词数 × 文本长度)）。
+
+词表来自 settings.SENSITIVE_KEYWORDS_PATH，文件 mtime 变化后自动重建自动机并原子替换，
+重建失败时继续使用旧自动机。
+
+所有检查点共用一个自动机，但每个词标注了生效范围（SCOPES），各检查点只认自己范围内的命中：
+    question      core.safety.is_safe 的内容审查
+    orchestrator  编排入口对用户问题的拦截
+    policy_text   政策检索结果（召回片段）的审查
+"""
+import os
+import time
+import logging
+import threading
+from collections import deque
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AhoCorasick:
+    def __init__(self, patterns):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        for pattern in dict.fromkeys(p for p in patterns if p):
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                node = nxt
+            self._out[node] = (pattern,)
+        self._build_fail_links()
+
+    def _build_fail_links(self):
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[child] = goto[f].get(ch, 0) if goto[f].get(ch) != child else 0
+                # 合并后缀节点的输出，扫描时无需再沿 fail 链回溯
+                out[child] = out[child] + out[fail[child]]
+                queue.append(child)
+
+    def __len__(self):
+        return sum(1 for o in self._out if o)
+
+    def finditer(self, text: str):
+        """逐个产出 (词, start, end)，end 为开区间"""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pattern in out[node]:
+                yield pattern, i - len(pattern) + 1, i + 1
+
+    def search(self, text: str) -> bool:
+        return next(self.finditer(text), None) is not None
+
+
+SCOPES = ("question", "orchestrator", "policy_text")
+
+
+def load_keywords(path: str) -> dict:
+    """
+    每行 `词 范围1,范围2`，未标注范围的词对所有检查点生效。
+    Returns:
+        dict: 词 → frozenset(范围)
+    """
+    keywords = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            term, *tags = line.split(None, 1)
+            tags = tags[0] if tags else ""
+            scopes = frozenset(t.strip() for t in tags.split(",") if t.strip()) or frozenset(SCOPES)
+            unknown = scopes - set(SCOPES)
+            if unknown:
+                raise ValueError(f"Unknown sensitive keyword scope {sorted(unknown)} for '{term}'")
+            keywords[term] = keywords.get(term, frozenset()) | scopes
+    return keywords
+
+
+class ScopedKeywords:
+    """自动机 + 词的生效范围，整体替换保证两者一致"""
+
+    def __init__(self, keywords: dict):
+        self.scopes = keywords
+        self.automaton = AhoCorasick(keywords)
+
+    def finditer(self, text: str, scope: str = None):
+        for match in self.automaton.finditer(text):
+            if scope is None or scope in self.scopes[match[0]]:
+                yield match
+
+
+class SensitiveKeywordMatcher:
+    def __init__(self, path: str = None, reload_interval_s: float = None):
+        self.path = path or settings.SENSITIVE_KEYWORDS_PATH
+        self.reload_interval = (
+            settings.SENSITIVE_KEYWORDS_RELOAD_S if reload_interval_s is None else reload_interval_s
+        )
+        self._lock = threading.Lock()
+        self._mtime = os.stat(self.path).st_mtime_ns
+        self._keywords = ScopedKeywords(load_keywords(self.path))
+        self._checked_at = time.monotonic()
+
+    def _current(self) -> ScopedKeywords:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_interval:
+            return self._keywords
+        with self._lock:
+            if now - self._checked_at >= self.reload_interval:
+                self._checked_at = now
+                self._maybe_reload()
+        return self._keywords
+
+    def _maybe_reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+            if mtime == self._mtime:
+                return
+            keywords = ScopedKeywords(load_keywords(self.path))
+        except Exception as e:
+            logger.error(f"Sensitive keyword reload failed, keeping previous list: {e}")
+            return
+        self._keywords, self._mtime = keywords, mtime
+        logger.info(f"Reloaded {len(keywords.scopes)} sensitive keywords from {self.path}")
+
+    def find(self, text: str, scope: str = None) -> list:
+        """
+        Args:
+            scope: 只返回该范围内的词，None 为全部
+        Returns: list[(词, start, end)]，按出现位置排序
+        """
+        return list(self._current().finditer(text, scope))
+
+    def contains(self, text: str, scope: str = None) -> bool:
+        return next(self._current().finditer(text, scope), None) is not None
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def sensitive_matcher() -> SensitiveKeywordMatcher:
+    global _matcher
+    if _matcher is None:
+        with _matcher_lock:
+            if _matcher is None:
+                _matcher = SensitiveKeywordMatcher()
+    return _matcher
@@ -0,0 +1,55 @@
+# services/text_analyzer.py
+"""
+关键词索引分词器。政策文档以中文为主、无空格分隔，sklearn 默认词正则会把整句当作一个 token。
+
+- char_ngram: 中文按字 1~2 gram 切分，英文 / 数字 / 版本号保留整词（默认，无额外依赖）
+- jieba:      jieba 搜索引擎模式分词（需 pip install jieba）
+"""
+import re
+import unicodedata
+
+_TOKEN = re.compile(r"[\u4e00-\u9fff]+|[a-z0-9]+(?:\.[0-9]+)*")
+_CJK = re.compile(r"[\u4e00-\u9fff]")
+# 单字虚词，只在 unigram 中剔除，bigram 仍保留（如"的话"）
+_STOP_CHARS = set("的了吗呢吧啊么是在我你他她它们这那有和与及或就都也还要会能可")
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).lower()
+
+
+def char_ngram_analyzer(text: str, ngram_range: tuple = (1, 2)) -> list:
+    min_n, max_n = ngram_range
+    tokens = []
+    for run in _TOKEN.findall(_normalize(text)):
+        if not _CJK.match(run):
+            tokens.append(run)
+            continue
+        for n in range(min_n, max_n + 1):
+            for i in range(len(run) - n + 1):
+                gram = run[i:i + n]
+                if n == 1 and gram in _STOP_CHARS:
+                    continue
+                tokens.append(gram)
+    return tokens
+
+
+def jieba_analyzer(text: str) -> list:
+    import jieba
+
+    return [
+        w for w in jieba.lcut_for_search(_normalize(text))
+        if w.strip() and not (len(w) == 1 and (w in _STOP_CHARS or not w.isalnum()))
+    ]
+
+
+ANALYZERS = {
+    "char_ngram": char_ngram_analyzer,
+    "jieba": jieba_analyzer,
+}
+
+
+def get_analyzer(name: str):
+    if name not in ANALYZERS:
+        raise ValueError(f"Unknown KEYWORD_ANALYZER: {name}, expected one of {sorted(ANALYZERS)}")
+    return ANALYZERS[name]
@@ -0,0 +1,200 @@
+# services/vector_store.py
+"""
+向量检索后端：RAGPolicyRetriever 通过统一接口调用，按 settings.VECTOR_STORE_BACKEND 选择。
+
+- local:  进程内 FAISS 索引（scripts/build_policy_index.py 产出），无网络往返
+- milvus: 远程 Milvus 集合（scripts/build_policy_index_milvus.py 产出）
+
+两种实现共用 services/metadata_filter 的条件语义（含版本号数值比较），过滤均在 ANN top-k 之前完成。
+
+Milvus 连接（gRPC channel）不能跨 fork 使用：连接放在独立的非 fork 安全组件 milvus_store 中，
+检索器只持有按进程解析的句柄（ProcessLocalVectorStore）。pre-fork 父进程加载检索器时不建连接，
+每个 worker 用自己的连接别名重新连接，不复用父进程继承来的 channel。
+"""
+import os
+import logging
+from abc import ABC, abstractmethod
+import numpy as np
+from config.settings import settings
+from services.lazy import LazyComponent
+from services.metadata_filter import metadata_conditions, milvus_expr
+
+logger = logging.getLogger(__name__)
+
+
+class VectorStore(ABC):
+    @abstractmethod
+    def search(self, query_emb, top_k: int, metadata_filter: dict = None, threshold: float = 0.0) -> list:
+        """
+        Returns:
+            list[dict]: 按相似度降序，每项含 text / score / deep_link / doc_id，score < threshold 的已剔除
+        """
+
+    def search_many(self, query_embs, top_k: int, metadata_filters: list = None, threshold: float = 0.0) -> list:
+        """
+        批量检索，metadata_filters 与 query_embs 一一对应（None 表示都不过滤）。
+        Returns:
+            list[list[dict]]: 与输入顺序一致
+        """
+        filters = metadata_filters or [None] * len(query_embs)
+        return [self.search(q, top_k, f, threshold) for q, f in zip(query_embs, filters)]
+
+
+def _group_by_filter(metadata_filters: list) -> dict:
+    """过滤条件相同的查询归为一组，每组只需一次多向量检索"""
+    groups = {}
+    for i, f in enumerate(metadata_filters):
+        groups.setdefault(tuple(sorted((f or {}).items())), []).append(i)
+    return groups
+
+
+class LocalVectorStore(VectorStore):
+    """
+    进程内 FAISS（内积 = 余弦，建索引时已 L2 归一化），过滤在 top-k 之前完成。
+    docs 为 PolicyDocStore，向量下标即文档 id。
+    """
+
+    def __init__(self, docs, index_path: str = None):
+        import faiss
+
+        self._faiss = faiss
+        self.index = faiss.read_index(index_path or settings.POLICY_INDEX_PATH)
+        if self.index.ntotal != len(docs):
+            raise RuntimeError(
+                f"FAISS index has {self.index.ntotal} vectors but {len(docs)} policy docs were loaded. "
+                "Please re-run scripts/build_policy_index.py."
+            )
+        self.docs = docs
+
+    def search(self, query_emb, top_k: int, metadata_filter: dict = None, threshold: float = 0.0) -> list:
+        return self.search_many([query_emb], top_k, [metadata_filter], threshold)[0]
+
+    def search_many(self, query_embs, top_k: int, metadata_filters: list = None, threshold: float = 0.0) -> list:
+        # 复制一份再归一化，避免改写调用方（如查询缓存）持有的向量
+        queries = np.array(query_embs, dtype="float32").reshape(len(query_embs), -1)
+        self._faiss.normalize_L2(queries)
+
+        filters = metadata_filters or [None] * len(queries)
+        results = [[] for _ in range(len(queries))]
+        for rows in _group_by_filter(filters).values():
+            mask = self.docs.eligible_mask(filters[rows[0]])
+            params = None
+            if mask is not None:
+                eligible = np.flatnonzero(mask).astype(np.int64)
+                if len(eligible) == 0:
+                    continue
+                params = self._faiss.SearchParameters(sel=self._faiss.IDSelectorBatch(eligible))
+
+            scores, ids = self.index.search(queries[rows], min(top_k, self.index.ntotal), params=params)
+            for row, score_row, id_row in zip(rows, scores, ids):
+                results[row] = self._candidates(score_row, id_row, threshold)
+        return results
+
+    def _candidates(self, scores, ids, threshold: float) -> list:
+        candidates = []
+        for score, idx in zip(scores, ids):
+            if idx < 0 or score < threshold:
+                continue
+            candidates.append({
+                "text": self.docs.string("content", idx),
+                "score": float(score),
+                "deep_link": self.docs.string("deep_link", idx),
+                "doc_id": self.docs.string("id", idx)
+            })
+        return candidates
+
+
+class MilvusVectorStore(VectorStore):
+    def __init__(self):
+        from pymilvus import connections
+
+        # 初始化 Milvus 连接；别名按进程区分，fork 出的 worker 不会拿到父进程已注册的连接
+        self.using = f"policy-rag-{os.getpid()}"
+        connections.connect(
+            alias=self.using,
+            host=settings.MILVUS_HOST or "localhost",
+            port=settings.MILVUS_PORT or "19530"
+        )
+        self.collection_name = settings.MILVUS_COLLECTION_NAME or "policy_rag"
+
+        # 确保 Milvus 集合存在
+        self._ensure_collection_exists()
+
+    def _ensure_collection_exists(self):
+        """确保 Milvus 集合已创建（仅用于检查，不负责插入数据）"""
+        from pymilvus import Collection, utility
+
+        if not utility.has_collection(self.collection_name, using=self.using):
+            raise RuntimeError(
+                f"Milvus collection '{self.collection_name}' not found. "
+                "Please run a script to build and insert policy embeddings into Milvus."
+            )
+        self.collection = Collection(self.collection_name, using=self.using)
+        self.collection.load()  # 加载到内存以加速查询
+
+    def search(self, query_emb, top_k: int, metadata_filter: dict = None, threshold: float = 0.0) -> list:
+        return self.search_many([query_emb], top_k, [metadata_filter], threshold)[0]
+
+    def search_many(self, query_embs, top_k: int, metadata_filters: list = None, threshold: float = 0.0) -> list:
+        search_params = {"metric_type": "COSINE", "params": {"nprobe": 10}}
+        filters = metadata_filters or [None] * len(query_embs)
+        results = [[] for _ in range(len(query_embs))]
+        # 同一过滤表达式的查询合并为一次多向量请求，省去逐条网络往返
+        for rows in _group_by_filter(filters).values():
+            # 构建 Milvus 查询表达式（等值 + 版本范围过滤下推！）
+            expr = milvus_expr(metadata_conditions(filters[rows[0]]))
+            hits_per_query = self.collection.search(
+                data=[np.asarray(query_embs[i]).tolist() for i in rows],
+                anns_field="embedding",
+                param=search_params,
+                limit=top_k,
+                expr=expr,  # ⬅️ 关键：过滤下推到 Milvus
+                output_fields=["doc_id", "content", "deep_link"]
+            )
+            for row, hits in zip(rows, hits_per_query):
+                results[row] = self._candidates(hits, threshold)
+        return results
+
+    @staticmethod
+    def _candidates(hits, threshold: float) -> list:
+        candidates = []
+        for hit in hits:
+            score = hit.distance
+            if score < threshold:
+                continue
+            entity = hit.entity
+            candidates.append({
+                "text": entity.get("content", ""),
+                "score": float(score),
+                "deep_link": entity.get("deep_link", ""),
+                "doc_id": entity.get("doc_id", "")
+            })
+        return candidates
+
+
+class ProcessLocalVectorStore(VectorStore):
+    """按进程解析的向量库句柄：首次检索时才从组件取实例，fork 后子进程重建（组件 fork_safe=False）"""
+
+    def __init__(self, component: LazyComponent):
+        self.component = component
+
+    def search(self, query_emb, top_k: int, metadata_filter: dict = None, threshold: float = 0.0) -> list:
+        return self.component.get().search(query_emb, top_k, metadata_filter, threshold)
+
+    def search_many(self, query_embs, top_k: int, metadata_filters: list = None, threshold: float = 0.0) -> list:
+        return self.component.get().search_many(query_embs, top_k, metadata_filters, threshold)
+
+
+# 未启用 Milvus 时不登记，不影响 /readyz
+milvus_store = LazyComponent(
+    "milvus_vector_store", MilvusVectorStore, fork_safe=False
+) if settings.VECTOR_STORE_BACKEND == "milvus" else None
+
+
+def create_vector_store(docs, index_path: str = None) -> VectorStore:
+    backend = settings.VECTOR_STORE_BACKEND
+    if backend == "local":
+        return LocalVectorStore(docs, index_path)
+    if backend == "milvus":
+        return ProcessLocalVectorStore(milvus_store)
+    raise ValueError(f"Unknown VECTOR_STORE_BACKEND: {backend}")
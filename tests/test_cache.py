@@ -0,0 +1,43 @@
+# tests/test_cache.py
+import time
+from utils.cache import LRUCache, normalize_query
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache("test_lru", maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # a 变为最近使用
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 3, "misses": 1, "evictions": 1}
+
+
+def test_ttl_expiry_counts_as_miss():
+    cache = LRUCache("test_ttl", maxsize=4, ttl_seconds=0.05)
+    cache.put("k", "v")
+    assert cache.get("k") == "v"
+    time.sleep(0.06)
+    assert cache.get("k") is None
+    assert len(cache) == 0
+    assert cache.stats()["evictions"] == 1
+
+
+def test_normalize_query():
+    assert normalize_query("  生鲜破损  怎么赔？ ") == "生鲜破损 怎么赔?"
+    assert normalize_query("ＡＰＰ 版本") == "app 版本"
+
+
+def test_index_version_stamp_changes_on_rebuild(tmp_path):
+    """索引重建写入新版本戳，读取端据 mtime 感知变化"""
+    from services.index_version import write_index_version, current_index_version
+
+    path = str(tmp_path / "policy_index.version")
+    assert current_index_version(path) == "unversioned"
+    v1 = write_index_version(["生鲜破损请上报"], path=path)
+    assert current_index_version(path) == v1
+    time.sleep(0.01)
+    v2 = write_index_version(["生鲜破损请在 24 小时内上报"], path=path)
+    assert v2 != v1
+    assert current_index_version(path) == v2
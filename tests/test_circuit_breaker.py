@@ -0,0 +1,121 @@
+# tests/test_circuit_breaker.py
+import time
+import pytest
+from config.settings import settings
+from services import circuit_breaker
+from services.circuit_breaker import CircuitBreaker, AdaptiveTimeout, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+from services.downstream_client import DownstreamClient
+from tools.stub_downstream import StubDownstream
+
+
+@pytest.fixture
+def stub():
+    with StubDownstream(latency_ms=1) as server:
+        yield server
+
+
+@pytest.fixture
+def fast_breakers(monkeypatch):
+    """缩短窗口与冷却时间，并清掉测试用 endpoint 已有的熔断器"""
+    monkeypatch.setattr(settings, "CIRCUIT_MIN_CALLS", 5)
+    monkeypatch.setattr(settings, "CIRCUIT_OPEN_S", 0.2)
+    for name in ("cb_sync", "cb_drift", "order_status"):
+        monkeypatch.delitem(circuit_breaker._guards, name, raising=False)
+
+
+def test_breaker_state_machine():
+    breaker = CircuitBreaker("cb_unit", window=10, min_calls=4, failure_rate=0.5, open_seconds=0.05)
+    for ok in (True, False, True, False):
+        breaker.acquire()
+        breaker.record(ok)
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()
+
+    time.sleep(0.06)
+    assert breaker.state == HALF_OPEN
+    breaker.acquire()
+    with pytest.raises(CircuitOpenError):
+        breaker.acquire()  # 半开只放行一个探测
+    breaker.record(False)
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    breaker.acquire()
+    breaker.record(True)
+    assert breaker.state == CLOSED
+
+
+def test_adaptive_timeout_tracks_p99():
+    timeout = AdaptiveTimeout("cb_timeout", min_timeout=0.05, max_timeout=2.0, multiplier=2.0, min_samples=10)
+    assert timeout.current() == 2.0
+    for _ in range(100):
+        timeout.observe(0.1)
+    assert timeout.current() == pytest.approx(0.2)
+    for _ in range(200):
+        timeout.observe(0.001)
+    assert timeout.current() == 0.05
+    for _ in range(200):
+        timeout.observe(5.0)
+    assert timeout.current() == 2.0
+
+
+def test_injected_faults_open_circuit_and_recover(stub, fast_breakers):
+    client = DownstreamClient(pool_size=2)
+    url = f"{stub.url}/v1/status"
+    stub.config["error_rate"] = 1.0
+    for _ in range(5):
+        assert client.request("cb_sync", "POST", url, json={}).status_code == 503
+
+    # 熔断打开后请求不再到达下游（调用方显式指定 timeout 也一样）
+    with pytest.raises(CircuitOpenError):
+        client.request("cb_sync", "POST", url, json={})
+    with pytest.raises(CircuitOpenError):
+        client.request("cb_sync", "POST", url, timeout=1.0, json={})
+    assert stub.requests == 5
+
+    stub.config["error_rate"] = 0.0
+    time.sleep(0.25)
+    assert client.request("cb_sync", "POST", url, json={}).status_code == 200
+    assert circuit_breaker.get_guard("cb_sync").breaker.state == CLOSED
+    client.close()
+
+
+def test_latency_drift_below_sla_recovers(stub, fast_breakers, monkeypatch):
+    """延迟升到学到的超时之上（仍在 SLA 内）时，超时应随之放宽，熔断最终关闭"""
+    monkeypatch.setattr(settings, "ADAPTIVE_TIMEOUT_MIN_S", 0.05)
+    client = DownstreamClient(pool_size=2)
+    url = f"{stub.url}/v1/status"
+    guard = circuit_breaker.get_guard("cb_drift")
+    for _ in range(30):
+        client.request("cb_drift", "POST", url, json={})
+    assert guard.timeout.current() == pytest.approx(0.05)
+
+    stub.config["latency_ms"] = 80
+    outcomes = []
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and outcomes[-5:] != ["ok"] * 5:
+        try:
+            client.request("cb_drift", "POST", url, json={})
+            outcomes.append("ok")
+        except CircuitOpenError:
+            outcomes.append("open")
+            time.sleep(0.05)
+        except Exception:
+            outcomes.append("timeout")
+    assert outcomes[-5:] == ["ok"] * 5
+    assert "timeout" in outcomes
+    assert guard.breaker.state == CLOSED
+    assert guard.timeout.current() > 0.08
+    client.close()
+
+
+def test_api_handler_fast_fails_to_retry_later(stub, fast_breakers, monkeypatch):
+    from agents import api_handler
+    monkeypatch.setattr(settings, "ORDER_SERVICE_URL", stub.url)
+    stub.config["error_rate"] = 1.0
+    for _ in range(5):
+        assert api_handler.handle("order_status", {"user_id": "u1"})["action"] == "retry_later"
+    # 熔断打开后直接失败：桩服务收不到第 6 个请求
+    assert api_handler.handle("order_status", {"user_id": "u1"})["action"] == "retry_later"
+    assert stub.requests == 5
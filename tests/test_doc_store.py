@@ -0,0 +1,46 @@
+# tests/test_doc_store.py
+import os
+import threading
+from services.doc_store import PolicyDocStore, build_doc_store
+
+
+def _docs(tag: str) -> list:
+    return [{"id": f"p{i}", "content": f"{tag} 政策 {i}", "region": "north"} for i in range(3)]
+
+
+def test_republish_never_leaves_store_missing(tmp_path):
+    path = str(tmp_path / "doc_store")
+    build_doc_store(_docs("v0"), path)
+    missing, stop = [], threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            if not os.path.exists(os.path.join(path, "meta.json")):
+                missing.append(1)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    for i in range(20):
+        build_doc_store(_docs(f"v{i + 1}"), path)
+    stop.set()
+    thread.join()
+
+    assert not missing
+    assert PolicyDocStore(path).string("content", 0) == "v20 政策 0"
+    # 当前版本 + 上一版本
+    assert len([n for n in os.listdir(tmp_path) if n.startswith("doc_store.v")]) == 2
+
+
+def test_open_reader_keeps_its_version_and_legacy_dir_migrates(tmp_path):
+    path = str(tmp_path / "doc_store")
+    build_doc_store(_docs("old"), path)
+    # 模拟旧布局：path 本身是目录
+    legacy = os.path.realpath(path)
+    os.remove(path)
+    os.rename(legacy, path)
+
+    reader = PolicyDocStore(path)
+    build_doc_store(_docs("new"), path)
+    assert os.path.islink(path)
+    assert reader.string("content", 1) == "old 政策 1"
+    assert PolicyDocStore(path).string("content", 1) == "new 政策 1"
@@ -0,0 +1,55 @@
+# tests/test_downstream_client.py
+import asyncio
+import pytest
+import requests
+from tools.stub_downstream import StubDownstream
+from services.downstream_client import DownstreamClient
+from prometheus_client import REGISTRY
+
+
+@pytest.fixture
+def stub():
+    with StubDownstream(latency_ms=1) as server:
+        yield server
+
+
+def _sample_count(endpoint: str, status: str) -> float:
+    return REGISTRY.get_sample_value(
+        "downstream_request_seconds_count", {"endpoint": endpoint, "status": status}
+    )
+
+
+def test_sync_requests_reuse_one_connection(stub):
+    """同一 host 的顺序请求复用同一条 keep-alive 连接"""
+    client = DownstreamClient(pool_size=4)
+    for _ in range(10):
+        resp = client.request("test_sync", "POST", f"{stub.url}/v1/status", json={"user_id": "u1"})
+        assert resp.status_code == 200
+    client.close()
+    assert stub.requests == 10
+    assert len(stub.client_addresses) == 1
+    assert _sample_count("test_sync", "200") == 10
+
+
+def test_bare_requests_open_new_connections(stub):
+    """对照组：裸 requests.post 每次新建连接"""
+    for _ in range(5):
+        requests.post(f"{stub.url}/v1/status", json={"user_id": "u1"}, timeout=2)
+    assert len(stub.client_addresses) == 5
+
+
+def test_async_requests_bounded_by_pool(stub):
+    """并发异步请求的连接数不超过每 host 连接池上限，且连接被复用"""
+    client = DownstreamClient(pool_size=3)
+
+    async def main():
+        responses = await asyncio.gather(*[
+            client.arequest("test_async", "GET", f"{stub.url}/v1/balance", params={"user_id": "u1"})
+            for _ in range(30)
+        ])
+        await client.aclose()
+        return responses
+
+    responses = asyncio.run(main())
+    assert all(r.status_code == 200 for r in responses)
+    assert len(stub.client_addresses) <= 3
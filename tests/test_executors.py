@@ -0,0 +1,41 @@
+# tests/test_executors.py
+import asyncio
+import threading
+import pytest
+from services.executors import AdmissionGate, BoundedExecutor, Overloaded
+
+
+def test_bounded_executor_rejects_when_saturated():
+    """工作线程 + 排队名额占满后立即拒绝，而不是无限排队"""
+    executor = BoundedExecutor("test", max_workers=1, max_pending=1)
+    release = threading.Event()
+    running = executor.submit(release.wait)
+    queued = executor.submit(lambda: "queued")
+    with pytest.raises(Overloaded):
+        executor.submit(lambda: "rejected")
+
+    release.set()
+    running.result(timeout=2)
+    assert queued.result(timeout=2) == "queued"
+    # 名额释放后可以继续提交
+    assert executor.submit(lambda: "ok").result(timeout=2) == "ok"
+    executor.shutdown()
+
+
+def test_bounded_executor_run_from_event_loop():
+    executor = BoundedExecutor("test_async", max_workers=2, max_pending=0)
+
+    async def main():
+        return await asyncio.gather(executor.run(sum, [1, 2]), executor.run(max, [3, 4]))
+
+    assert asyncio.run(main()) == [3, 4]
+    executor.shutdown()
+
+
+def test_admission_gate_limits_inflight():
+    gate = AdmissionGate(limit=1)
+    with gate:
+        with pytest.raises(Overloaded):
+            with gate:
+                pass
+    assert gate.inflight == 0
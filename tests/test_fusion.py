@@ -0,0 +1,49 @@
+# tests/test_fusion.py
+import numpy as np
+import pytest
+from services.fusion import fuse_many
+
+
+def _reference_rrf(ranked_lists, top_k, weights, k=60):
+    scores = {}
+    for ranked, weight in zip(ranked_lists, weights):
+        for rank, doc in enumerate(ranked, start=1):
+            scores[doc] = scores.get(doc, 0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:top_k]
+
+
+@pytest.mark.parametrize("weights", [(1.0, 1.0), (0.7, 1.3)])
+def test_matches_dict_rrf(weights):
+    rng = np.random.default_rng(0)
+    vector = [rng.permutation(50)[:rng.integers(0, 12)] for _ in range(20)]
+    keyword = [rng.permutation(50)[:rng.integers(0, 12)] for _ in range(20)]
+    fused = fuse_many([vector, keyword], top_k=5, weights=weights)
+    for (ids, scores), v, kw in zip(fused, vector, keyword):
+        expected = _reference_rrf([v.tolist(), kw.tolist()], 5, weights)
+        assert ids.tolist() == [doc for doc, _ in expected]
+        assert np.allclose(scores, [s for _, s in expected])
+
+
+def test_ties_prefer_first_source_and_duplicates_keep_best_rank():
+    fused = fuse_many([[np.array([7, 7])], [np.array([3])]], top_k=1)
+    assert fused[0][0].tolist() == [7]
+    assert np.isclose(fused[0][1][0], 1 / 61)
+
+
+def test_combsum_normalizes_each_source_per_query():
+    ranked = [[np.array([1, 2, 3])], [np.array([3, 4])]]
+    scores = [[np.array([0.9, 0.8, 0.7])], [np.array([12.0, 2.0])]]
+    ids, fused = fuse_many(ranked, top_k=4, method="combsum", scores=scores)[0]
+    # doc 3：向量路归一化为 0、关键词路为 1
+    assert ids.tolist() == [1, 3, 2, 4]
+    assert np.allclose(fused, [1.0, 1.0, 0.5, 0.0])
+    with pytest.raises(ValueError):
+        fuse_many(ranked, top_k=1, method="combsum")
+
+
+def test_empty_rows_and_sources():
+    empty = np.empty(0, dtype=np.int64)
+    fused = fuse_many([[empty, np.array([3, 1])], [empty, empty]], top_k=3)
+    assert len(fused[0][0]) == 0
+    assert fused[1][0].tolist() == [3, 1]
+    assert all(len(ids) == 0 for ids, _ in fuse_many([[empty], [empty]], top_k=3))
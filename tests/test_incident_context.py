@@ -0,0 +1,52 @@
+# tests/test_incident_context.py
+import time
+from services.incident_context import gather_context
+from tools.mock_gps import MockGPSSource
+from tools.mock_tms import MockTMSSource
+from tools.mock_wms import MockWMSSource
+
+
+def test_sources_fetched_concurrently():
+    """总耗时接近最慢的源，而不是各源之和（100 + 150 + 200 ms）"""
+    sources = [
+        MockTMSSource(latency_ms=100, jitter_ms=0),
+        MockGPSSource(latency_ms=150, jitter_ms=0),
+        MockWMSSource(latency_ms=200, jitter_ms=0),
+    ]
+    start = time.perf_counter()
+    context, status = gather_context(sources, "ORD123", deadline_s=1.0)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 0.35
+    assert {s["status"] for s in status.values()} == {"ok"}
+    assert context["order"]["status"] == "DELIVERED"
+    assert context["gps"]["track"][-1]["location"] == "望京西园三区"
+    assert context["wms"]["warehouse"] == "朝阳仓"
+
+
+def test_partial_results_on_deadline_and_error():
+    sources = [
+        MockTMSSource(latency_ms=10, jitter_ms=0),
+        MockGPSSource(latency_ms=1000, jitter_ms=0),
+        MockWMSSource(latency_ms=10, jitter_ms=0, error_rate=1.0),
+    ]
+    start = time.perf_counter()
+    context, status = gather_context(sources, "ORD123", deadline_s=0.1)
+
+    assert time.perf_counter() - start < 0.3
+    assert list(context) == ["order"]
+    assert status["order"]["status"] == "ok"
+    assert status["gps"]["status"] == "timeout"
+    assert status["wms"]["status"] == "error"
+
+
+def test_sources_must_implement_fetch():
+    import pytest
+    from services.incident_context import ContextSource
+
+    class Incomplete(ContextSource):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    assert MockTMSSource().latency_ms == 50 and MockGPSSource(latency_ms=5).latency_ms == 5
@@ -0,0 +1,39 @@
+# tests/test_incident_handler.py
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from langchain_core.messages import HumanMessage
+from agents import incident_handler
+
+
+@pytest.fixture
+def logged(monkeypatch):
+    snapshots = []
+    monkeypatch.setattr(incident_handler, "log_incident", snapshots.append)
+    return snapshots
+
+
+def _state(*texts, context=None) -> dict:
+    return {
+        "messages": [HumanMessage(content=t) for t in texts],
+        "user_id": "u1",
+        "intent": "compensation_claim",
+        "context": context if context is not None else {},
+    }
+
+
+def test_snapshot_carries_order_data_from_messages(logged):
+    result = incident_handler.run_incident_handler(_state("你好", "订单ORD123显示签收了但我没收到货"))
+
+    assert result["ticket_created"]
+    context = logged[0]["context"]
+    assert logged[0]["sources"]["order"]["status"] == "ok"
+    assert context["order"] == {"id": "ORD123", "status": "DELIVERED", "signed_at": "2025-12-30T06:30:00"}
+    assert context["gps"]["track"][-1]["location"] == "望京西园三区"
+    assert context["wms"]["warehouse"] == "朝阳仓"
+
+
+def test_context_order_id_takes_precedence(logged):
+    incident_handler.run_incident_handler(_state("ORD123 没收到", context={"order_id": "ORD456"}))
+    assert logged[0]["context"]["order"]["status"] == "IN_TRANSIT"
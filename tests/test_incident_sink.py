@@ -0,0 +1,174 @@
+# tests/test_incident_sink.py
+import json
+import time
+from pathlib import Path
+from services.incident_sink import IncidentSink, JsonlSegmentTransport, KafkaTransport
+from tools.stub_kafka import StubKafkaProducer
+
+
+def _record(i: int) -> dict:
+    return {"incident_id": f"INC-TEST-{i:04d}", "snapshot": {"user_id": f"u{i}", "note": "没收到货"}}
+
+
+def _read_segments(directory) -> list:
+    lines = []
+    for path in sorted(Path(directory).glob("incidents-*.jsonl")):
+        lines.extend(json.loads(l) for l in path.read_text(encoding="utf-8").splitlines())
+    return lines
+
+
+class CountingTransport(JsonlSegmentTransport):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.batches = []
+
+    def send_batch(self, records):
+        self.batches.append(len(records))
+        super().send_batch(records)
+
+
+def test_close_drains_all_records_in_batches(tmp_path):
+    transport = CountingTransport(str(tmp_path))
+    sink = IncidentSink(transport, batch_size=50, flush_interval_ms=1000)
+    for i in range(230):
+        sink.submit(_record(i))
+    sink.close()
+
+    records = _read_segments(tmp_path)
+    assert [r["incident_id"] for r in records] == [f"INC-TEST-{i:04d}" for i in range(230)]
+    assert max(transport.batches) <= 50
+    assert len(transport.batches) < 230
+
+
+def test_time_based_flush(tmp_path):
+    sink = IncidentSink(JsonlSegmentTransport(str(tmp_path)), batch_size=100, flush_interval_ms=20)
+    sink.submit(_record(1))
+    time.sleep(0.2)
+    assert len(_read_segments(tmp_path)) == 1
+    sink.close()
+
+
+def test_segments_roll_over(tmp_path):
+    sink = IncidentSink(JsonlSegmentTransport(str(tmp_path), segment_max_bytes=200), batch_size=1)
+    for i in range(5):
+        sink.submit(_record(i))
+    sink.close()
+    assert len(list(tmp_path.glob("incidents-*.jsonl"))) > 1
+    assert len(_read_segments(tmp_path)) == 5
+
+
+def test_full_queue_falls_back_to_sync_write(tmp_path):
+    transport = CountingTransport(str(tmp_path))
+    sink = IncidentSink(transport, batch_size=10, flush_interval_ms=1000, max_queue_size=1)
+    for i in range(20):
+        sink.submit(_record(i))
+    sink.close()
+    assert len(_read_segments(tmp_path)) == 20
+
+
+def test_kafka_transport_with_stub_producer():
+    producer = StubKafkaProducer()
+    sink = IncidentSink(KafkaTransport(producer, topic="incidents"), batch_size=10, flush_interval_ms=5)
+    for i in range(25):
+        sink.submit(_record(i))
+    sink.close()
+
+    messages = producer.messages["incidents"]
+    assert len(messages) == 25
+    assert messages[0][0] == b"INC-TEST-0000"
+    assert json.loads(messages[0][1])["snapshot"]["note"] == "没收到货"
+    assert producer.closed
+
+
+class FlakyTransport(JsonlSegmentTransport):
+    """前 failures 次写入失败"""
+
+    def __init__(self, directory, failures: int):
+        super().__init__(directory)
+        self.failures = failures
+
+    def send_batch(self, records):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("broker unavailable")
+        super().send_batch(records)
+
+
+def test_transient_failure_is_retried(tmp_path):
+    sink = IncidentSink(FlakyTransport(str(tmp_path), failures=2), batch_size=10, retries=3, retry_backoff_ms=1,
+                        spill_dir=str(tmp_path / "spill"))
+    for i in range(5):
+        sink.submit(_record(i))
+    sink.close()
+    assert len(_read_segments(tmp_path)) == 5
+    assert not (tmp_path / "spill").exists()
+
+
+def test_persistent_failure_spills_to_local_segments(tmp_path):
+    sink = IncidentSink(FlakyTransport(str(tmp_path / "out"), failures=10**6), batch_size=10, retries=1,
+                        retry_backoff_ms=1, spill_dir=str(tmp_path / "spill"))
+    for i in range(5):
+        sink.submit(_record(i))
+    sink.close()
+    assert _read_segments(tmp_path / "out") == []
+    assert sorted(r["incident_id"] for r in _read_segments(tmp_path / "spill")) == [f"INC-TEST-{i:04d}" for i in range(5)]
+
+
+def test_submit_racing_close_loses_nothing(tmp_path):
+    import threading
+
+    sink = IncidentSink(JsonlSegmentTransport(str(tmp_path)), batch_size=10, flush_interval_ms=1)
+    start = threading.Barrier(5)
+
+    def producer(offset):
+        start.wait()
+        for i in range(200):
+            sink.submit(_record(offset + i))
+
+    threads = [threading.Thread(target=producer, args=(n * 1000,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    start.wait()
+    sink.close()
+    for t in threads:
+        t.join()
+    assert len(_read_segments(tmp_path)) == 800
+
+
+def test_spilled_records_are_replayed_after_recovery(tmp_path):
+    out, spill = tmp_path / "out", tmp_path / "spill"
+    transport = FlakyTransport(str(out), failures=2)
+    sink = IncidentSink(transport, batch_size=10, flush_interval_ms=1, retries=1, retry_backoff_ms=1,
+                        spill_dir=str(spill), replay_interval_s=0)
+    sink.submit(_record(1))
+    time.sleep(0.2)
+    assert len(list(spill.glob("incidents-*.jsonl"))) == 1
+
+    # 传输层恢复：下一次成功写出后补投溢出文件并删除
+    sink.submit(_record(2))
+    sink.close()
+    assert sorted(r["incident_id"] for r in _read_segments(out)) == ["INC-TEST-0001", "INC-TEST-0002"]
+    assert list(spill.iterdir()) == []
+
+
+def test_new_sink_replays_spill_dir_on_start(tmp_path):
+    out, spill = tmp_path / "out", tmp_path / "spill"
+    dead = IncidentSink(FlakyTransport(str(out), failures=10**6), retries=0, spill_dir=str(spill))
+    dead.submit(_record(7))
+    dead.close()
+
+    sink = IncidentSink(JsonlSegmentTransport(str(out)), spill_dir=str(spill))
+    sink.close()
+    assert [r["incident_id"] for r in _read_segments(out)] == ["INC-TEST-0007"]
+    assert list(spill.iterdir()) == []
+
+
+def test_backoff_does_not_hold_write_lock(tmp_path):
+    sink = IncidentSink(FlakyTransport(str(tmp_path), failures=1), batch_size=1, flush_interval_ms=1, retries=1,
+                        retry_backoff_ms=300, spill_dir=str(tmp_path / "spill"))
+    sink.submit(_record(1))
+    time.sleep(0.1)  # 后台线程第一次写失败，正在退避
+    assert sink._write_lock.acquire(timeout=0.05)
+    sink._write_lock.release()
+    sink.close()
+    assert len(_read_segments(tmp_path)) == 1
@@ -0,0 +1,89 @@
+# tests/test_intent_batcher.py
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from services.intent_batcher import IntentBatcher
+
+
+class FakeClassifier:
+    """记录每次前向推理的批大小，按文本长度返回伪意图"""
+
+    def __init__(self):
+        self.batches = []
+        self.gate = threading.Event()
+
+    def predict_batch(self, texts):
+        self.gate.wait(timeout=1)
+        self.batches.append(list(texts))
+        return [{"intent": f"len_{len(t)}", "confidence": 0.9} for t in texts]
+
+
+def test_concurrent_callers_share_one_forward_pass():
+    """并发请求被合并为同一批，且每个调用方拿到自己的结果"""
+    fake = FakeClassifier()
+    batcher = IntentBatcher(fake, max_batch_size=8, max_wait_ms=200)
+    texts = ["a" * n for n in range(1, 7)]
+    with ThreadPoolExecutor(max_workers=len(texts)) as pool:
+        futures = [pool.submit(batcher.predict, t) for t in texts]
+        fake.gate.set()
+        results = [f.result(timeout=2) for f in futures]
+    batcher.close()
+
+    assert [r["intent"] for r in results] == [f"len_{len(t)}" for t in texts]
+    assert sum(len(b) for b in fake.batches) == len(texts)
+    assert len(fake.batches) < len(texts)
+
+
+def test_batch_size_is_capped():
+    """单批不超过 max_batch_size"""
+    fake = FakeClassifier()
+    fake.gate.set()
+    batcher = IntentBatcher(fake, max_batch_size=2, max_wait_ms=50)
+    futures = [batcher.submit(str(i)) for i in range(5)]
+    assert [f.result(timeout=2)["intent"] for f in futures] == ["len_1"] * 5
+    batcher.close()
+    assert max(len(b) for b in fake.batches) <= 2
+
+
+def test_inference_error_propagates_to_callers():
+    """批推理异常时，该批所有调用方都收到异常而不是永久阻塞"""
+    class Broken:
+        def predict_batch(self, texts):
+            raise RuntimeError("boom")
+
+    batcher = IntentBatcher(Broken(), max_batch_size=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        batcher.submit("x").result(timeout=2)
+    batcher.close()
+
+
+def test_cancelled_future_does_not_kill_worker():
+    """批内有调用方已取消时，其余请求照常返回，后台线程继续服务后续请求"""
+    fake = FakeClassifier()
+    batcher = IntentBatcher(fake, max_batch_size=8, max_wait_ms=100)
+    cancelled = batcher.submit("a")
+    kept = batcher.submit("bb")
+    assert cancelled.cancel()
+    fake.gate.set()
+
+    assert kept.result(timeout=2)["intent"] == "len_2"
+    assert batcher.submit("ccc").result(timeout=2)["intent"] == "len_3"
+    assert batcher._worker.is_alive()
+    batcher.close()
+    assert all("a" not in b for b in fake.batches)
+
+
+def test_asyncio_timeout_does_not_kill_worker():
+    import asyncio
+
+    fake = FakeClassifier()
+    batcher = IntentBatcher(fake, max_batch_size=8, max_wait_ms=20)
+
+    async def ask(text, timeout):
+        return await asyncio.wait_for(asyncio.wrap_future(batcher.submit(text)), timeout)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(ask("a", 0.001))
+    fake.gate.set()
+    assert asyncio.run(ask("bb", 2))["intent"] == "len_2"
+    batcher.close()
@@ -0,0 +1,97 @@
+# tests/test_intent_cascade.py
+import pytest
+from prometheus_client import REGISTRY
+from services.intent_cascade import IntentCascade, LOCAL_INTENT_MAP, ORCHESTRATOR_INTENTS, parse_intent_json
+from tools.stub_llm import StubLLMIntentClassifier
+
+
+class FakeLocalClassifier:
+    def __init__(self, table: dict):
+        self.table = table
+
+    def predict(self, text):
+        intent, confidence = self.table.get(text, ("other", 0.3))
+        return {"intent_name": intent, "confidence": confidence}
+
+
+def _routed(tier: str) -> float:
+    return REGISTRY.get_sample_value("intent_tier_routed_total", {"tier": tier}) or 0.0
+
+
+def test_confident_local_skips_llm():
+    llm = StubLLMIntentClassifier({"破": ("damage_report", 0.95)})
+    cascade = IntentCascade(FakeLocalClassifier({"ORD123 到哪了？": ("order_tracking", 0.97)}), llm, threshold=0.9)
+    before = _routed("local")
+
+    assert cascade.classify("ORD123 到哪了？") == {"intent": "order_status", "confidence": 0.97, "tier": "local"}
+    assert llm.calls == 0
+    assert _routed("local") == before + 1
+
+
+def test_low_confidence_escalates_to_llm():
+    llm = StubLLMIntentClassifier({"破": ("damage_report", 0.95)})
+    cascade = IntentCascade(FakeLocalClassifier({"牛奶箱破了": ("damage_compensation", 0.6)}), llm, threshold=0.9)
+    assert cascade.classify("牛奶箱破了") == {"intent": "damage_report", "confidence": 0.95, "tier": "llm"}
+    assert llm.calls == 1
+
+
+def test_real_local_labels_map_or_escalate():
+    with open("config/intent_labels.txt", encoding="utf-8") as f:
+        labels = [line.strip() for line in f if line.strip()]
+    assert set(LOCAL_INTENT_MAP) <= set(labels)
+    assert set(LOCAL_INTENT_MAP.values()) <= ORCHESTRATOR_INTENTS
+
+    llm = StubLLMIntentClassifier({})
+    local = FakeLocalClassifier({label: (label, 0.99) for label in labels})
+    cascade = IntentCascade(local, llm, threshold=0.9)
+    for label in labels:
+        result = cascade.classify(label)
+        if label in LOCAL_INTENT_MAP:
+            assert result == {"intent": LOCAL_INTENT_MAP[label], "confidence": 0.99, "tier": "local"}
+        else:
+            assert result["tier"] == "llm"
+    assert llm.calls == len(labels) - len(LOCAL_INTENT_MAP)
+
+
+def test_local_failure_escalates_to_llm():
+    class BrokenLocal:
+        def predict(self, text):
+            raise RuntimeError("onnx session died")
+
+    llm = StubLLMIntentClassifier({"破": ("damage_report", 0.95)})
+    cascade = IntentCascade(BrokenLocal(), llm, threshold=0.9)
+    assert cascade.classify("牛奶箱破了") == {"intent": "damage_report", "confidence": 0.95, "tier": "llm"}
+
+
+def test_llm_failure_degrades_to_other():
+    def broken(question):
+        raise TimeoutError("llm timeout")
+
+    cascade = IntentCascade(None, broken)
+    assert cascade.classify("你好") == {"intent": "other", "confidence": 0.0, "tier": "llm_error"}
+
+
+def test_parse_intent_json_is_safe():
+    assert parse_intent_json('```json\n{"intent": "policy_query", "confidence": 0.91}\n```') == ("policy_query", 0.91)
+    assert parse_intent_json("__import__('os').system('echo pwned')") == ("other", 0.0)
+    assert parse_intent_json('{"intent": "drop_tables", "confidence": 0.99}') == ("other", 0.0)
+    assert parse_intent_json('{"intent": "order_status", "confidence": "high"}') == ("other", 0.0)
+    assert parse_intent_json('{"intent": "order_status"}') == ("other", 0.0)
+
+
+def test_intent_system_prompt_has_no_template_variables():
+    import string
+    from services.intent_cascade import INTENT_SYSTEM_PROMPT
+
+    assert [f for _, f, _, _ in string.Formatter().parse(INTENT_SYSTEM_PROMPT) if f is not None] == []
+    rendered = INTENT_SYSTEM_PROMPT.format()
+    assert parse_intent_json(rendered.replace("0.x", "0.5").replace('"..."', '"other"')) == ("other", 0.5)
+
+
+def test_orchestrator_prompt_formats_with_question_only():
+    pytest.importorskip("langchain_openai")
+    from agents.orchestrator import INTENT_PROMPT
+
+    messages = INTENT_PROMPT.format_messages(question="ORD123 到哪了？")
+    assert '{"intent": "...", "confidence": 0.x}' in messages[0].content
+    assert messages[1].content == "ORD123 到哪了？"
@@ -0,0 +1,85 @@
+# tests/test_keyword_index.py
+import numpy as np
+from services.keyword_index import BM25KeywordIndex
+
+DOCS = [
+    "fresh goods damaged report immediately",
+    "order timeout cancelled automatically",
+    "commission settled daily",
+    "damaged fresh goods refund photo upload",
+]
+
+
+def test_only_matching_docs_returned_in_score_order():
+    index = BM25KeywordIndex(DOCS)
+    ids, scores = index.search(index.encode_query("damaged fresh goods"), top_k=5)
+    assert set(ids.tolist()) == {0, 3}
+    assert np.all(np.diff(scores) <= 0)
+    assert np.all(scores > 0)
+
+
+def test_top_k_and_unknown_terms():
+    index = BM25KeywordIndex(DOCS)
+    ids, _ = index.search(index.encode_query("damaged"), top_k=1)
+    assert len(ids) == 1
+    ids, scores = index.search(index.encode_query("typhoon"), top_k=3)
+    assert len(ids) == 0 and len(scores) == 0
+
+
+def test_mask_filters_before_top_k():
+    """被掩码过滤的文档不占 top-k 名额"""
+    index = BM25KeywordIndex(DOCS)
+    mask = np.array([False, True, True, True])
+    ids, _ = index.search(index.encode_query("damaged fresh goods"), top_k=1, mask=mask)
+    assert ids.tolist() == [3]
+
+
+def test_dense_and_sparse_paths_agree():
+    """稠密累加与 np.unique 稀疏累加得到相同排序"""
+    index = BM25KeywordIndex(DOCS)
+    query = index.encode_query("fresh goods order")
+    dense_ids, dense_scores = index.search(query, top_k=4)  # 小语料默认走稠密路径
+    index.DENSE_RATIO = 0  # 强制稀疏路径
+    sparse_ids, sparse_scores = index.search(query, top_k=4)
+    assert sparse_ids.tolist() == dense_ids.tolist()
+    assert np.allclose(sparse_scores, dense_scores)
+
+
+def test_char_ngram_analyzer_gives_chinese_recall():
+    """中文无空格文本按字 n-gram 切分后，关键词召回能命中"""
+    from services.text_analyzer import char_ngram_analyzer
+
+    docs = ["生鲜商品非质量问题不支持退货，破损请立即上报。", "订单超时未取，系统将自动取消并计入考核。"]
+    assert "破损" in char_ngram_analyzer(docs[0])
+    assert "的" not in char_ngram_analyzer("破损的订单")
+
+    index = BM25KeywordIndex(docs, analyzer=char_ngram_analyzer)
+    ids, _ = index.search(index.encode_query("超时的订单会取消吗"), top_k=1)
+    assert ids.tolist() == [1]
+
+
+def test_search_many_matches_single_search():
+    """批量稀疏矩阵乘与逐条检索结果一致（含掩码、空查询）"""
+    index = BM25KeywordIndex(DOCS)
+    queries = [index.encode_query(q) for q in ("damaged fresh goods", "typhoon", "order commission", "goods")]
+    masks = [None, None, np.array([True, False, True, True]), np.array([True, True, True, False])]
+    batched = index.search_many(queries, top_k=2, masks=masks)
+    for (ids, scores), query, mask in zip(batched, queries, masks):
+        single_ids, single_scores = index.search(query, top_k=2, mask=mask)
+        assert ids.tolist() == single_ids.tolist()
+        assert np.allclose(scores, single_scores)
+    assert batched[1][0].tolist() == []
+
+
+def test_updated_index_matches_full_rebuild():
+    index = BM25KeywordIndex(DOCS)
+    new_docs = [DOCS[0], "commission settled weekly by typhoon rules", DOCS[3]]
+    updated = index.updated(new_docs, reused_rows=[0, -1, 3])
+    rebuilt = BM25KeywordIndex(new_docs)
+    for query in ["damaged fresh goods", "typhoon commission", "order timeout"]:
+        ids, scores = updated.search(updated.encode_query(query), top_k=3)
+        expected_ids, expected_scores = rebuilt.search(rebuilt.encode_query(query), top_k=3)
+        assert ids.tolist() == expected_ids.tolist()
+        assert np.allclose(scores, expected_scores)
+    # 原索引不受影响
+    assert index.num_docs == len(DOCS)
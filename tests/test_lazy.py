@@ -0,0 +1,122 @@
+# tests/test_lazy.py
+import gc
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from services import lazy
+from services.lazy import LazyComponent, warm_up, component_status, all_loaded
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    monkeypatch.setattr(lazy, "_registry", {})
+
+
+def test_concurrent_first_use_loads_once():
+    calls = []
+
+    def factory():
+        calls.append(threading.get_ident())
+        time.sleep(0.05)
+        return object()
+
+    component = LazyComponent("test_model", factory)
+    assert not component.loaded
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: component.get(), range(8)))
+
+    assert len(calls) == 1
+    assert all(r is results[0] for r in results)
+    assert component.status()["loaded"] and component.load_seconds >= 0.05
+
+
+def test_warm_up_reports_failures_and_retries_later():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("weights not found")
+        return "model"
+
+    warmed = []
+    LazyComponent("test_ok", lambda: "index", warm=warmed.append)
+    LazyComponent("test_flaky", flaky)
+
+    status = warm_up()
+    assert warmed == ["index"]
+    assert status["test_ok"]["loaded"]
+    assert not status["test_flaky"]["loaded"] and "weights not found" in status["test_flaky"]["error"]
+    assert not all_loaded()
+
+    warm_up(["test_flaky"])
+    assert component_status()["test_flaky"] == {"loaded": True, "load_seconds": pytest.approx(0, abs=1), "error": None}
+    assert all_loaded()
+
+
+def _in_child(fn) -> int:
+    """在 fork 出的子进程中执行 fn，返回其退出码（fn 返回 True 为 0）"""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os._exit(0 if fn() else 1)
+        except BaseException:
+            os._exit(2)
+    return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+
+
+def test_fork_keeps_shared_components_and_rebuilds_thread_holders():
+    weights = LazyComponent("test_weights", lambda: np.ones(4))
+    batcher = LazyComponent("test_batcher", lambda: threading.Thread(target=lambda: None), fork_safe=False)
+    status = warm_up(prime=False)
+    assert status["test_weights"]["loaded"] and not status["test_batcher"]["loaded"]
+    parent_weights = weights.get()
+    batcher.get()
+
+    def child():
+        return weights.loaded and weights.get() is parent_weights and not batcher.loaded
+
+    assert _in_child(child) == 0
+
+
+def test_process_local_vector_store_connects_per_worker():
+    from services.vector_store import ProcessLocalVectorStore
+
+    class FakeConnection:
+        def __init__(self):
+            self.pid = os.getpid()
+
+        def search_many(self, query_embs, top_k, metadata_filters=None, threshold=0.0):
+            return [[{"doc_id": str(self.pid)}] for _ in query_embs]
+
+    store = LazyComponent("test_milvus", FakeConnection, fork_safe=False)
+    handle = ProcessLocalVectorStore(store)
+    warm_up(prime=False)
+    # pre-fork 父进程加载检索器时不建连接
+    assert not store.loaded
+
+    def child():
+        return handle.search_many([np.zeros(2)], 1) == [[{"doc_id": str(os.getpid())}]]
+
+    assert handle.search_many([np.zeros(2)], 1) == [[{"doc_id": str(os.getpid())}]]
+    assert _in_child(child) == 0
+
+
+def test_forked_worker_shares_read_only_pages():
+    """父进程加载的大数组在子进程只读访问，不计入子进程独占内存（USS）"""
+    from utils.memory import process_memory
+
+    data = np.random.default_rng(0).random(8 * 2**20)  # 64 MB
+    gc.collect()
+    gc.freeze()
+    try:
+        def child():
+            assert data.sum() > 0
+            return process_memory(os.getpid())["uss"] < 32 * 2**20
+
+        assert _in_child(child) == 0
+    finally:
+        gc.unfreeze()
@@ -0,0 +1,16 @@
+# tests/test_metadata_filter.py
+import pytest
+from services.metadata_filter import metadata_conditions, milvus_expr, pack_version
+
+
+def test_hostile_region_stays_a_string_literal():
+    expr = milvus_expr(metadata_conditions({"region": 'x" || region != "', "min_app_version": "2.3.0"}))
+    assert expr == f'region == "x\\" || region != \\"" && min_app_version_int <= {pack_version("2.3.0")}'
+
+    # 反斜杠先转义，不能借 \" 把引号“逃”出来
+    assert milvus_expr([("region", "==", 'a\\" || true || "')]) == 'region == "a\\\\\\" || true || \\""'
+
+
+def test_invalid_field_name_is_rejected():
+    with pytest.raises(ValueError):
+        milvus_expr([("region == 1 || doc_id", "==", "x")])
@@ -0,0 +1,30 @@
+# tests/test_pii_masker.py
+from services.pii_masker import PIIMasker
+from utils.safety_guard import mask_pii
+
+masker = PIIMasker()
+
+
+def test_legacy_patterns_unchanged():
+    assert mask_pii("电话13812345678") == "电话1XXXXXXXXX"
+    assert mask_pii("地址京100080附近") == "地址XX地址附近"
+
+
+def test_categories_and_report():
+    text = "我是13812345678，身份证11010519491231002X，车牌京A12345，订单ORD13800138000没到"
+    masked, hits = masker.mask_with_report(text)
+    assert masked == "我是1XXXXXXXXX，身份证XXXXXXXXXXXXXXXXXX，车牌京XXXXX，订单ORD13800138000没到"
+    assert hits == {"phone": 1, "id_card": 1, "plate": 1}
+
+
+def test_phone_boundaries():
+    assert masker.mask("+86 13812345678") == "1XXXXXXXXX"
+    # 更长的数字串不是手机号
+    assert masker.mask("流水号2138123456789") == "流水号2138123456789"
+
+
+def test_batch_matches_per_message():
+    messages = ["用户：13912345678 没收到货", "客服：请提供订单号", "用户：ORD123，放在粤B12345F车上", ""]
+    assert masker.mask_batch(messages) == [masker.mask(m) for m in messages]
+    assert masker.mask_batch(["a\x0013912345678", "b"]) == ["a\x001XXXXXXXXX", "b"]
+    assert masker.mask_batch([]) == []
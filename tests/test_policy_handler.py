@@ -0,0 +1,73 @@
+# tests/test_policy_handler.py
+import pytest
+from agents import policy_handler
+
+
+class FakeRetriever:
+    index_version = "v1"
+
+    def __init__(self):
+        self.batches = []
+        self.failing = False
+
+    def retrieve(self, query, metadata_filter=None):
+        return self.retrieve_many([query], [metadata_filter])[0]
+
+    def retrieve_many(self, queries, metadata_filters=None, top_k=1, threshold=0.75):
+        self.batches.append(list(queries))
+        if self.failing:
+            raise ConnectionError("milvus unavailable")
+        return [
+            [{"text": f"{q}的规则", "score": 0.9, "deep_link": "", "doc_id": q}] if "政策" in q else []
+            for q in queries
+        ]
+
+
+@pytest.fixture
+def fake_retriever(monkeypatch):
+    fake = FakeRetriever()
+    monkeypatch.setattr(policy_handler.policy_retriever, "get", lambda: fake)
+    monkeypatch.setattr(policy_handler, "current_index_version", lambda: "v1")
+    policy_handler.response_cache.clear()
+    yield fake
+    policy_handler.response_cache.clear()
+
+
+def test_batch_retrieves_once_and_keeps_order(fake_retriever):
+    questions = ["退货政策", "天气怎么样", "佣金政策"]
+    contexts = [{"region": "north"}, {"region": "north"}, {"region": "south"}]
+    responses = policy_handler.handle_policy_query_batch(questions, contexts)
+
+    assert fake_retriever.batches == [questions]
+    assert [r["action"] for r in responses] == ["show_answer", "fallback_to_human", "show_answer"]
+    assert responses[0]["answer"] == "根据最新政策：退货政策的规则"
+    assert responses[2]["answer"] == "根据最新政策：佣金政策的规则"
+
+
+def test_batch_only_retrieves_cache_misses(fake_retriever):
+    policy_handler.handle_policy_query_batch(["退货政策"], [{"region": "north"}])
+    responses = policy_handler.handle_policy_query_batch(
+        ["退货政策", "补货政策"], [{"region": "north"}, {"region": "north"}]
+    )
+    assert fake_retriever.batches == [["退货政策"], ["补货政策"]]
+    assert all(r["action"] == "show_answer" for r in responses)
+
+
+def test_answers_from_stale_index_are_not_cached(fake_retriever, monkeypatch):
+    # 版本戳已切到 v2，检索仍在 v1 索引上（后台加载中）
+    monkeypatch.setattr(policy_handler, "current_index_version", lambda: "v2")
+    policy_handler.handle_policy_query_batch(["退货政策"], [{"region": "north"}])
+    policy_handler.handle_policy_query_batch(["退货政策"], [{"region": "north"}])
+    assert fake_retriever.batches == [["退货政策"], ["退货政策"]]
+
+
+def test_retrieval_errors_are_not_cached(fake_retriever):
+    fake_retriever.failing = True
+    assert policy_handler.handle_policy_query("退货政策", {"region": "north"})["action"] == "fallback_to_human"
+    assert policy_handler.handle_policy_query_batch(["佣金政策"], [{"region": "north"}])[0]["action"] == "fallback_to_human"
+
+    # 故障恢复后立即重新检索，而不是命中缓存里的“未找到”
+    fake_retriever.failing = False
+    assert policy_handler.handle_policy_query("退货政策", {"region": "north"})["action"] == "show_answer"
+    assert policy_handler.handle_policy_query_batch(["佣金政策"], [{"region": "north"}])[0]["action"] == "show_answer"
+    assert len(fake_retriever.batches) == 4
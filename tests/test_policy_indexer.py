@@ -0,0 +1,111 @@
+# tests/test_policy_indexer.py
+import os
+import numpy as np
+import pytest
+from services.index_version import read_index_pointer
+from services.policy_indexer import PolicyIndexer
+from services.rag_retriever import load_policy_index
+
+DOCS = [
+    {"id": "p001", "content": "生鲜商品非质量问题不支持退货，破损请立即上报。", "region": "north", "min_app_version": "2.3.0"},
+    {"id": "p002", "content": "订单超时未取，系统将自动取消并计入考核。", "region": "south", "min_app_version": "2.1.0"},
+    {"id": "p003", "content": "佣金每周一结算，节假日顺延。", "region": "north", "min_app_version": "2.0.0"},
+]
+
+
+class FakeEncoder:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.array([[len(t), t.count("生"), t.count("佣"), 1.0] for t in texts], dtype=np.float32)
+
+
+@pytest.fixture
+def indexer(tmp_path):
+    encoder = FakeEncoder()
+    return PolicyIndexer(
+        encoder, root=str(tmp_path / "index"), pointer_path=str(tmp_path / "index.version"), keep=2, write_faiss=True
+    ), encoder
+
+
+def test_only_changed_docs_are_embedded(indexer):
+    indexer, encoder = indexer
+    first = indexer.update(DOCS)
+    assert first["published"] and first["embedded"] == 3
+
+    edited = [DOCS[0], dict(DOCS[1], content="订单超时 30 分钟未取，系统将自动取消。"), dict(DOCS[2], region="south")]
+    edited.append({"id": "p004", "content": "台风天停运会提前通知。", "region": "north", "min_app_version": "2.0.0"})
+    report = indexer.update(edited)
+    # p003 只改了元数据：不重新编码，但算作变更
+    assert encoder.calls[-1] == [edited[1]["content"], edited[3]["content"]]
+    assert (report["added"], report["changed"], report["deleted"], report["embedded"]) == (1, 2, 0, 2)
+
+    report = indexer.update(edited[1:])
+    assert (report["deleted"], report["embedded"]) == (1, 0)
+    assert len(encoder.calls) == 2
+
+    embeddings = np.load(os.path.join(report["path"], "embeddings.npy"))
+    fresh = FakeEncoder()([doc["content"] for doc in edited[1:]])
+    assert np.allclose(embeddings, fresh / np.linalg.norm(fresh, axis=1, keepdims=True))
+
+
+def test_unchanged_corpus_is_not_republished(indexer):
+    indexer, _ = indexer
+    first = indexer.update(DOCS)
+    again = indexer.update(DOCS)
+    assert not again["published"] and again["version"] == first["version"]
+
+
+def test_old_generations_are_pruned(indexer):
+    indexer, _ = indexer
+    paths = [indexer.update([dict(DOCS[0], content=f"第 {i} 版")])["path"] for i in range(4)]
+    assert sorted(os.listdir(indexer.root)) == sorted(os.path.basename(p) for p in paths[-2:])
+
+
+def test_serving_index_switches_incrementally(indexer):
+    indexer, _ = indexer
+    indexer.update(DOCS)
+    serving = load_policy_index(read_index_pointer(indexer.pointer_path))
+
+    edited = [dict(DOCS[0], content="台风天生鲜配送暂停。"), DOCS[1]]
+    indexer.update(edited)
+    pointer = read_index_pointer(indexer.pointer_path)
+    switched = load_policy_index(pointer, previous=serving)
+    rebuilt = load_policy_index(pointer)
+
+    assert switched.version == pointer["version"] != serving.version
+    assert list(switched.docs.doc_index) == ["p001", "p002"]
+    assert switched.vector_store.index.ntotal == 2
+    for query in ["台风生鲜", "订单超时"]:
+        ids, scores = switched.keyword_index.search(switched.keyword_index.encode_query(query), top_k=2)
+        expected_ids, expected_scores = rebuilt.keyword_index.search(rebuilt.keyword_index.encode_query(query), top_k=2)
+        assert ids.tolist() == expected_ids.tolist() and np.allclose(scores, expected_scores)
+    # 旧版本在切换后仍可用
+    assert serving.docs.string("content", 0) == DOCS[0]["content"]
+
+
+def test_remote_sync_stages_full_collection_before_pointer_swap(tmp_path):
+    pointer_path = str(tmp_path / "index.version")
+    events = []
+
+    class FakeSync:
+        def prepare(self, docs, embeddings):
+            events.append(("prepare", [d["id"] for d in docs], embeddings.shape[0], read_index_pointer(pointer_path)))
+            return f"policy_rag_{len(events)}"
+
+        def publish(self, name):
+            events.append(("publish", name, read_index_pointer(pointer_path)))
+
+    indexer = PolicyIndexer(FakeEncoder(), root=str(tmp_path / "index"), pointer_path=pointer_path,
+                            write_faiss=False, sync=FakeSync())
+    indexer.update(DOCS)
+    first = read_index_pointer(pointer_path)
+    indexer.update([DOCS[0], dict(DOCS[1], content="订单超时 30 分钟未取，系统将自动取消。")])
+
+    # 增量发布同样写全量的新集合；别名切换时版本戳仍是上一版本，随后才替换
+    assert [e[0] for e in events] == ["prepare", "publish", "prepare", "publish"]
+    assert events[2][1:3] == (["p001", "p002"], 2)
+    assert events[3][2] == first
+    assert read_index_pointer(pointer_path) != first
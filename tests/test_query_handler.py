@@ -0,0 +1,79 @@
+# tests/test_query_handler.py
+import asyncio
+import pytest
+
+pytest.importorskip("langchain_core")
+
+from agents import query_handler
+
+
+class FakeClassifier:
+    def __init__(self, intent: str):
+        self.intent = intent
+
+    def predict(self, text):
+        return {"intent": self.intent, "confidence": 0.95}
+
+    def submit(self, text):
+        from concurrent.futures import Future
+
+        future = Future()
+        future.set_result(self.predict(text))
+        return future
+
+
+@pytest.fixture
+def operation_guide(monkeypatch):
+    monkeypatch.setattr(query_handler.classifier, "get", lambda: FakeClassifier("operation_guide"))
+
+
+def test_operation_guide_answers(operation_guide):
+    response = query_handler.handle_query("货物破损了怎么申请补货？", {"user_id": "u1"})
+
+    assert response["action"] == "show_answer"
+    assert response["deep_link"] == "app://after-sales?category=perishable"
+
+
+def test_operation_guide_async_unmatched_falls_back(operation_guide):
+    response = asyncio.run(query_handler.handle_query_async("怎么修改头像？", {"user_id": "u1"}))
+
+    assert response["action"] == "fallback_to_human"
+
+
+class FakeIntentModel:
+    def __init__(self, table: dict):
+        self.table = table
+
+    def predict_batch(self, texts):
+        return [{"intent": self.table.get(text, "other"), "confidence": 0.95} for text in texts]
+
+
+@pytest.fixture
+def mixed_batch(monkeypatch):
+    questions = ["退货政策是什么？", "有个单子漏派了", "我的余额多少？"]
+    table = dict(zip(questions, ["policy_query", "operation_guide", "account_balance"]))
+    monkeypatch.setattr(query_handler.intent_model, "get", lambda: FakeIntentModel(table))
+    monkeypatch.setattr(query_handler.policy_handler, "handle_policy_query_batch",
+                        lambda qs, ctxs: [{"answer": "政策", "action": "show_answer"} for _ in qs])
+    monkeypatch.setattr(query_handler.api_handler, "handle",
+                        lambda intent, ctx: {"answer": "余额", "action": "show_answer"})
+
+    async def handle_async(intent, ctx):
+        return {"answer": "余额", "action": "show_answer"}
+
+    monkeypatch.setattr(query_handler.api_handler, "handle_async", handle_async)
+    return questions, [{"user_id": "u1"}] * len(questions)
+
+
+def test_batch_with_operation_guide_item(mixed_batch):
+    responses = query_handler.handle_query_batch(*mixed_batch)
+
+    assert [r["answer"] for r in (responses[0], responses[2])] == ["政策", "余额"]
+    assert responses[1]["deep_link"] == "app://task/emergency-apply"
+
+
+def test_batch_async_with_operation_guide_item(mixed_batch):
+    responses = asyncio.run(query_handler.handle_query_batch_async(*mixed_batch))
+
+    assert [r["action"] for r in responses] == ["show_answer"] * 3
+    assert responses[1]["deep_link"] == "app://task/emergency-apply"
@@ -0,0 +1,65 @@
+# tests/test_reranker.py
+import time
+import numpy as np
+from services.reranker import CrossEncoderReranker
+
+
+class FakeCrossEncoder:
+    """相关概率 = 查询与文档的公共字符占比"""
+
+    def __init__(self, delay_s: float = 0.0):
+        self.delay_s = delay_s
+        self.pairs = []
+
+    def predict(self, pairs, batch_size=32, show_progress_bar=False):
+        time.sleep(self.delay_s)
+        self.pairs.extend(pairs)
+        return np.array([len(set(q) & set(d)) / len(set(q)) for q, d in pairs])
+
+
+def _candidates(*texts):
+    return [{"doc_id": f"p{i}", "text": t} for i, t in enumerate(texts)]
+
+
+def test_scores_align_with_candidates_and_are_cached():
+    model = FakeCrossEncoder()
+    reranker = CrossEncoderReranker(model=model, budget_ms=1000, batch_size=2, calibration=(1.0, 0.0))
+    candidates = _candidates("佣金结算", "生鲜破损退货", "台风停运")
+    scores = reranker.score_many(["生鲜破损"], [candidates])[0]
+    assert int(np.argmax(scores)) == 1
+    assert len(model.pairs) == 3
+
+    # 同一 (查询, 文档) 全部命中缓存
+    again = reranker.score_many(["生鲜破损"], [candidates])[0]
+    assert np.allclose(scores, again)
+    assert len(model.pairs) == 3
+
+
+def test_calibration_is_monotonic_platt_scaling():
+    reranker = CrossEncoderReranker(model=FakeCrossEncoder(), calibration=(2.0, -1.0))
+    calibrated = reranker.calibrate([0.1, 0.5, 0.9])
+    assert np.all(np.diff(calibrated) > 0)
+    assert np.isclose(calibrated[1], 1 / (1 + np.exp(1.0)))
+
+
+def test_budget_exceeded_falls_back_without_waiting():
+    model = FakeCrossEncoder(delay_s=0.2)
+    reranker = CrossEncoderReranker(model=model, budget_ms=20, batch_size=1)
+    start = time.perf_counter()
+    results = reranker.score_many(["生鲜破损"], [_candidates("生鲜破损退货", "佣金结算")])
+    assert results == [None]
+    assert time.perf_counter() - start < 0.15
+    # 后台线程在当前小批结束后停止，不继续打剩余候选
+    time.sleep(0.3)
+    assert len(model.pairs) == 1
+
+
+def test_model_error_falls_back():
+    class Broken:
+        def predict(self, pairs, **kwargs):
+            raise RuntimeError("boom")
+
+    reranker = CrossEncoderReranker(model=Broken(), budget_ms=1000)
+    results = reranker.score_many(["退货", "佣金"], [_candidates("退货"), []])
+    assert results[0] is None
+    assert len(results[1]) == 0
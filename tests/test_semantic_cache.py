@@ -0,0 +1,77 @@
+# tests/test_semantic_cache.py
+import numpy as np
+from services.intent_cascade import IntentCascade
+from services.semantic_cache import SemanticIntentCache
+from tools.stub_llm import StubLLMIntentClassifier
+
+# 同义改写给出相近向量，不同意图正交
+VECTORS = {
+    "牛奶箱破了": [1.0, 0.0, 0.0],
+    "牛奶箱子摔破了": [0.98, 0.2, 0.0],
+    "佣金什么时候结算": [0.0, 1.0, 0.0],
+    "今天派单了吗": [0.0, 0.0, 1.0],
+}
+
+
+def embed(text):
+    return np.array(VECTORS[text], dtype=np.float32)
+
+
+def test_paraphrase_hits_and_unrelated_misses():
+    cache = SemanticIntentCache(embed, maxsize=10, threshold=0.95)
+    cache.put("牛奶箱破了", "damage_report", 0.93)
+    hit = cache.lookup("牛奶箱子摔破了")
+    assert hit["intent"] == "damage_report" and hit["confidence"] == np.float32(0.93)
+    assert cache.lookup("佣金什么时候结算") is None
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = SemanticIntentCache(embed, maxsize=2, threshold=0.95)
+    cache.put("牛奶箱破了", "damage_report", 0.9)
+    cache.put("佣金什么时候结算", "commission_rule", 0.9)
+    assert cache.lookup("牛奶箱破了") is not None
+    cache.put("今天派单了吗", "missing_task", 0.9)
+
+    assert len(cache) == 2
+    assert cache.lookup("牛奶箱破了") is not None
+    assert cache.lookup("佣金什么时候结算") is None
+
+
+def test_persists_across_restarts(tmp_path):
+    path = str(tmp_path / "cache.npz")
+    cache = SemanticIntentCache(embed, maxsize=10, threshold=0.95, path=path, save_every=1)
+    cache.put("牛奶箱破了", "damage_report", 0.9)
+
+    restored = SemanticIntentCache(embed, maxsize=10, threshold=0.95, path=path)
+    assert restored.lookup("牛奶箱子摔破了")["intent"] == "damage_report"
+
+    other_model = SemanticIntentCache(embed, maxsize=10, path=path, model_name="another-model")
+    assert len(other_model) == 0
+
+
+def test_concurrent_worker_saves_do_not_collide(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    # 每个 worker 各有一份缓存，共用同一个持久化文件
+    path = str(tmp_path / "cache.npz")
+    workers = [SemanticIntentCache(embed, maxsize=10, threshold=0.95, path=path) for _ in range(4)]
+    for cache, text in zip(workers, VECTORS):
+        cache.put(text, "other", 0.9)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda i: workers[i % 4].save(), range(200)))
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cache.npz"]
+    assert len(SemanticIntentCache(embed, maxsize=10, path=path)) == 1
+
+
+def test_cascade_reuses_llm_result_for_paraphrase():
+    llm = StubLLMIntentClassifier({"破": ("damage_report", 0.95)})
+    cache = SemanticIntentCache(embed, maxsize=10, threshold=0.95)
+    cascade = IntentCascade(None, llm, semantic_cache=cache)
+
+    assert cascade.classify("牛奶箱破了")["tier"] == "llm"
+    result = cascade.classify("牛奶箱子摔破了")
+    assert result["tier"] == "semantic_cache" and result["intent"] == "damage_report"
+    assert llm.calls == 1
@@ -0,0 +1,68 @@
+# tests/test_sensitive_matcher.py
+import os
+import random
+from services.sensitive_matcher import SCOPES, AhoCorasick, SensitiveKeywordMatcher
+from utils.safety_guard import contains_sensitive_content
+from core.safety import is_safe
+
+
+def test_overlapping_matches_with_positions():
+    ac = AhoCorasick(["赔", "赔偿", "偿还", "he", "she", "hers"])
+    assert list(ac.finditer("要求赔偿还款")) == [("赔", 2, 3), ("赔偿", 2, 4), ("偿还", 3, 5)]
+    assert sorted(ac.finditer("ushers")) == [("he", 2, 4), ("hers", 2, 6), ("she", 1, 4)]
+    assert not ac.search("正常配送问题")
+
+
+def test_matches_naive_scan_on_random_input():
+    rng = random.Random(0)
+    alphabet = "赔偿诉讼隐私罚款起法律"
+    words = list({"".join(rng.choices(alphabet, k=rng.randint(1, 4))) for _ in range(200)})
+    ac = AhoCorasick(words)
+    for _ in range(50):
+        text = "".join(rng.choices(alphabet + "的了货", k=40))
+        expected = {(w, i, i + len(w)) for w in words for i in range(len(text)) if text.startswith(w, i)}
+        assert set(ac.finditer(text)) == expected
+
+
+def test_hot_reload(tmp_path):
+    path = tmp_path / "keywords.txt"
+    path.write_text("# comment\n起诉\n", encoding="utf-8")
+    matcher = SensitiveKeywordMatcher(str(path), reload_interval_s=0)
+    assert matcher.contains("我要起诉")
+    assert not matcher.contains("罚款多少")
+
+    path.write_text("罚款\n", encoding="utf-8")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+    assert matcher.find("罚款多少") == [("罚款", 0, 2)]
+    assert not matcher.contains("我要起诉")
+
+
+def test_scoped_keywords(tmp_path):
+    path = tmp_path / "keywords.txt"
+    path.write_text("赔 policy_text\n起诉 question,orchestrator\n违法\n", encoding="utf-8")
+    matcher = SensitiveKeywordMatcher(str(path), reload_interval_s=0)
+    assert matcher.find("要赔钱，我要起诉", scope="policy_text") == [("赔", 1, 2)]
+    assert matcher.find("要赔钱，我要起诉", scope="orchestrator") == [("起诉", 6, 8)]
+    assert len(matcher.find("要赔钱，我要起诉")) == 2
+    # 未标注范围的词对所有检查点生效
+    assert all(matcher.contains("违法操作", scope=scope) for scope in SCOPES)
+
+
+def test_call_sites_keep_their_original_lists():
+    # 合并前各检查点的词表：settings.SENSITIVE_KEYWORDS / orchestrator 内联 / core.safety
+    original = {
+        "policy_text": {"赔", "投诉升级", "诉讼", "法律"},
+        "orchestrator": {"赔偿", "起诉", "隐私", "个人信息", "罚款"},
+        "question": {"赔偿", "隐私", "起诉"},
+    }
+    words = set().union(*original.values())
+    for scope, expected in original.items():
+        for word in words:
+            assert contains_sensitive_content(f"关于{word}的问题", scope=scope) == any(w in word for w in expected)
+
+    assert not contains_sensitive_content("用户说没收到货，要我赔500，怎么办？", scope="orchestrator")
+    assert contains_sensitive_content("用户说没收到货，要我赔500，怎么办？")  # 政策文本审查仍拦截“赔”
+    for word in ("罚款", "隐私", "起诉", "个人信息"):
+        assert not contains_sensitive_content(f"平台{word}规则")
+    assert not is_safe("泄露隐私") and is_safe("平台罚款") and is_safe("投诉升级")
+    assert is_safe("订单什么时候到")
@@ -0,0 +1,103 @@
+# tests/test_vector_store.py
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+from services.doc_store import PolicyDocStore, build_doc_store
+from services.vector_store import LocalVectorStore
+
+
+DOCS = [
+    {"id": f"p00{i}", "content": f"政策{i}", "region": region, "min_app_version": version,
+     "deep_link": f"app://policy?id=p00{i}"}
+    for i, (region, version) in enumerate([
+        ("north", "2.3.0"), ("south", "2.1.0"), ("north", "2.10.0"), ("south", "1.0.0")
+    ])
+]
+
+
+@pytest.fixture
+def local_store(tmp_path):
+    """4 篇正交向量文档，north/south 各两篇"""
+    store_path = str(tmp_path / "doc_store")
+    build_doc_store(DOCS, store_path)
+    embeddings = np.eye(4, 8, dtype="float32")
+    index = faiss.IndexFlatIP(8)
+    index.add(embeddings)
+    index_path = str(tmp_path / "policy.index")
+    faiss.write_index(index, index_path)
+    return LocalVectorStore(PolicyDocStore(store_path), index_path=index_path)
+
+
+def test_local_search_ranks_by_cosine(local_store):
+    query = np.array([0.1, 0, 0.9, 0, 0, 0, 0, 0])
+    results = local_store.search(query, top_k=2)
+    assert [r["doc_id"] for r in results] == ["p002", "p000"]
+    assert results[0]["deep_link"] == "app://policy?id=p002"
+
+
+def test_local_search_filters_before_top_k(local_store):
+    """过滤在 top-k 之前生效：最相似的 north 文档不占用 south 的名额"""
+    query = np.array([0.1, 0.2, 0.9, 0, 0, 0, 0, 0])
+    results = local_store.search(query, top_k=1, metadata_filter={"region": "south"})
+    assert [r["doc_id"] for r in results] == ["p001"]
+
+
+def test_local_search_applies_threshold(local_store):
+    query = np.array([0.1, 0, 0.9, 0, 0, 0, 0, 0])
+    results = local_store.search(query, top_k=4, threshold=0.5)
+    assert [r["doc_id"] for r in results] == ["p002"]
+    assert local_store.search(query, top_k=4, metadata_filter={"region": "east"}) == []
+
+
+def test_doc_store_roundtrip(tmp_path):
+    """列式存储按 id 解码与原文档一致，枚举列可直接做向量化过滤"""
+    path = str(tmp_path / "doc_store")
+    build_doc_store(DOCS, path)
+    build_doc_store(DOCS[:2], path)  # 重建时整体替换
+    store = PolicyDocStore(path)
+    assert len(store) == 2
+    assert store.get(1) == {**DOCS[1], "doc_type": ""}
+    codes, vocab, lookup = store.categorical("region")
+    assert vocab[codes[0]] == "north" and lookup["south"] == codes[1]
+    assert list(store.texts()) == ["政策0", "政策1"]
+
+
+def test_pack_version_orders_numerically():
+    from services.metadata_filter import pack_version
+
+    assert pack_version("2.10.0") > pack_version("2.3.0")
+    assert pack_version("2.3") == pack_version("2.3.0")
+    assert pack_version("3.0.0-beta") == pack_version("3.0.0")
+    assert pack_version("") == 0
+
+
+def test_version_filter_pushed_before_top_k(local_store):
+    """客户端 2.5.0 看不到要求 2.10.0 的文档，即使它最相似"""
+    query = np.array([0.1, 0, 0.9, 0, 0, 0, 0, 0])
+    results = local_store.search(query, top_k=1, metadata_filter={"region": "north", "min_app_version": "2.5.0"})
+    assert [r["doc_id"] for r in results] == ["p000"]
+    results = local_store.search(query, top_k=1, metadata_filter={"region": "north", "min_app_version": "2.10.1"})
+    assert [r["doc_id"] for r in results] == ["p002"]
+
+
+def test_milvus_expr_uses_packed_version():
+    from services.metadata_filter import metadata_conditions, milvus_expr, pack_version
+
+    expr = milvus_expr(metadata_conditions({"region": "north", "min_app_version": "2.10.0"}))
+    assert expr == f'region == "north" && min_app_version_int <= {pack_version("2.10.0")}'
+
+
+def test_local_search_many_matches_single_search(local_store):
+    """批量检索按过滤条件分组，结果与逐条检索一致且保持输入顺序"""
+    queries = [
+        np.array([0.1, 0.2, 0.9, 0, 0, 0, 0, 0]),
+        np.array([0.9, 0.3, 0, 0, 0, 0, 0, 0]),
+        np.array([0, 0.2, 0.1, 0.9, 0, 0, 0, 0]),
+        np.array([0.1, 0, 0.9, 0, 0, 0, 0, 0]),
+    ]
+    filters = [{"region": "south"}, None, {"region": "south"}, {"region": "east"}]
+    batched = local_store.search_many(queries, top_k=2, metadata_filters=filters)
+    assert batched == [local_store.search(q, top_k=2, metadata_filter=f) for q, f in zip(queries, filters)]
+    assert [r["doc_id"] for r in batched[0]] == ["p001", "p003"]
+    assert batched[3] == []
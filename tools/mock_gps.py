@@ -0,0 +1,18 @@
+from tools.mock_source import SimulatedSource
+
+GPS_TRACKS = {
+    "ORD123": [
+        {"time": "05:50", "location": "朝阳仓"},
+        {"time": "06:30", "location": "望京西园三区"}
+    ]
+}
+
+
+class MockGPSSource(SimulatedSource):
+    """本地 GPS 轨迹服务模拟，latency_ms / jitter_ms / error_rate 可配置"""
+
+    name = "gps"
+    default_latency_ms = 80
+
+    def lookup(self, order_id: str) -> dict:
+        return {"track": GPS_TRACKS.get(order_id, [])}
@@ -0,0 +1,26 @@
+# tools/mock_source.py
+import random
+import time
+from abc import abstractmethod
+from services.incident_context import ContextSource
+
+
+class SimulatedSource(ContextSource):
+    """模拟远程数据源：fetch 先按 latency_ms + 随机 jitter_ms 休眠，再按 error_rate 注入故障，最后查本地数据"""
+
+    default_latency_ms = 50
+
+    def __init__(self, latency_ms: float = None, jitter_ms: float = 20, error_rate: float = 0.0):
+        self.latency_ms = self.default_latency_ms if latency_ms is None else latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+
+    def fetch(self, order_id: str) -> dict:
+        time.sleep((self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000)
+        if random.random() < self.error_rate:
+            raise ConnectionError(f"{self.name} service unavailable")
+        return self.lookup(order_id)
+
+    @abstractmethod
+    def lookup(self, order_id: str) -> dict:
+        """按订单号查本地模拟数据"""
@@ -1,5 +1,18 @@
+from tools.mock_source import SimulatedSource
+
+
 def get_order_status(order_id: str) -> dict:
     return {
         "ORD123": {"status": "DELIVERED", "signed_at": "2025-12-30T06:30:00"},
         "ORD456": {"status": "IN_TRANSIT"}
-    }.get(order_id, {"status": "NOT_FOUND"})
\ No newline at end of file
+    }.get(order_id, {"status": "NOT_FOUND"})
+
+
+class MockTMSSource(SimulatedSource):
+    """本地运输（订单状态）服务模拟，latency_ms / jitter_ms / error_rate 可配置"""
+
+    name = "order"
+    default_latency_ms = 50
+
+    def lookup(self, order_id: str) -> dict:
+        return {"id": order_id, **get_order_status(order_id)}
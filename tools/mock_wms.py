@@ -0,0 +1,16 @@
+from tools.mock_source import SimulatedSource
+
+WMS_RECORDS = {
+    "ORD123": {"warehouse": "朝阳仓", "picked_at": "2025-12-30T05:20:00", "outbound_at": "2025-12-30T05:45:00"},
+    "ORD456": {"warehouse": "顺义仓", "picked_at": "2025-12-30T09:10:00", "outbound_at": None}
+}
+
+
+class MockWMSSource(SimulatedSource):
+    """本地仓储（拣货 / 出库）服务模拟，latency_ms / jitter_ms / error_rate 可配置"""
+
+    name = "wms"
+    default_latency_ms = 60
+
+    def lookup(self, order_id: str) -> dict:
+        return WMS_RECORDS.get(order_id, {"warehouse": None})
@@ -0,0 +1,101 @@
+# tools/stub_downstream.py
+"""
+本地下游服务桩：模拟 order-service / logistics-service / account-service 的只读接口，
+用于压测与测试。延迟、抖动、错误率可在运行时修改 stub.config，便于做故障注入。
+"""
+import asyncio
+import random
+import threading
+import time
+import uvicorn
+from fastapi import FastAPI, Request
+from starlette.responses import JSONResponse
+
+
+class StubDownstream:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency_ms: float = 20,
+                 jitter_ms: float = 0, error_rate: float = 0.0):
+        self.host = host
+        self.port = port
+        self.config = {"latency_ms": latency_ms, "jitter_ms": jitter_ms, "error_rate": error_rate}
+        self.requests = 0
+        # 客户端 (ip, port) 集合：不同端口即不同 TCP 连接，用于观测连接复用
+        self.client_addresses = set()
+        self._server = None
+        self._thread = None
+        self.app = self._build_app()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def _simulate(self, request: Request):
+        self.requests += 1
+        if request.client:
+            self.client_addresses.add((request.client.host, request.client.port))
+        delay = self.config["latency_ms"] + random.uniform(0, self.config["jitter_ms"])
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if random.random() < self.config["error_rate"]:
+            return JSONResponse({"error": "injected fault"}, status_code=503)
+        return None
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI()
+
+        @app.post("/v1/status")
+        async def order_status(request: Request):
+            return await self._simulate(request) or {
+                "order_id": "ORD123", "status": "IN_TRANSIT", "eta": "18:30"
+            }
+
+        @app.post("/v1/estimate")
+        async def delivery_estimate(request: Request):
+            return await self._simulate(request) or {"minutes": 35}
+
+        @app.get("/v1/balance")
+        async def account_balance(request: Request):
+            return await self._simulate(request) or {"balance": 128.5}
+
+        return app
+
+    def start(self):
+        config = uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning", access_log=False)
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="stub-downstream", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("stub downstream server failed to start")
+            time.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run local downstream service stub")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    stub = StubDownstream(port=args.port, latency_ms=args.latency_ms,
+                          jitter_ms=args.jitter_ms, error_rate=args.error_rate)
+    print(f"Stub downstream listening on {stub.url}")
+    uvicorn.run(stub.app, host=stub.host, port=args.port, log_level="warning")
@@ -0,0 +1,35 @@
+# tools/stub_kafka.py
+"""
+进程内 Kafka 生产者桩：接口与 kafka-python KafkaProducer 的 send / flush / close 一致，
+消息按 topic 保存在内存中，用于测试 KafkaTransport。
+"""
+import threading
+from collections import defaultdict
+
+
+class StubKafkaProducer:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.messages = defaultdict(list)
+        self._pending = []
+        self.flushes = 0
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def send(self, topic: str, value: bytes = None, key: bytes = None):
+        if self.closed:
+            raise RuntimeError("producer is closed")
+        if self.fail:
+            raise ConnectionError("broker unavailable")
+        with self._lock:
+            self._pending.append((topic, key, value))
+
+    def flush(self, timeout: float = None):
+        with self._lock:
+            for topic, key, value in self._pending:
+                self.messages[topic].append((key, value))
+            self._pending.clear()
+            self.flushes += 1
+
+    def close(self, timeout: float = None):
+        self.closed = True
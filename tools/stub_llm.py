@@ -0,0 +1,25 @@
+# tools/stub_llm.py
+"""
+本地 LLM 意图分类桩：按关键词规则返回与 INTENT_PROMPT 约定一致的 JSON 文本，
+可配置延迟，用于测试与压测时替代 ChatOpenAI。
+"""
+import json
+import time
+
+
+class StubLLMIntentClassifier:
+    def __init__(self, rules: dict = None, default: tuple = ("other", 0.5), latency_ms: float = 0):
+        """rules: {关键词: (intent, confidence)}，按插入顺序匹配"""
+        self.rules = rules or {}
+        self.default = default
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def __call__(self, question: str) -> str:
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        intent, confidence = next(
+            (v for kw, v in self.rules.items() if kw in question), self.default
+        )
+        return json.dumps({"intent": intent, "confidence": confidence})
@@ -0,0 +1,82 @@
+# utils/cache.py
+import re
+import time
+import threading
+import unicodedata
+from collections import OrderedDict
+from utils.metrics import CACHE_HITS, CACHE_MISSES, CACHE_EVICTIONS, CACHE_SIZE
+
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_query(text: str) -> str:
+    """缓存键归一化：全角转半角、去首尾空白、合并空白、小写（调用方需先做 PII 脱敏）"""
+    text = unicodedata.normalize("NFKC", text)
+    return _WHITESPACE.sub(" ", text).strip().lower()
+
+
+class LRUCache:
+    """
+    线程安全的 LRU 缓存，可选 TTL（秒，None/0 表示不过期）。
+    命中 / 未命中 / 淘汰次数以 name 为标签导出到 /metrics。
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl_seconds: float = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl_seconds or None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    CACHE_HITS.labels(cache=self.name).inc()
+                    return value
+                del self._data[key]
+                self._evicted("expired")
+            self.misses += 1
+            CACHE_MISSES.labels(cache=self.name).inc()
+            return default
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self._evicted("capacity")
+            CACHE_SIZE.labels(cache=self.name).set(len(self._data))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            CACHE_SIZE.labels(cache=self.name).set(0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def __len__(self):
+        return len(self._data)
+
+    def _evicted(self, reason: str):
+        self.evictions += 1
+        CACHE_EVICTIONS.labels(cache=self.name, reason=reason).inc()
+        CACHE_SIZE.labels(cache=self.name).set(len(self._data))
@@ -3,6 +3,7 @@ import json
 import uuid
 from datetime import datetime
 import logging
+from services.incident_sink import get_incident_sink
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,6 +21,7 @@ def log_incident(snapshot: dict):
         "timestamp": datetime.now().isoformat(),
         "snapshot": snapshot
     }
-    # 实际写入 Kafka / 日志系统
-    print(f"📝 工单已创建: {incident_id}")
-    return incident_id
\ No newline at end of file
+    # 异步攒批写入 JSONL 分段 / Kafka，不阻塞请求
+    get_incident_sink().submit(record)
+    logger.info(f"工单已创建: {incident_id}")
+    return incident_id
@@ -0,0 +1,37 @@
+# utils/memory.py
+"""
+进程内存统计（Linux /proc/<pid>/smaps_rollup）：
+- rss: 常驻内存，共享页在每个进程中都会重复计算
+- pss: 共享页按共享进程数均摊
+- uss: 进程独占页（Private_Clean + Private_Dirty），即结束该进程能释放的内存
+pre-fork 共享是否生效看 worker 的 uss：模型与索引页共享时，uss 应远小于 rss。
+"""
+
+
+def process_memory(pid: int) -> dict:
+    """返回 {"rss", "pss", "uss"}，单位字节"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def format_memory_report(rows: list) -> str:
+    """rows: [(名称, pid)]，返回对齐的 MB 表格"""
+    lines = [f"{'process':<12} {'pid':>8} {'rss_mb':>10} {'pss_mb':>10} {'uss_mb':>10}"]
+    for name, pid in rows:
+        try:
+            mem = process_memory(pid)
+        except OSError:
+            continue
+        lines.append(
+            f"{name:<12} {pid:>8} {mem['rss'] / 2**20:>10.1f} {mem['pss'] / 2**20:>10.1f} {mem['uss'] / 2**20:>10.1f}"
+        )
+    return "\n".join(lines)
@@ -4,11 +4,65 @@ from prometheus_client import Counter, Histogram, Gauge
 # Intent Classification
 INTENT_REQUESTS = Counter("intent_requests_total", "Total intent classification requests")
 INTENT_CONFIDENCE = Gauge("intent_confidence", "Latest intent confidence score")
+INTENT_BATCH_SIZE = Histogram(
+    "intent_batch_size", "Texts per batched intent forward pass",
+    buckets=(1, 2, 4, 8, 16, 32, 64)
+)
+INTENT_QUEUE_WAIT = Histogram(
+    "intent_queue_wait_seconds", "Time a request waits in the intent batch queue",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+INTENT_TIER_ROUTED = Counter("intent_tier_routed_total", "Orchestrator intents decided per cascade tier", ["tier"])
+INTENT_TIER_LATENCY = Histogram(
+    "intent_tier_seconds", "Orchestrator intent latency per cascade tier", ["tier"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+)
 
 # RAG Policy
 RAG_POLICY_HIT = Counter("rag_policy_hit_total", "RAG policy hit")
 RAG_POLICY_MISS = Counter("rag_policy_miss_total", "RAG policy miss")
 RAG_DURATION = Histogram("rag_policy_duration_seconds", "RAG response time")
+RERANK_LATENCY = Histogram(
+    "rag_rerank_seconds", "Cross-encoder rerank latency per retrieve call",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5)
+)
+RERANK_FALLBACK = Counter("rag_rerank_fallback_total", "Queries served in fusion order instead of reranked", ["reason"])
+
+# Downstream API
+API_CALL_COUNTER = Counter("api_call_total", "Downstream API calls", ["intent", "status"])
+DOWNSTREAM_LATENCY = Histogram(
+    "downstream_request_seconds", "Downstream HTTP request latency", ["endpoint", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0)
+)
+CIRCUIT_STATE = Gauge("circuit_breaker_state", "Circuit state per endpoint (0=closed, 1=half_open, 2=open)", ["endpoint"])
+CIRCUIT_REJECTED = Counter("circuit_breaker_rejected_total", "Requests fast-failed by an open circuit", ["endpoint"])
+DOWNSTREAM_TIMEOUT = Gauge("downstream_timeout_seconds", "Current adaptive timeout per endpoint", ["endpoint"])
+INCIDENT_SOURCE_LATENCY = Histogram(
+    "incident_source_seconds", "Incident context fetch latency per source", ["source", "status"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0)
+)
+INCIDENT_SINK_BATCH_SIZE = Histogram(
+    "incident_sink_batch_size", "Incident records per sink write",
+    buckets=(1, 5, 10, 25, 50, 100, 250)
+)
+INCIDENT_SINK_QUEUE = Gauge("incident_sink_queue_depth", "Incident records waiting to be written")
+INCIDENT_SINK_OVERFLOW = Counter("incident_sink_overflow_total", "Incidents written synchronously because the queue was full")
+INCIDENT_SINK_ERRORS = Counter("incident_sink_errors_total", "Failed incident sink writes")
+INCIDENT_SINK_SPILLED = Counter("incident_sink_spilled_total", "Incidents spilled to local JSONL after transport retries failed")
+INCIDENT_SINK_REPLAYED = Counter("incident_sink_replayed_total", "Spilled incidents re-delivered through the transport")
+
+# Serving
+INFLIGHT_REQUESTS = Gauge("inflight_requests", "Requests currently being served on the async path")
+EXECUTOR_REJECTED = Counter("executor_rejected_total", "Work rejected due to saturation", ["executor"])
+# Startup
+COMPONENT_LOADED = Gauge("component_loaded", "Whether a lazily loaded component is ready (1) or not (0)", ["component"])
+COMPONENT_LOAD_SECONDS = Gauge("component_load_seconds", "Time spent loading a component", ["component"])
+
+# Cache
+CACHE_HITS = Counter("cache_hits_total", "Cache hits", ["cache"])
+CACHE_MISSES = Counter("cache_misses_total", "Cache misses", ["cache"])
+CACHE_EVICTIONS = Counter("cache_evictions_total", "Cache evictions", ["cache", "reason"])
+CACHE_SIZE = Gauge("cache_entries", "Current cache entries", ["cache"])
 
 # Fallback
 FALLBACK_TO_HUMAN = Counter("fallback_to_human_total", "Total fallback to human")
\ No newline at end of file
@@ -1,11 +1,17 @@
 # utils/safety_guard.py
-from config.settings import settings
+from services.pii_masker import pii_masker
+from services.sensitive_matcher import sensitive_matcher
 
-def contains_sensitive_content(text: str) -> bool:
-    return any(kw in text for kw in settings.SENSITIVE_KEYWORDS)
+def contains_sensitive_content(text: str, scope: str = "policy_text") -> bool:
+    """scope 为检查点（见 services.sensitive_matcher.SCOPES），只认该范围内的词；默认审查政策检索结果"""
+    return sensitive_matcher().contains(text, scope)
+
+def find_sensitive_terms(text: str, scope: str = None) -> list:
+    """返回 [(词, start, end)]，供审计 / 高亮使用；scope 为 None 时返回所有范围的命中"""
+    return sensitive_matcher().find(text, scope)
 
 def mask_pii(text: str) -> str:
-    import re
-    text = re.sub(r'1[3-9]\d{9}', '1XXXXXXXXX', text)
-    text = re.sub(r'[京津沪渝冀豫云辽黑湘皖鲁新苏浙赣鄂桂甘晋蒙陕吉闽贵粤青藏川宁琼使领]\d{5,6}', 'XX地址', text)
-    return text
\ No newline at end of file
+    return pii_masker.mask(text)
+
+def mask_pii_batch(texts: list) -> list:
+    return pii_masker.mask_batch(texts)